@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from pathlib import Path
 import json
 import os
@@ -15,12 +16,43 @@ router = APIRouter(prefix="/api/analysis", tags=["analysis"])
 # TODO: Make this configurable via env var or request
 ROOT_PATH = Path.cwd()
 
+
+def get_root_path() -> Path:
+    """
+    Dependency for the directory the server analyzes by default.
+
+    Endpoints take it via ``Depends`` so tests (or an embedding app) can swap
+    the root through ``app.dependency_overrides`` instead of patching
+    ``ROOT_PATH``.
+    """
+    return ROOT_PATH
+
 TSCONFIG_CANDIDATE_NAMES: Tuple[str, ...] = (
     "tsconfig.json",
     "tsconfig.app.json",
     "tsconfig.base.json",
 )
 
+# Import suffixes used when mapping specifiers onto scanned TS/TSX files.
+CODE_SUFFIXES = frozenset({".js", ".jsx", ".ts", ".tsx", ".d.ts"})
+ASSET_SUFFIXES = frozenset({
+    ".css",
+    ".scss",
+    ".sass",
+    ".less",
+    ".styl",
+    ".json",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".ico",
+    ".webp",
+    ".bmp",
+    ".avif",
+})
+
 
 def _strip_json_comments(text: str) -> str:
     """
@@ -247,28 +279,10 @@ def _resolve_internal_file(spec_path: Path, file_to_id: Dict[Path, str]) -> Opti
     # images, JSON etc.), do not try to map it onto a TS/TSX module.
     # This prevents things like `import "./index.css"` from incorrectly
     # resolving to `index.tsx`.
-    code_exts = {".js", ".jsx", ".ts", ".tsx", ".d.ts"}
-    asset_exts = {
-        ".css",
-        ".scss",
-        ".sass",
-        ".less",
-        ".styl",
-        ".json",
-        ".png",
-        ".jpg",
-        ".jpeg",
-        ".gif",
-        ".svg",
-        ".ico",
-        ".webp",
-        ".bmp",
-        ".avif",
-    }
 
     suffix = resolved.suffix
 
-    if suffix and suffix not in code_exts and suffix in asset_exts:
+    if suffix and suffix not in CODE_SUFFIXES and suffix in ASSET_SUFFIXES:
         return None
 
     # Try common TypeScript/TSX extensions based on the stem first, which
@@ -288,7 +302,7 @@ def _resolve_internal_file(spec_path: Path, file_to_id: Dict[Path, str]) -> Opti
     #
     # For any non-asset suffix that isn't a recognised JS/TS extension,
     # also try appending TS/TSX extensions to the *full* filename.
-    if suffix and suffix not in code_exts and suffix not in asset_exts:
+    if suffix and suffix not in CODE_SUFFIXES and suffix not in ASSET_SUFFIXES:
         base_name = resolved.name  # e.g. "docs.service"
         for ext in (".ts", ".tsx", ".d.ts"):
             candidate = (resolved.parent / f"{base_name}{ext}").resolve()
@@ -304,18 +318,18 @@ def _resolve_internal_file(spec_path: Path, file_to_id: Dict[Path, str]) -> Opti
     return None
 
 @router.get("", response_model=Node)
-async def get_analysis(path: str = None):
+async def get_analysis(path: str = None, root_path: Path = Depends(get_root_path)):
     """
     Get the static analysis of the codebase.
     Returns cached result if available, otherwise triggers a scan.
     """
-    target_path = Path(path) if path else ROOT_PATH
+    target_path = Path(path) if path else root_path
     
     if not target_path.exists():
          # Fallback or error? Let's error if explicit path is invalid
          if path:
              raise HTTPException(status_code=404, detail="Path not found")
-         target_path = ROOT_PATH
+         target_path = root_path
 
     cached_tree = cache.load_analysis(target_path)
     if cached_tree:
@@ -327,11 +341,11 @@ async def get_analysis(path: str = None):
     return tree
 
 @router.get("/dependencies", response_model=DependencyGraph)
-async def get_dependencies(path: str = None):
+async def get_dependencies(path: str = None, root_path: Path = Depends(get_root_path)):
     """
     Build a dependency graph for the specified path.
     """
-    target_path = Path(path) if path else ROOT_PATH
+    target_path = Path(path) if path else root_path
     if not target_path.exists():
         raise HTTPException(status_code=404, detail="Path not found")
 
@@ -527,12 +541,12 @@ async def get_dependencies(path: str = None):
     return DependencyGraph(nodes=nodes, edges=edges)
 
 @router.post("/refresh", response_model=Node)
-async def refresh_analysis():
+async def refresh_analysis(root_path: Path = Depends(get_root_path)):
     """
-    Force a re-scan of the codebase.
+    Force a re-scan of the codebase, bypassing the per-file metrics cache.
     """
-    tree = analysis.scan_codebase(ROOT_PATH)
-    cache.save_analysis(ROOT_PATH, tree)
+    tree = analysis.scan_codebase(root_path, refresh=True)
+    cache.save_analysis(root_path, tree)
     return tree
 
 
@@ -564,14 +578,14 @@ def _estimate_counts(root: Path) -> tuple[int, int]:
 
 
 @router.get("/context")
-async def get_analysis_context():
+async def get_analysis_context(root_path: Path = Depends(get_root_path)):
     """
     Return basic information about the current analysis root directory.
 
     This is used by the client to offer one-click analysis options on first
     load, for both the current working directory and the repository root.
     """
-    current_root = ROOT_PATH
+    current_root = root_path
     # Use the same repository root detection logic as the analysis layer so that
     # the client sees a consistent "repo root" regardless of how the server was
     # started (uvx, direct CLI, dev mode, etc.).
@@ -611,7 +625,9 @@ async def get_data_flow(path: str):
     
     try:
         graph = analyzer.analyze_file(str(target_path))
-        return graph
+        # The graph is already plain JSON types; skip FastAPI's recursive
+        # jsonable_encoder pass, which costs several times the dump itself.
+        return JSONResponse(graph)
     except Exception as e:
         print(f"Error analyzing data flow for {path}: {e}")
         raise HTTPException(status_code=500, detail=str(e))
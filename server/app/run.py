@@ -151,7 +151,7 @@ def _run_headless(argv: list[str]) -> None:
     scan_parser = subparsers.add_parser("scan", help="Write the raw analysis tree as JSON.")
     scan_parser.add_argument("path", nargs="?", help="Path to analyze. Defaults to the enclosing Git repo root.")
     scan_parser.add_argument("--out", default="codebase_mri.json", help="Output JSON file.")
-    scan_parser.add_argument("--refresh", action="store_true", help="Ignore cache when cache support is available.")
+    scan_parser.add_argument("--refresh", action="store_true", help="Re-analyze every file instead of reading the metrics cache.")
     scan_parser.add_argument("--format", choices=["json", "jsonl"], default="json", help="Output format. JSONL is reserved.")
     scan_parser.add_argument(
         "--include-source",
@@ -168,7 +168,7 @@ def _run_headless(argv: list[str]) -> None:
         action="store_true",
         help="Emit one compact bundled JSON report to stdout instead of writing artifact files.",
     )
-    report_parser.add_argument("--refresh", action="store_true", help="Ignore cache when cache support is available.")
+    report_parser.add_argument("--refresh", action="store_true", help="Re-analyze every file instead of reading the metrics cache.")
     report_parser.add_argument("--limit", type=int, default=50, help="Maximum ranked findings to emit.")
     report_parser.add_argument(
         "--verbose",
@@ -1,16 +1,21 @@
+import mmap
 import os
 import lizard
 import multiprocessing
+import multiprocessing.connection
 import sys
 import time
 from pathlib import Path
 
 from app.models import Node, Metrics
 from app.config import IGNORE_DIRS, IGNORE_FILES, IGNORE_EXTENSIONS
+from app.services.analysis_types import FileMetrics
+from app.services.cache import get_metrics_cache
 from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
 from app.services.markdown.markdown_analysis import MarkdownTreeSitterAnalyzer
 from app.services.ipynb.ipynb_analysis import NotebookAnalyzer
 from app.services.css.css_analysis import CssTreeSitterAnalyzer
+from app.services.line_counts import count_nonblank_lines
 from pathspec import PathSpec
 
 # Maximum time allowed for analyzing a single file in a worker process.
@@ -30,6 +35,23 @@ def _default_max_workers() -> int:
 
 MAX_ANALYSIS_WORKERS: int = _default_max_workers()
 
+# Files larger than this skip the full tree-sitter / lizard parse and only get
+# a mapped line count. Bundled `.d.ts` files, generated code and minified
+# output can be megabytes and explode into tens of thousands of scopes with
+# little analytic value.
+MAX_PARSE_BYTES: int = 2 * 1024 * 1024
+
+# Generated bundles that are never worth a full parse, regardless of size.
+DEGRADED_FILE_SUFFIXES: tuple[str, ...] = (".min.js", ".min.css", ".bundle.js")
+
+# Window size for the degraded line count, which maps the file and copies at
+# most about this much of it at a time.
+DEGRADED_WINDOW_BYTES: int = 1024 * 1024
+
+# Soft ceiling on a worker's peak resident memory. Once a process has grown
+# past this, every further file it sees takes the degraded path instead.
+MAX_ANALYSIS_RSS_BYTES: int = 2 * 1024 * 1024 * 1024
+
 _ts_analyzer = None
 _md_analyzer = None
 _ipynb_analyzer = None
@@ -72,15 +94,22 @@ def get_python_analyzer():
     return _python_analyzer
 
 def find_repo_root(start_path: Path) -> Path:
+    """
+    Nearest ancestor of ``start_path`` (inclusive) containing ``.git``, or
+    the resolved ``start_path`` itself when there is none.
+    """
     current = start_path.resolve()
     for parent in [current, *current.parents]:
         if (parent / ".git").exists(): return parent
     return current
 
 def create_node(name: str, node_type: str, path: str) -> Node:
+    # Names ("index.ts", "(body)", "map(ƒ)", ...) and types repeat across the
+    # tree, so intern them to share one string per distinct value. Paths are
+    # unique per node and are left as-is.
     return Node(
-        name=name,
-        type=node_type,
+        name=sys.intern(name),
+        type=sys.intern(node_type),
         path=path,
         metrics=Metrics(),
         children=[]
@@ -355,8 +384,30 @@ def _should_log_file_progress(completed_count: int, total_count: int) -> bool:
     return False
 
 def aggregate_metrics(node: Node) -> Metrics:
-    if not node.children: return node.metrics
+    """
+    Roll child metrics up into every folder under ``node``, children first.
 
+    Iterative post-order: only folders are rewritten (files keep what
+    attach_file_metrics set), so file and function subtrees are never
+    descended and deep trees cannot hit the recursion limit.
+    """
+    # Folders in pre-order; reversed, each folder follows all its descendants.
+    folders: list[Node] = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if current.type != "folder" or not current.children:
+            continue
+        folders.append(current)
+        stack.extend(current.children)
+
+    for folder in reversed(folders):
+        _fold_child_metrics(folder)
+    return node.metrics
+
+
+def _fold_child_metrics(node: Node) -> None:
+    """Set a folder's metrics from its (already aggregated) children."""
     total_loc = 0
     max_complexity = 0
     total_funcs = 0
@@ -379,7 +430,7 @@ def aggregate_metrics(node: Node) -> Metrics:
     total_function_loc = 0
 
     for child in node.children:
-        child_metrics = aggregate_metrics(child)
+        child_metrics = child.metrics
         total_loc += child_metrics.loc
         max_complexity = max(max_complexity, child_metrics.complexity)
         total_funcs += child_metrics.function_count
@@ -398,46 +449,120 @@ def aggregate_metrics(node: Node) -> Metrics:
         # Reconstruct total function loc from average * count
         total_function_loc += (child_metrics.average_function_length * child_metrics.function_count)
 
-    # For Folders: Sum of children
-    # For Files: We trust the attach_file_metrics logic.
-    if node.type == "folder":
-        node.metrics.loc = total_loc
-        node.metrics.complexity = max_complexity
-        node.metrics.function_count = total_funcs
-        
-        # Aggregate last_modified (max of children) and gitignored_count (sum of children)
-        node.metrics.last_modified = max((child.metrics.last_modified for child in node.children), default=0.0)
-        node.metrics.gitignored_count = sum(child.metrics.gitignored_count for child in node.children)
-        node.metrics.file_size = sum(child.metrics.file_size for child in node.children)
-        node.metrics.file_count = sum(child.metrics.file_count for child in node.children)
-        
-        node.metrics.comment_lines = total_comment_lines
-        node.metrics.comment_density = total_comment_lines / total_loc if total_loc > 0 else 0.0
-        node.metrics.max_nesting_depth = max_nesting_depth
-        node.metrics.parameter_count = total_parameter_count
-        node.metrics.todo_count = total_todo_count
-        node.metrics.classes_count = total_classes_count
-        node.metrics.average_function_length = total_function_loc / total_funcs if total_funcs > 0 else 0.0
-        node.metrics.ts_type_interface_count = total_type_interface_count
-        node.metrics.ts_type_interface_count = total_type_interface_count
-        node.metrics.ts_export_count = total_export_count
-        node.metrics.md_data_url_count = total_md_data_url_count
-        node.metrics.python_import_count = total_python_import_count
+    # Folders are the sum of their children; files keep their own metrics.
+    node.metrics.loc = total_loc
+    node.metrics.complexity = max_complexity
+    node.metrics.function_count = total_funcs
     
-    return node.metrics
+    # Aggregate last_modified (max of children) and gitignored_count (sum of children)
+    node.metrics.last_modified = max((child.metrics.last_modified for child in node.children), default=0.0)
+    node.metrics.gitignored_count = sum(child.metrics.gitignored_count for child in node.children)
+    node.metrics.file_size = sum(child.metrics.file_size for child in node.children)
+    node.metrics.file_count = sum(child.metrics.file_count for child in node.children)
+    
+    node.metrics.comment_lines = total_comment_lines
+    node.metrics.comment_density = total_comment_lines / total_loc if total_loc > 0 else 0.0
+    node.metrics.max_nesting_depth = max_nesting_depth
+    node.metrics.parameter_count = total_parameter_count
+    node.metrics.todo_count = total_todo_count
+    node.metrics.classes_count = total_classes_count
+    node.metrics.average_function_length = total_function_loc / total_funcs if total_funcs > 0 else 0.0
+    node.metrics.ts_type_interface_count = total_type_interface_count
+    node.metrics.ts_export_count = total_export_count
+    node.metrics.md_data_url_count = total_md_data_url_count
+    node.metrics.python_import_count = total_python_import_count
+
+
+def _peak_rss_bytes() -> int:
+    """
+    Return the peak resident set size of the current process in bytes, or 0
+    when the platform does not expose it (e.g. Windows has no `resource`).
+    """
+    try:
+        import resource
+    except ImportError:
+        return 0
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
 
-def analyze_single_file(file_path: str):
+
+def _should_skip_full_parse(file_path: str, size: int) -> bool:
+    """
+    Decide whether a file is too expensive to parse in full.
+
+    Notebooks are exempt from the size check: their size is dominated by
+    embedded cell outputs that the notebook analyzer never looks at.
+    """
+    lower = file_path.lower()
+    if lower.endswith(DEGRADED_FILE_SUFFIXES):
+        return True
+    if size > MAX_PARSE_BYTES and not lower.endswith(".ipynb"):
+        return True
+    return _peak_rss_bytes() > MAX_ANALYSIS_RSS_BYTES
+
+
+def _count_nonblank_lines_mapped(file_path: str) -> int:
+    """
+    Count non-blank lines without reading the whole file into memory.
+
+    The file is memory-mapped and counted in windows of roughly
+    ``DEGRADED_WINDOW_BYTES`` that always end just past a newline, so no line
+    is split between two windows and only one window is ever copied out of
+    the page cache at a time.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            nloc = 0
+            start = 0
+            while start < size:
+                end = start + DEGRADED_WINDOW_BYTES
+                if end >= size:
+                    end = size
+                else:
+                    newline = mm.rfind(b"\n", start, end)
+                    if newline == -1:
+                        # One very long line (minified output): extend to its end.
+                        newline = mm.find(b"\n", end)
+                    end = size if newline == -1 else newline + 1
+                nloc += count_nonblank_lines(mm[start:end])
+                start = end
+            return nloc
+
+
+def _analyze_degraded(file_path: str) -> FileMetrics:
+    """
+    Cheap fallback for oversized / generated files: count non-blank lines over
+    a read-only mapping of the file and report no scopes.
+    """
+    return FileMetrics(
+        nloc=_count_nonblank_lines_mapped(file_path),
+        average_cyclomatic_complexity=0.0,
+        function_list=[],
+        filename=file_path,
+    )
+
+
+def analyze_single_file(file_path: str, *, refresh: bool = False):
     """
     Wrapper to analyze a single file safely.
+    With ``refresh`` the metrics cache is written but not read.
     Must be top-level for multiprocessing pickling.
     """
     try:
+        if _should_skip_full_parse(file_path, os.stat(file_path).st_size):
+            return _analyze_degraded(file_path)
+
         if file_path.endswith(".ts") or file_path.endswith(".tsx"):
             analyzer = get_ts_analyzer()
-            return analyzer.analyze_file(file_path)
+            return analyzer.analyze_file(file_path, refresh=refresh)
         if file_path.endswith(".css") or file_path.endswith(".scss"):
             analyzer = get_css_analyzer()
-            return analyzer.analyze_file(file_path)
+            return analyzer.analyze_file(file_path, refresh=refresh)
         if file_path.endswith(".md") or file_path.endswith(".markdown"):
             analyzer = get_md_analyzer()
             return analyzer.analyze_file(file_path)
@@ -448,7 +573,7 @@ def analyze_single_file(file_path: str):
              # We can cache it similarly if we want, or just instantiate. 
              # For consistency let's add a getter or just instantiate for now to avoid circular imports / global clutter
              # actually lets follow pattern
-             return get_python_analyzer().analyze_file(file_path)
+             return get_python_analyzer().analyze_file(file_path, refresh=refresh)
             
         return lizard.analyze_file(file_path)
     except Exception as e:
@@ -456,196 +581,302 @@ def analyze_single_file(file_path: str):
         return {"error": str(e), "filename": file_path}
 
 
-def _analyze_file_in_subprocess(file_path: str, send_conn) -> None:
+def _flush_metrics_cache() -> None:
+    """Write out this process's buffered metrics-cache entries, if caching is on."""
+    cache = get_metrics_cache()
+    if cache is None:
+        return
+    try:
+        cache.flush()
+    except Exception:
+        pass
+
+
+def _analysis_worker_loop(conn, refresh: bool = False) -> None:
     """
-    Child-process entry point. Runs analysis and sends the result back over a pipe.
+    Long-lived child-process entry point. Receives file paths over ``conn``
+    until it gets ``None`` and sends back ``(result, keep_alive)`` for each.
+    ``refresh`` is passed on to ``analyze_single_file``.
+    ``keep_alive`` is False once the worker has grown past its memory ceiling,
+    after which it exits so the parent can start a fresh one.
     Must be top-level for multiprocessing pickling.
     """
     try:
-        result = analyze_single_file(file_path)
-    except Exception as e:
-        result = {"error": str(e), "filename": file_path}
-    try:
-        send_conn.send(result)
-    except Exception:
-        # If sending fails, there's nothing useful we can do here.
-        pass
+        while True:
+            try:
+                file_path = conn.recv()
+            except EOFError:
+                break
+            if file_path is None:
+                break
+            try:
+                result = analyze_single_file(file_path, refresh=refresh)
+            except Exception as e:
+                result = {"error": str(e), "filename": file_path}
+            keep_alive = _peak_rss_bytes() <= MAX_ANALYSIS_RSS_BYTES
+            if not keep_alive:
+                # Persist buffered metrics-cache writes before reporting: the
+                # parent may stop this worker as soon as it reads the result.
+                _flush_metrics_cache()
+            try:
+                conn.send((result, keep_alive))
+            except Exception as e:
+                # The result could not be pickled; report that instead.
+                conn.send(({"error": str(e), "filename": file_path}, keep_alive))
+            if not keep_alive:
+                break
     finally:
         try:
-            send_conn.close()
+            conn.close()
         except Exception:
             pass
 
 
+def _stop_worker(proc: multiprocessing.Process, conn, *, graceful: bool) -> None:
+    """Shut a worker down, asking it to exit first when ``graceful``."""
+    if graceful:
+        try:
+            conn.send(None)
+        except Exception:
+            pass
+        proc.join(timeout=1.0)
+    if proc.is_alive():
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+        try:
+            proc.join(timeout=1.0)
+        except Exception:
+            pass
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
 def _run_file_analyses_with_hard_timeouts(
     files_to_scan: list[str],
     timeout_seconds: float,
     max_workers: int,
     *,
     verbose: bool = True,
+    refresh: bool = False,
 ) -> list:
     """
-    Analyze files with a *hard* per-file timeout by running each file in its own
-    subprocess. This avoids the common pitfall where a ProcessPoolExecutor can
-    hang forever if a worker gets stuck, because individual tasks cannot be
-    force-killed reliably.
+    Analyze files with a *hard* per-file timeout on a set of reusable worker
+    subprocesses.
+
+    Each worker handles one file at a time and stays alive across files, so
+    interpreter start-up and analyzer/grammar initialization are paid once
+    per worker instead of once per file. A worker that exceeds the timeout
+    (or dies) is terminated and replaced; unlike a ProcessPoolExecutor, a
+    stuck task can therefore never hang the scan.
     """
     if not files_to_scan:
         return []
 
     ctx = multiprocessing.get_context("spawn")
     total_count = len(files_to_scan)
+    worker_count = max(1, min(max_workers, total_count))
     completed_count = 0
-
-    # Active entries: (process, file_path, start_time, recv_conn)
-    active: list[tuple[multiprocessing.Process, str, float, object]] = []
     results: list = []
 
-    next_index = 0
-    while next_index < total_count or active:
-        # Fill up worker slots.
-        while next_index < total_count and len(active) < max_workers:
-            file_path = files_to_scan[next_index]
-            next_index += 1
-
-            # Log every file *before* it is processed so we can identify the
-            # last-started file if analysis hangs or crashes.
-            if verbose:
-                print(f"➡️ [{next_index}/{total_count}] Starting analysis: {file_path}", file=sys.stderr, flush=True)
-
-            recv_conn, send_conn = ctx.Pipe(duplex=False)
-            proc = ctx.Process(
-                target=_analyze_file_in_subprocess,
-                args=(file_path, send_conn),
-                daemon=True,
-            )
-            start_time = time.time()
-            proc.start()
-            # Close the child end in the parent process to avoid leaks.
-            try:
-                send_conn.close()
-            except Exception:
-                pass
-
-            active.append((proc, file_path, start_time, recv_conn))
-
-        # Check running workers for completion or timeout.
-        still_active: list[tuple[multiprocessing.Process, str, float, object]] = []
-        now = time.time()
-
-        for proc, file_path, start_time, recv_conn in active:
-            elapsed = now - start_time
+    def start_worker():
+        parent_conn, child_conn = ctx.Pipe()
+        proc = ctx.Process(target=_analysis_worker_loop, args=(child_conn, refresh), daemon=True)
+        proc.start()
+        # Close the child end in the parent process to avoid leaks.
+        try:
+            child_conn.close()
+        except Exception:
+            pass
+        return proc, parent_conn
 
-            if proc.is_alive() and elapsed <= timeout_seconds:
-                still_active.append((proc, file_path, start_time, recv_conn))
-                continue
+    # Workers waiting for a file: (process, conn)
+    idle: list[tuple[multiprocessing.Process, object]] = []
+    # Workers analyzing a file: conn -> (process, file_path, start_time)
+    busy: dict[object, tuple[multiprocessing.Process, str, float]] = {}
 
-            # Either finished, or timed out.
-            if proc.is_alive() and elapsed > timeout_seconds:
-                completed_count += 1
+    next_index = 0
+    try:
+        while next_index < total_count or busy:
+            # Hand out files to idle workers, starting new ones up to the cap.
+            while next_index < total_count and (idle or len(busy) < worker_count):
+                file_path = files_to_scan[next_index]
+                next_index += 1
+
+                # Log every file *before* it is processed so we can identify the
+                # last-started file if analysis hangs or crashes.
                 if verbose:
-                    print(
-                        f"❌ [{completed_count}/{total_count}] Timeout analyzing {file_path} after {elapsed:.2f}s (terminated)",
-                        file=sys.stderr,
-                        flush=True,
-                    )
+                    print(f"➡️ [{next_index}/{total_count}] Starting analysis: {file_path}", file=sys.stderr, flush=True)
+
+                proc, conn = idle.pop() if idle else start_worker()
                 try:
-                    proc.terminate()
+                    conn.send(file_path)
                 except Exception:
-                    pass
+                    # The idle worker went away; replace it.
+                    _stop_worker(proc, conn, graceful=False)
+                    proc, conn = start_worker()
+                    conn.send(file_path)
+                busy[conn] = (proc, file_path, time.time())
+
+            # Sleep until a worker reports back or the oldest file times out.
+            oldest_start = min(start_time for _, _, start_time in busy.values())
+            wait_for = max(0.0, oldest_start + timeout_seconds - time.time())
+            ready = multiprocessing.connection.wait(list(busy), timeout=wait_for)
+
+            for conn in ready:
+                proc, file_path, _ = busy.pop(conn)
+                completed_count += 1
                 try:
+                    # If the child crashed before sending anything, recv may raise EOFError.
+                    result, keep_alive = conn.recv()
+                except Exception as exc:
+                    result, keep_alive = {"error": str(exc), "filename": file_path}, False
+
+                if keep_alive:
+                    idle.append((proc, conn))
+                else:
+                    # The worker exits on its own after this result; give it a
+                    # moment to do so cleanly before falling back to terminate().
                     proc.join(timeout=1.0)
-                except Exception:
-                    pass
-                try:
-                    recv_conn.close()
-                except Exception:
-                    pass
-                continue
-
-            # Process finished; collect result if possible.
-            try:
-                proc.join(timeout=0.0)
-            except Exception:
-                pass
-
-            completed_count += 1
-            result = None
-            try:
-                # If the child crashed before sending anything, recv may raise EOFError.
-                result = recv_conn.recv()
-            except Exception as exc:
-                result = {"error": str(exc), "filename": file_path}
-            finally:
-                try:
-                    recv_conn.close()
-                except Exception:
-                    pass
-
-            if isinstance(result, dict) and "error" in result:
+                    _stop_worker(proc, conn, graceful=False)
+
+                if isinstance(result, dict) and "error" in result:
+                    if verbose:
+                        print(
+                            f"❌ [{completed_count}/{total_count}] Error analyzing {file_path}: {result.get('error')}",
+                            file=sys.stderr,
+                            flush=True,
+                        )
+                else:
+                    if verbose and _should_log_file_progress(completed_count, total_count):
+                        print(f"✅ [{completed_count}/{total_count}] Analyzed {file_path}", file=sys.stderr, flush=True)
+                    results.append(result)
+
+            now = time.time()
+            for conn, (proc, file_path, start_time) in list(busy.items()):
+                elapsed = now - start_time
+                if elapsed <= timeout_seconds:
+                    continue
+                del busy[conn]
+                completed_count += 1
                 if verbose:
                     print(
-                        f"❌ [{completed_count}/{total_count}] Error analyzing {file_path}: {result.get('error')}",
+                        f"❌ [{completed_count}/{total_count}] Timeout analyzing {file_path} after {elapsed:.2f}s (terminated)",
                         file=sys.stderr,
                         flush=True,
                     )
-            else:
-                if verbose and _should_log_file_progress(completed_count, total_count):
-                    print(f"✅ [{completed_count}/{total_count}] Analyzed {file_path}", file=sys.stderr, flush=True)
-                results.append(result)
+                _stop_worker(proc, conn, graceful=False)
+    finally:
+        for proc, conn in idle:
+            _stop_worker(proc, conn, graceful=True)
+        for conn, (proc, _, _) in busy.items():
+            _stop_worker(proc, conn, graceful=False)
 
-        active = still_active
+    return results
 
-        # Avoid busy-looping when workers are running.
-        if active and (next_index < total_count or active):
-            time.sleep(0.02)
 
-    return results
+def _gitignore_rel_prefix(root_path: Path, ignore_root: Path) -> str | None:
+    """
+    Posix path of ``root_path`` relative to ``ignore_root`` ("." when equal),
+    or None when it is not underneath it.
+    """
+    try:
+        return root_path.relative_to(ignore_root).as_posix()
+    except ValueError:
+        return None
 
 
-def scan_codebase(root_path: Path, *, verbose: bool = True) -> Node:
-    if verbose:
-        print(f"🔍 Scanning: {root_path}", file=sys.stderr, flush=True)
+def _discover_files(
+    root_path: Path, ignore_root: Path, spec: PathSpec | None
+) -> tuple[list[str], dict[str, int]]:
+    """
+    Walk ``root_path`` and return (files to analyze, gitignored file count
+    per directory).
 
-    # Load .gitignore spec (repo-wide, with nested .gitignore support)
-    ignore_root, gitignore_spec = _load_gitignore_spec(root_path)
+    Same traversal and filtering as ``os.walk`` + ``_is_gitignored``, but on
+    ``os.scandir`` entries: names are filtered as plain strings and no
+    ``Path`` is built per entry. Symlinked directories are not followed.
+    """
+    root_str = str(root_path)
+    # Child paths are "<dir>/<name>", except directly under "." where Path
+    # joins drop the "./" prefix.
+    root_len = 0 if root_str == "." else len(os.path.join(root_str, ""))
+    rel_prefix = _gitignore_rel_prefix(root_path, ignore_root)
+
+    def ignored(entry_path: str) -> bool:
+        if spec is None:
+            return False
+        if rel_prefix is None:
+            return _is_gitignored(Path(entry_path), ignore_root, spec)
+        rel = entry_path[root_len:]
+        if os.sep != "/":
+            rel = rel.replace(os.sep, "/")
+        return spec.match_file(rel if rel_prefix == "." else f"{rel_prefix}/{rel}")
 
     files_to_scan: list[str] = []
     ignored_counts: dict[str, int] = {}
 
-    for root_dir, dirs, files in os.walk(root_path):
-        root_dir_path = Path(root_dir)
+    # Directories are visited depth-first in listing order, like os.walk.
+    stack = [root_str]
+    while stack:
+        dir_path = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
 
-        # Apply ignore dirs from config and .gitignore
-        # We must modify dirs in-place to prune traversal
-        pruned_dirs: list[str] = []
-        for d in dirs:
-            if d in IGNORE_DIRS or d.startswith(".srcly"):
-                continue
-            dir_path = root_dir_path / d
-            if _is_gitignored(dir_path, ignore_root, gitignore_spec):
-                # Entire directory is ignored; we skip traversing into it.
+        subdirs: list[str] = []
+        current_ignored_count = 0
+        for entry in entries:
+            name = entry.name
+            path = name if dir_path == "." else entry.path
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # Apply ignore dirs from config and .gitignore
+                if name in IGNORE_DIRS or name.startswith(".srcly"):
+                    continue
+                if entry.is_symlink() or ignored(path):
+                    continue
+                subdirs.append(path)
                 continue
-            pruned_dirs.append(d)
-        dirs[:] = pruned_dirs
 
-        current_ignored_count = 0
-        for file in files:
-            if file in IGNORE_FILES:
+            if name in IGNORE_FILES:
                 continue
-            if Path(file).suffix in IGNORE_EXTENSIONS:
+            # Same as Path(name).suffix, without building a Path.
+            dot = name.rfind(".")
+            suffix = name[dot:] if 0 < dot < len(name) - 1 else ""
+            if suffix in IGNORE_EXTENSIONS:
                 continue
 
-            file_path = root_dir_path / file
-
-            if _is_gitignored(file_path, ignore_root, gitignore_spec):
+            if ignored(path):
                 current_ignored_count += 1
                 continue
 
-            files_to_scan.append(str(file_path))
+            files_to_scan.append(path)
 
         if current_ignored_count > 0:
-            ignored_counts[str(root_dir_path)] = current_ignored_count
+            ignored_counts[dir_path] = current_ignored_count
+        stack.extend(reversed(subdirs))
+
+    return files_to_scan, ignored_counts
+
+
+def scan_codebase(root_path: Path, *, verbose: bool = True, refresh: bool = False) -> Node:
+    if verbose:
+        print(f"🔍 Scanning: {root_path}", file=sys.stderr, flush=True)
+
+    # Load .gitignore spec (repo-wide, with nested .gitignore support)
+    ignore_root, gitignore_spec = _load_gitignore_spec(root_path)
+
+    files_to_scan, ignored_counts = _discover_files(root_path, ignore_root, gitignore_spec)
 
     if verbose:
         print(
@@ -659,6 +890,7 @@ def scan_codebase(root_path: Path, *, verbose: bool = True) -> Node:
         timeout_seconds=PER_FILE_ANALYSIS_TIMEOUT_SECONDS,
         max_workers=MAX_ANALYSIS_WORKERS,
         verbose=verbose,
+        refresh=refresh,
     )
 
     tree_root = create_node("root", "folder", str(root_path))
@@ -697,7 +929,6 @@ def scan_codebase(root_path: Path, *, verbose: bool = True) -> Node:
 
         # Add File
         file_node = create_node(parts[-1], "file", str(path_obj))
-        file_node = create_node(parts[-1], "file", str(path_obj))
         attach_file_metrics(file_node, file_info)
         # Set last_modified
         try:
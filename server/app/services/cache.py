@@ -1,10 +1,39 @@
+import atexit
+import dataclasses
+import hashlib
 import json
+import os
+import sqlite3
+import threading
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 from app.models import Node
+from app.services.analysis_types import FileMetrics, FunctionMetrics
 
 CACHE_FILE_NAME = "codebase_mri.json"
 
+# Opt-in per-file metrics cache. Set SRCLY_CACHE_DIR to a directory (e.g. the
+# repo's `.srcly_cache`) to enable it; scans already skip `.srcly*` dirs.
+# Entries are plain JSON, so a corrupt or tampered row can only produce wrong
+# metrics, never run code.
+METRICS_CACHE_ENV_VAR = "SRCLY_CACHE_DIR"
+METRICS_CACHE_FILE_NAME = "ast_metrics.sqlite"
+# Bump when the stored layout changes (e.g. a FileMetrics field is renamed).
+METRICS_CACHE_SCHEMA_VERSION = 2
+# Modules (relative to app/services) whose code decides the cached metrics.
+# Their source is hashed into every key, so editing any of them invalidates
+# the cache without a manual version bump.
+METRICS_CACHE_ANALYZER_SOURCES = (
+    "analysis_types.py",
+    "line_counts.py",
+    "source_reader.py",
+    "tree_walk.py",
+    "css/css_analysis.py",
+    "python/python_analysis.py",
+    "typescript/typescript_analysis.py",
+)
+
 def get_cache_path(root_path: Path) -> Path:
     return root_path / CACHE_FILE_NAME
 
@@ -17,3 +46,113 @@ def save_analysis(root_path: Path, tree: Node) -> None:
 def load_analysis(root_path: Path) -> Optional[Node]:
     return None
 
+@lru_cache(maxsize=1)
+def analyzer_version() -> str:
+    """Digest of the schema version and the analyzer sources, computed once per process."""
+    digest = hashlib.sha256(str(METRICS_CACHE_SCHEMA_VERSION).encode("utf-8"))
+    services_dir = Path(__file__).resolve().parent
+    for rel_path in METRICS_CACHE_ANALYZER_SOURCES:
+        digest.update(rel_path.encode("utf-8"))
+        try:
+            digest.update((services_dir / rel_path).read_bytes())
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def metrics_cache_key(content: bytes, kind: str) -> bytes:
+    """Content address for a file's metrics: analyzer version + grammar + bytes."""
+    digest = hashlib.sha256(f"{analyzer_version()}:{kind}:".encode("utf-8"))
+    digest.update(content)
+    return digest.digest()
+
+
+def _function_from_dict(data: dict[str, Any]) -> FunctionMetrics:
+    children = [_function_from_dict(child) for child in data.pop("children", ())]
+    return FunctionMetrics(**data, children=children)
+
+
+def _metrics_from_json(blob: bytes) -> FileMetrics:
+    data = json.loads(blob)
+    functions = [_function_from_dict(fn) for fn in data.pop("function_list", ())]
+    return FileMetrics(**data, function_list=functions)
+
+
+class MetricsCache:
+    """
+    SQLite store of ``FileMetrics`` (as JSON) keyed by content hash.
+
+    One connection is shared per process (WAL mode so concurrent worker
+    processes can read while another writes). Writes are buffered and
+    flushed in batches with ``executemany``.
+    """
+
+    def __init__(self, path: Path, flush_every: int = 64):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._pending: dict[bytes, bytes] = {}
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS metrics (sha BLOB PRIMARY KEY, blob BLOB NOT NULL)")
+        self._conn.commit()
+
+    def get(self, key: bytes) -> FileMetrics | None:
+        with self._lock:
+            blob = self._pending.get(key)
+            if blob is None:
+                row = self._conn.execute("SELECT blob FROM metrics WHERE sha = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                blob = row[0]
+        try:
+            return _metrics_from_json(blob)
+        except Exception:
+            return None
+
+    def put(self, key: bytes, value: FileMetrics) -> None:
+        blob = json.dumps(dataclasses.asdict(value), separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._pending[key] = blob
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO metrics (sha, blob) VALUES (?, ?)",
+            list(self._pending.items()),
+        )
+        self._conn.commit()
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+_METRICS_CACHES: dict[tuple[int, str], MetricsCache] = {}
+_METRICS_CACHES_LOCK = threading.Lock()
+
+
+def get_metrics_cache() -> Optional[MetricsCache]:
+    """Return this process's metrics cache, or None when caching is disabled."""
+    cache_dir = os.environ.get(METRICS_CACHE_ENV_VAR)
+    if not cache_dir:
+        return None
+    # Keyed by pid so spawned/forked workers never share a connection.
+    key = (os.getpid(), os.path.abspath(cache_dir))
+    with _METRICS_CACHES_LOCK:
+        cache = _METRICS_CACHES.get(key)
+        if cache is None:
+            cache = MetricsCache(Path(key[1]) / METRICS_CACHE_FILE_NAME)
+            _METRICS_CACHES[key] = cache
+            atexit.register(cache.flush)
+        return cache
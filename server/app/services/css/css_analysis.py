@@ -6,11 +6,38 @@ import tree_sitter_scss as tsscss
 from tree_sitter import Language, Node, Parser
 
 from app.services.analysis_types import FileMetrics, FunctionMetrics
+from app.services.cache import get_metrics_cache, metrics_cache_key
+from app.services.line_counts import count_nonblank_lines
+from app.services.source_reader import read_source
+from app.services.tree_walk import walk_tree
 
 
 CSS_LANGUAGE = Language(tscss.language())
 SCSS_LANGUAGE = Language(tsscss.language())
 
+# Node types checked for every node during scope extraction, built once.
+_RULE_LIKE_TYPES = frozenset({
+    "rule_set",
+    "ruleset",
+    "style_rule",
+    "qualified_rule",
+    "media_rule",
+    "supports_rule",
+    "keyframes_rule",
+    "font_face_rule",
+    "page_rule",
+})
+_SCSS_SCOPE_TYPES = frozenset({
+    "mixin_declaration",
+    "mixin_definition",
+    "function_declaration",
+    "function_definition",
+    "if_statement",
+    "each_statement",
+    "for_statement",
+    "while_statement",
+})
+
 
 class CssTreeSitterAnalyzer:
     """
@@ -30,17 +57,30 @@ class CssTreeSitterAnalyzer:
         self.css_parser = Parser(CSS_LANGUAGE)
         self.scss_parser = Parser(SCSS_LANGUAGE)
 
-    def analyze_file(self, file_path: str) -> FileMetrics:
-        with open(file_path, "rb") as f:
-            content = f.read()
+    def analyze_file(self, file_path: str, *, refresh: bool = False) -> FileMetrics:
+        content = read_source(file_path)
 
         is_scss = file_path.endswith(".scss")
+
+        cache = get_metrics_cache()
+        if cache is not None:
+            key = metrics_cache_key(content, "scss" if is_scss else "css")
+            cached = None if refresh else cache.get(key)
+            if cached is not None:
+                cached.filename = file_path
+                return cached
+
+        result = self._analyze_content(file_path, content, is_scss)
+        if cache is not None:
+            cache.put(key, result)
+        return result
+
+    def _analyze_content(self, file_path: str, content: bytes, is_scss: bool) -> FileMetrics:
         parser = self.scss_parser if is_scss else self.css_parser
         tree = parser.parse(content)
 
         # Simple non-empty line count for LOC
-        lines = content.splitlines()
-        nloc = len([l for l in lines if l.strip()])
+        nloc = count_nonblank_lines(content)
 
         scopes = self._extract_scopes(tree.root_node, content, is_scss=is_scss)
 
@@ -96,18 +136,22 @@ class CssTreeSitterAnalyzer:
         function definitions as scopes.
         """
 
-        def walk(node: Node) -> List[FunctionMetrics]:
-            results: List[FunctionMetrics] = []
-            for child in node.children:
-                if self._node_is_scope(child, is_scss=is_scss):
-                    scope = self._build_scope_metrics(child, content, is_scss=is_scss)
-                    scope.children = walk(child)
-                    results.append(scope)
-                else:
-                    results.extend(walk(child))
-            return results
-
-        return walk(root)
+        results: List[FunctionMetrics] = []
+        # One frame per open node: the list its descendants' scopes belong in.
+        frames: List[List[FunctionMetrics]] = []
+        for node, depth, entering in walk_tree(root):
+            if not entering:
+                frames.pop()
+                continue
+            out = frames[-1] if frames else results
+            if depth and self._node_is_scope(node, is_scss=is_scss):
+                scope = self._build_scope_metrics(node, content, is_scss=is_scss)
+                scope.children = []
+                out.append(scope)
+                out = scope.children
+            frames.append(out)
+
+        return results
 
     def _node_is_scope(self, node: Node, is_scss: bool) -> bool:
         """
@@ -120,18 +164,7 @@ class CssTreeSitterAnalyzer:
         t = node.type
 
         # Common CSS rule / at-rule containers.
-        rule_like_types = {
-            "rule_set",
-            "ruleset",
-            "style_rule",
-            "qualified_rule",
-            "media_rule",
-            "supports_rule",
-            "keyframes_rule",
-            "font_face_rule",
-            "page_rule",
-        }
-        if t in rule_like_types:
+        if t in _RULE_LIKE_TYPES:
             return True
 
         # Generic heuristic: anything with "rule" in the name (but not the
@@ -142,17 +175,7 @@ class CssTreeSitterAnalyzer:
         if is_scss:
             # SCSS-specific constructs for functions / mixins and control flow
             # that introduce nested blocks.
-            scss_scope_types = {
-                "mixin_declaration",
-                "mixin_definition",
-                "function_declaration",
-                "function_definition",
-                "if_statement",
-                "each_statement",
-                "for_statement",
-                "while_statement",
-            }
-            if t in scss_scope_types:
+            if t in _SCSS_SCOPE_TYPES:
                 return True
 
             if any(
@@ -205,18 +228,21 @@ class CssTreeSitterAnalyzer:
         first line of the node text up to the opening '{', if present.
         """
 
-        # Use byte offsets so we don't depend on child layout details.
-        src = content[node.start_byte : node.end_byte].decode(
-            "utf-8", errors="ignore"
-        )
-
-        # Take the first non-empty line.
+        # Take the first non-empty line. Use byte offsets so we don't depend
+        # on child layout details, and decode one line at a time so a rule's
+        # nested body (re-visited for every nested scope) is never decoded.
         first_line = ""
-        for line in src.splitlines():
-            stripped = line.strip()
-            if stripped:
-                first_line = stripped
-                break
+        start, stop = node.start_byte, node.end_byte
+        while start < stop and not first_line:
+            end = content.find(b"\n", start, stop)
+            if end == -1:
+                end = stop
+            for line in content[start:end].decode("utf-8", errors="ignore").splitlines():
+                stripped = line.strip()
+                if stripped:
+                    first_line = stripped
+                    break
+            start = end + 1
 
         if not first_line:
             first_line = node.type
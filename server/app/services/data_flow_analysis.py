@@ -1,14 +1,27 @@
-import tree_sitter_typescript as tstypescript
-from tree_sitter import Language, Parser, Node
+from tree_sitter import Node
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional, Any
+import hashlib
+import threading
 import uuid
 
 from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
-
-# Load TypeScript and TSX grammars
-TYPESCRIPT_LANGUAGE = Language(tstypescript.language_typescript())
-TSX_LANGUAGE = Language(tstypescript.language_tsx())
+from app.services.source_reader import read_source
+
+# Shared, immutable child list for leaf graph nodes so every node carries a
+# "children" key and walkers can index it directly.
+_NO_CHILDREN: tuple = ()
+
+# Built graphs, keyed by (path, SHA-256 of the source) and shared by every
+# analyzer (the data-flow endpoint builds a fresh one per request), so
+# reopening an unchanged file skips the parse and graph build. Keying on the
+# bytes rather than mtime/size means a same-size rewrite inside the
+# filesystem's timestamp granularity is never served a stale graph.
+# Least recently used first.
+MAX_CACHED_GRAPHS = 32
+_graph_cache: "OrderedDict[tuple[str, bytes], Dict[str, Any]]" = OrderedDict()
+_graph_cache_lock = threading.Lock()
 
 @dataclass
 class VariableDef:
@@ -47,29 +60,49 @@ class Scope:
 
 class DataFlowAnalyzer:
     def __init__(self):
-        self.ts_parser = Parser(TYPESCRIPT_LANGUAGE)
-        self.tsx_parser = Parser(TSX_LANGUAGE)
-        self.scopes: Dict[str, Scope] = {}
-        self.usages: List[VariableUsage] = []
-        self.definitions: Dict[str, VariableDef] = {}
-        self.current_scope_stack: List[Scope] = []
+        self._reset_state()
         # Reuse the rich naming heuristics from TreeSitterAnalyzer so that
         # function scopes and JSX-related constructs get meaningful labels.
         self._ts_helper = TreeSitterAnalyzer()
 
     def analyze_file(self, file_path: str) -> Dict[str, Any]:
-        with open(file_path, 'rb') as f:
-            content = f.read()
-        
+        """
+        ELK graph for ``file_path``.
+
+        Graphs for unchanged files are served from a shared cache, so treat
+        the result as read-only. A cache hit skips the traversal, so the
+        analyzer's scope and usage state is left empty rather than stale.
+        """
+        content = read_source(file_path)
+        key = (file_path, hashlib.sha256(content).digest())
+        with _graph_cache_lock:
+            graph = _graph_cache.get(key)
+            if graph is not None:
+                _graph_cache.move_to_end(key)
+        if graph is not None:
+            self._reset_state()
+            return graph
+
+        graph = self.analyze_source(file_path, content)
+        with _graph_cache_lock:
+            _graph_cache[key] = graph
+            if len(_graph_cache) > MAX_CACHED_GRAPHS:
+                _graph_cache.popitem(last=False)
+        return graph
+
+    def analyze_source(self, file_path: str, content: bytes) -> Dict[str, Any]:
+        """
+        ELK graph for in-memory ``content``, never cached or read from disk.
+
+        ``file_path`` only selects the dialect (``.tsx``/``.jsx`` parse as TSX)
+        and is echoed back as the graph's ``path``.
+        """
         is_tsx = file_path.endswith('x')
-        parser = self.tsx_parser if is_tsx else self.ts_parser
+        # The helper's parsers are shared per thread across analyzers.
+        parser = self._ts_helper.tsx_parser if is_tsx else self._ts_helper.ts_parser
         tree = parser.parse(content)
         
-        # Reset state
-        self.scopes = {}
-        self.usages = []
-        self.definitions = {}
-        self.current_scope_stack = []
+        self._reset_state()
 
         # Create global scope
         global_scope = Scope(
@@ -89,6 +122,12 @@ class DataFlowAnalyzer:
         graph["path"] = file_path
         return graph
 
+    def _reset_state(self) -> None:
+        self.scopes: Dict[str, Scope] = {}
+        self.usages: List[VariableUsage] = []
+        self.definitions: Dict[str, VariableDef] = {}
+        self.current_scope_stack: List[Scope] = []
+
     def _traverse(self, node: Node):
         # Handle Scope Creation
         scope_created = False
@@ -625,7 +664,13 @@ class DataFlowAnalyzer:
         # client can drive inline code previews without having to re-parse.
 
         elk_edges = []
-        
+
+        # Bucket usages by scope in one pass instead of rescanning the full
+        # usage list for every scope node.
+        usages_by_scope: Dict[str, List[VariableUsage]] = {}
+        for usage in self.usages:
+            usages_by_scope.setdefault(usage.scope_id, []).append(usage)
+
         # Helper to recursively build scope nodes
         def build_scope_node(scope: Scope) -> Dict[str, Any]:
             children: List[Dict[str, Any]] = []
@@ -652,6 +697,7 @@ class DataFlowAnalyzer:
                         "width": 100,
                         "height": 40,
                         "type": "variable",
+                        "children": _NO_CHILDREN,
                         "startLine": var.start_line,
                         "endLine": var.end_line,
                     }
@@ -662,8 +708,7 @@ class DataFlowAnalyzer:
             ]
 
             usage_nodes: List[Dict[str, Any]] = []
-            scope_usages = [u for u in self.usages if u.scope_id == scope.id]
-            for usage in scope_usages:
+            for usage in usages_by_scope.get(scope.id, ()):
                 definition = self.definitions.get(usage.def_id) if usage.def_id else None
 
                 # Suppress visual nodes for usages that are effectively part of
@@ -691,6 +736,7 @@ class DataFlowAnalyzer:
                             "width": 60,
                             "height": 30,
                             "type": "usage",
+                            "children": _NO_CHILDREN,
                             "startLine": usage.start_line,
                             "endLine": usage.end_line,
                         }
@@ -735,8 +781,8 @@ class DataFlowAnalyzer:
             # Turn buckets into either declaration-clusters or individual
             # children, then add the nested scope nodes.
             for line, nodes_on_line in sorted(line_buckets.items()):
-                has_var = any(n.get("type") == "variable" for n in nodes_on_line)
-                has_usage = any(n.get("type") == "usage" for n in nodes_on_line)
+                has_var = any(n["type"] == "variable" for n in nodes_on_line)
+                has_usage = any(n["type"] == "usage" for n in nodes_on_line)
 
                 # Only create a declaration cluster when there's at least one
                 # variable and one usage on the same line – this typically
@@ -744,7 +790,7 @@ class DataFlowAnalyzer:
                 if has_var and has_usage and len(nodes_on_line) >= 2:
                     # Order within the declaration: variables first, then usages.
                     def _inner_sort(node: Dict[str, Any]) -> Any:
-                        t = node.get("type")
+                        t = node["type"]
                         if t == "variable":
                             rank = 0
                         elif t == "usage":
@@ -780,8 +826,8 @@ class DataFlowAnalyzer:
             # ordered by source location.
             def _child_sort_key(child: Dict[str, Any]) -> Any:
                 start_line = child.get("startLine")
-                t = child.get("type")
-                if t in {"declaration"}:
+                t = child["type"]
+                if t == "declaration":
                     type_rank = 0
                 elif t == "variable":
                     type_rank = 1
@@ -798,8 +844,8 @@ class DataFlowAnalyzer:
             for i in range(len(children) - 1):
                 curr = children[i]
                 next_node = children[i+1]
-                curr_type = curr.get("type")
-                next_type = next_node.get("type")
+                curr_type = curr["type"]
+                next_type = next_node["type"]
 
                 # Try/catch/finally sequences: keep related handlers visually linked.
                 if curr_type == "try" and next_type in {"catch", "finally"}:
@@ -824,7 +870,7 @@ class DataFlowAnalyzer:
                     target_else = None
                     for j in range(i + 1, len(children)):
                         candidate = children[j]
-                        if candidate.get("type") == "else_branch":
+                        if candidate["type"] == "else_branch":
                             target_else = candidate
                             break
                     if target_else is not None:
@@ -1,23 +1,22 @@
 from __future__ import annotations
 
 import logging
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 
 from fastapi import HTTPException
-from tree_sitter import Language, Node, Parser
-import tree_sitter_typescript as tstypescript
+from tree_sitter import Node, Point, Tree
 
 from app.models import FocusOverlayResponse, OverlayToken
+from app.services.typescript.typescript_analysis import InputEdit, get_parser
 
 if TYPE_CHECKING:
     from app.models import ScopeGraph
 
 
-TYPESCRIPT_LANGUAGE = Language(tstypescript.language_typescript())
-TSX_LANGUAGE = Language(tstypescript.language_tsx())
-
 logger = logging.getLogger(__name__)
 
 _SUPPORTED_TYPESCRIPT_SUFFIXES: set[str] = {
@@ -27,6 +26,27 @@ _SUPPORTED_TYPESCRIPT_SUFFIXES: set[str] = {
     ".cts",
 }
 
+# Import suffixes that name non-code assets; never resolved to TS modules.
+_ASSET_SUFFIXES = frozenset({
+    ".css",
+    ".scss",
+    ".sass",
+    ".less",
+    ".styl",
+    ".json",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".svg",
+    ".ico",
+    ".webp",
+    ".bmp",
+    ".avif",
+    ".md",
+    ".txt",
+})
+
 
 def _is_supported_typescript_file(path: Path) -> bool:
     """
@@ -379,26 +399,7 @@ def _resolve_to_existing_ts_module(candidate: Path) -> Optional[Path]:
             if p.is_file():
                 return p
 
-    asset_exts = {
-        ".css",
-        ".scss",
-        ".sass",
-        ".less",
-        ".styl",
-        ".json",
-        ".png",
-        ".jpg",
-        ".jpeg",
-        ".gif",
-        ".svg",
-        ".ico",
-        ".webp",
-        ".bmp",
-        ".avif",
-        ".md",
-        ".txt",
-    }
-    if resolved.suffix and resolved.suffix in asset_exts:
+    if resolved.suffix and resolved.suffix in _ASSET_SUFFIXES:
         return None
 
     if resolved.suffix and not resolved.is_file():
@@ -434,6 +435,105 @@ def _classify_import_source(
     return False, None
 
 
+# --- Parse reuse ---
+
+# Focus requests for a file arrive repeatedly (every hover / selection change),
+# usually with identical bytes or a small edit in between. The last source and
+# tree per file are kept so those requests skip or shorten the parse.
+_MAX_CACHED_FOCUS_TREES = 16
+_focus_trees: "OrderedDict[str, tuple[bytes, Tree]]" = OrderedDict()
+_focus_trees_lock = threading.Lock()
+
+
+def _common_prefix_len(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common prefix of ``a`` and ``b``, at most ``limit``."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix_len(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common suffix of ``a`` and ``b``, at most ``limit``."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _point_at(content: bytes, offset: int) -> Point:
+    row = content.count(b"\n", 0, offset)
+    return Point(row, offset - (content.rfind(b"\n", 0, offset) + 1))
+
+
+def _edit_between(old: bytes, new: bytes) -> InputEdit:
+    """Describe ``old`` -> ``new`` as one replaced span between their common prefix and suffix."""
+    start = _common_prefix_len(old, new, min(len(old), len(new)))
+    suffix = _common_suffix_len(old, new, min(len(old), len(new)) - start)
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    return InputEdit(
+        start_byte=start,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point_at(old, start),
+        old_end_point=_point_at(old, old_end),
+        new_end_point=_point_at(new, new_end),
+    )
+
+
+def _parse_focus_source(path: Path, content: bytes, is_tsx: bool) -> Tree:
+    """
+    Parse ``content`` for ``path``, reusing the previous tree for that file.
+
+    Identical bytes get the cached tree back without parsing. Otherwise the
+    changed span is applied to a copy of the cached tree (the original may
+    still be in use by another request) and tree-sitter re-parses
+    incrementally around it.
+    """
+    key = str(path)
+    with _focus_trees_lock:
+        previous = _focus_trees.get(key)
+
+    if previous is not None and previous[0] == content:
+        tree = previous[1]
+    elif previous is not None:
+        old_content, old_tree = previous
+        edit = _edit_between(old_content, content)
+        edited = old_tree.copy()
+        edited.edit(
+            start_byte=edit.start_byte,
+            old_end_byte=edit.old_end_byte,
+            new_end_byte=edit.new_end_byte,
+            start_point=edit.start_point,
+            old_end_point=edit.old_end_point,
+            new_end_point=edit.new_end_point,
+        )
+        tree = get_parser(is_tsx).parse(content, edited)
+        if tree.root_node.has_error:
+            # Error recovery can settle differently when resumed from an old
+            # tree; re-parse broken files from scratch so results don't
+            # depend on edit history.
+            tree = get_parser(is_tsx).parse(content)
+    else:
+        tree = get_parser(is_tsx).parse(content)
+
+    with _focus_trees_lock:
+        _focus_trees[key] = (content, tree)
+        _focus_trees.move_to_end(key)
+        if len(_focus_trees) > _MAX_CACHED_FOCUS_TREES:
+            _focus_trees.popitem(last=False)
+    return tree
+
+
 # --- FocusAnalyzer ---
 
 class FocusAnalyzer:
@@ -443,8 +543,7 @@ class FocusAnalyzer:
         self.source_lines = content.decode("utf-8", errors="replace").splitlines()
         self.is_tsx = path.suffix.lower() == ".tsx" or path.name.endswith(".tsx")
         
-        parser = Parser(TSX_LANGUAGE if self.is_tsx else TYPESCRIPT_LANGUAGE)
-        self.tree = parser.parse(content)
+        self.tree = _parse_focus_source(path, content, self.is_tsx)
         self.file_total_lines = self.tree.root_node.end_point.row + 1
         
         self.scopes: Dict[str, _Scope] = {}
@@ -454,10 +553,24 @@ class FocusAnalyzer:
         self.scope_boundary_map: Dict[int, _Scope] = {} # node_id -> scope
 
         self._scope_counter = 0
-
-    def analyze(self):
-        """Run Phase 1 (Scopes/Defs) and Phase 2 (Usages)."""
+        # 1-based inclusive line window Phase 2 records usages for; None = all.
+        self._usage_lines: Tuple[int, int] | None = None
+        # node.id -> parent node, filled in by Phase 1. Node.parent re-walks
+        # the tree from the root on every call, so lookups go through here.
+        self._parents: Dict[int, Node] = {}
+
+    def analyze(self, usage_lines: Tuple[int, int] | None = None):
+        """
+        Run Phase 1 (Scopes/Defs) and Phase 2 (Usages).
+
+        Scopes and definitions always cover the whole file. With
+        ``usage_lines`` (first, last), Phase 2 skips subtrees that lie
+        entirely outside that window, so only usages on those lines are
+        recorded.
+        """
         self._scope_counter = 0
+        self._usage_lines = usage_lines
+        self._parents = {}
         self.global_scope = self._new_scope("global", self.tree.root_node, None)
         
         # Phase 1
@@ -507,7 +620,7 @@ class FocusAnalyzer:
         
         if node.type in {"arrow_function", "function_expression"}:
             # Check parent for assignment
-            p = node.parent
+            p = self._parents.get(node.id)
             if p:
                 if p.type == "variable_declarator":
                     name_node = p.child_by_field_name("name")
@@ -525,7 +638,7 @@ class FocusAnalyzer:
                         return left.text.decode("utf-8", errors="ignore")
                 elif p.type == "jsx_expression": # const x = <div onClick={() => ...} />
                     # grand parent
-                    gp = p.parent
+                    gp = self._parents.get(p.id)
                     if gp and gp.type == "jsx_attribute":
                          attr_name = gp.child_by_field_name("name")
                          if not attr_name:
@@ -594,7 +707,7 @@ class FocusAnalyzer:
             return True
 
         if n.type in {"block", "statement_block"}:
-            parent = n.parent
+            parent = self._parents.get(n.id)
             if parent and (self._is_function_node(parent) or self._is_catch_clause(parent)):
                 return False
             return True
@@ -805,7 +918,7 @@ class FocusAnalyzer:
                     scope_type=next_scope.type,
                 )
         
-        elif n.type == "identifier" and n.parent and n.parent.type == "arrow_function":
+        elif n.type == "identifier" and (parent := self._parents.get(n.id)) and parent.type == "arrow_function":
             self._add_def(
                 name_node=n,
                 kind="param",
@@ -866,7 +979,9 @@ class FocusAnalyzer:
                             )
         
         # Recurse
+        parents = self._parents
         for c in n.children:
+            parents[c.id] = n
             self._phase1_traverse(c, next_scope)
 
     def _phase2_traverse(self, n: Node, current_scope: _Scope) -> None:
@@ -875,8 +990,9 @@ class FocusAnalyzer:
             next_scope = self.scope_boundary_map[n.id]
 
         # Usages: resolve identifiers
+        parents = self._parents
         if n.type in {"identifier", "jsx_identifier"}:
-            parent = n.parent
+            parent = parents.get(n.id)
             if parent is not None:
                 # Same skips as before
                 if parent.type == "variable_declarator" and parent.child_by_field_name("name") == n:
@@ -910,7 +1026,7 @@ class FocusAnalyzer:
                     curr = n
                     is_definition_part = False
                     while curr is not None:
-                        p = curr.parent
+                        p = parents.get(curr.id)
                         if p is None:
                             break
                         if p.type == "variable_declarator":
@@ -921,7 +1037,7 @@ class FocusAnalyzer:
                                     if check == name_node:
                                         is_definition_part = True
                                         break
-                                    check = check.parent
+                                    check = parents.get(check.id)
                                 if is_definition_part:
                                     break
                         if p.type in {"required_parameter", "optional_parameter", "rest_parameter"}:
@@ -935,7 +1051,7 @@ class FocusAnalyzer:
                                     if check is param:
                                         is_definition_part = True
                                         break
-                                    check = check.parent
+                                    check = parents.get(check.id)
                             if is_definition_part:
                                 break
                         if p.type in {
@@ -975,7 +1091,12 @@ class FocusAnalyzer:
                                 )
                             )
 
+        usage_lines = self._usage_lines
         for c in n.children:
+            if usage_lines is not None and (
+                c.end_point.row + 1 < usage_lines[0] or c.start_point.row + 1 > usage_lines[1]
+            ):
+                continue
             self._phase2_traverse(c, next_scope)
 
 
@@ -1001,7 +1122,11 @@ def compute_focus_overlay(
 
     content = path.read_bytes()
     analyzer = FocusAnalyzer(path, content)
-    analyzer.analyze()
+    # Tokens are only emitted for usages inside both the slice and the focus
+    # range, so usages elsewhere are never collected.
+    analyzer.analyze(
+        usage_lines=(max(slice_start_line, focus_start_line), min(slice_end_line, focus_end_line))
+    )
 
     # --- Build tokens ---
     tokens: List[OverlayToken] = []
@@ -0,0 +1,15 @@
+# Horizontal ASCII whitespace, i.e. everything bytes.strip() removes except
+# the line terminators themselves.
+_HORIZONTAL_WHITESPACE = b" \t\x0b\x0c"
+
+
+def count_nonblank_lines(content: bytes) -> int:
+    """
+    Count lines containing at least one non-whitespace byte.
+
+    Equivalent to ``len([l for l in content.splitlines() if l.strip()])`` but
+    runs as a few C-level byte passes instead of a Python loop over lines:
+    CRs become newlines, horizontal whitespace is deleted, and what remains
+    between newlines is exactly one token per non-blank line.
+    """
+    return len(content.replace(b"\r", b"\n").translate(None, _HORIZONTAL_WHITESPACE).split())
@@ -5,10 +5,15 @@ import tree_sitter_markdown as tsmarkdown
 from tree_sitter import Language, Node, Parser
 
 from app.services.analysis_types import FileMetrics, FunctionMetrics
+from app.services.line_counts import count_nonblank_lines
+from app.services.source_reader import read_source
+from app.services.tree_walk import walk_tree
 
 
 MARKDOWN_LANGUAGE = Language(tsmarkdown.language())
 
+_BLOCK_SCOPE_TYPES = frozenset({"block_quote", "fenced_code_block", "indented_code_block"})
+
 
 class MarkdownTreeSitterAnalyzer:
     """
@@ -26,14 +31,12 @@ class MarkdownTreeSitterAnalyzer:
         self.md_parser = Parser(MARKDOWN_LANGUAGE)
 
     def analyze_file(self, file_path: str) -> FileMetrics:
-        with open(file_path, "rb") as f:
-            content = f.read()
+        content = read_source(file_path)
 
         tree = self.md_parser.parse(content)
 
         # Simple non-empty line count for LOC
-        lines = content.splitlines()
-        nloc = len([l for l in lines if l.strip()])
+        nloc = count_nonblank_lines(content)
 
         # Build section hierarchy from the markdown AST
         functions = self._extract_sections(tree.root_node, content)
@@ -160,25 +163,39 @@ class MarkdownTreeSitterAnalyzer:
         self, node: Node, content: bytes
     ) -> List[FunctionMetrics]:
         """
-        Recursively collect block-level scopes (block quotes and code blocks)
-        under the given node, stopping at any nested `section` node so that
-        subsections can manage their own block scopes.
+        Collect block-level scopes (block quotes and code blocks) under the
+        given node, stopping at any nested `section` node so that subsections
+        can manage their own block scopes.
+
+        Walks a ``TreeCursor`` in document order, not descending past a
+        section or a block scope, instead of recursing over ``node.children``.
         """
 
         scopes: List[FunctionMetrics] = []
+        cursor = node.walk()
+        depth = 0
+        while True:
+            current = cursor.node
+            node_type = current.type
+            if node_type == "section":
+                # Handled separately in _build_section_metrics
+                descend = False
+            elif node_type in _BLOCK_SCOPE_TYPES:
+                scopes.append(self._build_block_scope(current, content))
+                descend = False
+            else:
+                descend = True
 
-        if node.type == "section":
-            # Handled separately in _build_section_metrics
-            return scopes
-
-        if node.type in {"block_quote", "fenced_code_block", "indented_code_block"}:
-            scopes.append(self._build_block_scope(node, content))
-            return scopes
-
-        for child in node.children:
-            scopes.extend(self._collect_block_scopes(child, content))
-
-        return scopes
+            if descend and cursor.goto_first_child():
+                depth += 1
+                continue
+            while True:
+                if depth == 0:
+                    return scopes
+                if cursor.goto_next_sibling():
+                    break
+                cursor.goto_parent()
+                depth -= 1
 
     def _build_block_scope(self, node: Node, content: bytes) -> FunctionMetrics:
         """
@@ -300,13 +317,9 @@ class MarkdownTreeSitterAnalyzer:
         Depth-first search for the first descendant with the given type.
         """
 
-        if node.type == node_type:
-            return node
-
-        for child in node.children:
-            found = self._find_first_descendant_of_type(child, node_type)
-            if found is not None:
-                return found
+        for current, _depth, entering in walk_tree(node):
+            if entering and current.type == node_type:
+                return current
 
         return None
 
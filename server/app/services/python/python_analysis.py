@@ -1,24 +1,69 @@
+import re
+
 import tree_sitter_python as tspython
 from tree_sitter import Language, Parser, Node
 from typing import List
 
 from app.services.analysis_types import FileMetrics, FunctionMetrics
+from app.services.cache import get_metrics_cache, metrics_cache_key
+from app.services.line_counts import count_nonblank_lines
+from app.services.source_reader import read_source
+from app.services.tree_walk import walk_tree
 
 # Load Python grammar
 PYTHON_LANGUAGE = Language(tspython.language())
 
+# Single-pass scan over a comment's raw bytes.
+_TODO_RE = re.compile(rb"TODO|FIXME")
+# Any non-whitespace byte (the set bytes.strip() removes).
+_NON_BLANK_RE = re.compile(rb"[^ \t\n\r\x0b\x0c]")
+
+# Node type sets used by the scan, built once at import.
+_IMPORT_TYPES = frozenset({'import_statement', 'import_from_statement'})
+_NESTING_TYPES = frozenset({
+    'if_statement', 'for_statement', 'while_statement', 'try_statement',
+    'with_statement', 'match_statement',
+})
+_COMPLEXITY_TYPES = frozenset({
+    'if_statement', 'for_statement', 'while_statement', 'except_clause',
+    'with_statement', 'match_statement', 'case_pattern',
+})
+_LOGICAL_OPERATORS = frozenset({'and', 'or'})
+_SCOPE_TYPES = frozenset({
+    'function_definition',
+    'class_definition',
+    'lambda',
+    'async_function_definition',
+})
+_PARAMETER_TYPES = frozenset({
+    'identifier', 'typed_parameter', 'default_parameter', 'typed_default_parameter',
+    'list_splat_pattern', 'dictionary_splat_pattern',
+})
+
 class PythonTreeSitterAnalyzer:
     def __init__(self):
         self.parser = Parser(PYTHON_LANGUAGE)
 
-    def analyze_file(self, file_path: str) -> FileMetrics:
-        with open(file_path, 'rb') as f:
-            content = f.read()
+    def analyze_file(self, file_path: str, *, refresh: bool = False) -> FileMetrics:
+        content = read_source(file_path)
 
+        cache = get_metrics_cache()
+        if cache is not None:
+            key = metrics_cache_key(content, "py")
+            cached = None if refresh else cache.get(key)
+            if cached is not None:
+                cached.filename = file_path
+                return cached
+
+        result = self._analyze_content(file_path, content)
+        if cache is not None:
+            cache.put(key, result)
+        return result
+
+    def _analyze_content(self, file_path: str, content: bytes) -> FileMetrics:
         tree = self.parser.parse(content)
         
-        lines = content.splitlines()
-        nloc = len([l for l in lines if l.strip()])
+        nloc = count_nonblank_lines(content)
 
         # Initialize file-level counters
         self._file_comment_lines = 0
@@ -26,13 +71,16 @@ class PythonTreeSitterAnalyzer:
         self._file_classes_count = 0
         self._file_python_import_count = 0
         self._file_max_nesting_depth = 0
+        # (start_line, end_line, start_byte, end_byte) per import statement
+        self._import_spans: List[tuple[int, int, int, int]] = []
 
         # Run single-pass traversal
         top_level_functions = []
-        self._scan_tree(tree.root_node, top_level_functions, [], 0)
+        self._source = memoryview(content)
+        self._scan_tree(tree.root_node, top_level_functions)
+        self._source = None
         
-        # Calculate imports separately (logic is distinct and fast enough to keep separate/clean)
-        import_scope = self._compute_import_scope(tree.root_node, content)
+        import_scope = self._compute_import_scope(self._import_spans, content)
         if import_scope is not None:
              top_level_functions.insert(0, import_scope)
 
@@ -81,128 +129,132 @@ class PythonTreeSitterAnalyzer:
             md_data_url_count=0
         )
 
-    def _scan_tree(
-        self, 
-        node: Node, 
-        parent_list: List[FunctionMetrics], 
-        active_scopes: List[dict], 
-        current_nesting: int
-    ):
+    def _scan_tree(self, root: Node, top_level_functions: List[FunctionMetrics]):
         """
         Single-pass visitor to collect metrics.
-        
-        parent_list: List to append new FunctionMetrics to (children of parent scope or top level).
-        active_scopes: Stack of dicts: {'metrics': FunctionMetrics, 'base_nesting': int}
-        current_nesting: Current nesting depth relative to file root.
+
+        Iterative cursor walk: each open node has a frame of
+        (children_list, nesting, opened_scope) for its descendants.
+        children_list: List to append new FunctionMetrics to (children of parent scope or top level).
+        nesting: Nesting depth relative to file root.
+        active_scopes: Stack of dicts: {'metrics': FunctionMetrics, 'base_nesting': int, 'max_nesting': int}.
+        A scope is popped when the walk exits the node that opened it.
+
+        Nesting and comment/TODO totals are recorded on the innermost scope
+        only and folded into the enclosing scope when a scope closes.
         """
+        active_scopes: List[dict] = []
+        frames: List[tuple] = [(top_level_functions, 0, False)]
+
+        for node, _depth, entering in walk_tree(root):
+            if not entering:
+                if frames.pop()[2]:
+                    self._close_scope(active_scopes)
+                continue
+
+            parent_list, current_nesting, _ = frames[-1]
+
+            node_type = node.type
         
-        node_type = node.type
-        
-        # 1. Update File Metrics
-        if node_type == 'class_definition':
-            self._file_classes_count += 1
-        elif node_type in {'import_statement', 'import_from_statement'}:
-            self._file_python_import_count += 1
+            # 1. Update File Metrics
+            if node_type == 'class_definition':
+                self._file_classes_count += 1
+            elif node_type in _IMPORT_TYPES:
+                self._file_python_import_count += 1
+                self._import_spans.append(
+                    (node.start_point.row + 1, node.end_point.row + 1, node.start_byte, node.end_byte)
+                )
             
-        # 2. Check Nesting Depth for File
-        # File max nesting is just max of current_nesting encountered
-        # Wait, if we are at 'if' (nesting), current_nesting is passed as incremented.
-        # But we need to record it.
-        # Actually, let's track max seen.
-        is_nesting_node = node_type in {
-            'if_statement', 'for_statement', 'while_statement', 'try_statement', 
-            'with_statement', 'match_statement'
-        }
+            # 2. Check Nesting Depth for File
+            # File max nesting is just max of current_nesting encountered
+            # Wait, if we are at 'if' (nesting), current_nesting is passed as incremented.
+            # But we need to record it.
+            # Actually, let's track max seen.
+            is_nesting_node = node_type in _NESTING_TYPES
         
-        # Update nesting for next recursion
-        next_nesting = current_nesting
-        if is_nesting_node:
-            next_nesting += 1
-
-        if next_nesting > self._file_max_nesting_depth:
-            self._file_max_nesting_depth = next_nesting
-
-        # 3. Update Active Scopes (Nesting & Comments)
-        if node_type == 'comment':
-            lines = (node.end_point.row - node.start_point.row + 1)
-            text = node.text.decode('utf-8', errors='ignore')
-            is_todo = 'TODO' in text or 'FIXME' in text
+            # Update nesting for next recursion
+            next_nesting = current_nesting
+            if is_nesting_node:
+                next_nesting += 1
+
+            if next_nesting > self._file_max_nesting_depth:
+                self._file_max_nesting_depth = next_nesting
+
+            # 3. Update Active Scopes (Nesting & Comments)
+            if node_type == 'comment':
+                lines = (node.end_point.row - node.start_point.row + 1)
+                # Search the source buffer in place: no bytes copy, no decode.
+                is_todo = _TODO_RE.search(self._source[node.start_byte:node.end_byte]) is not None
             
-            self._file_comment_lines += lines
-            if is_todo:
-                self._file_todo_count += 1
-                
-            for scope in active_scopes:
-                scope['metrics'].comment_lines += lines
+                self._file_comment_lines += lines
                 if is_todo:
-                    scope['metrics'].todo_count += 1
+                    self._file_todo_count += 1
+                
+                if active_scopes:
+                    scope_metrics = active_scopes[-1]['metrics']
+                    scope_metrics.comment_lines += lines
+                    if is_todo:
+                        scope_metrics.todo_count += 1
         
-        # Update Max Nesting for Scopes
-        if is_nesting_node:
-             for scope in active_scopes:
-                 # Depth relative to where the scope started
-                 depth = next_nesting - scope['base_nesting']
-                 if depth > scope['metrics'].max_nesting_depth:
-                     scope['metrics'].max_nesting_depth = depth
-
-        # 4. Complexity (Applies to immediate scope only)
-        # Complexity types
-        if active_scopes:
-            current_scope = active_scopes[-1]['metrics']
-            if node_type in {
-                'if_statement', 'for_statement', 'while_statement', 'except_clause',
-                'with_statement', 'match_statement', 'case_pattern'
-            }:
-                current_scope.cyclomatic_complexity += 1
-            elif node_type == 'boolean_operator':
-                # Check text for 'and'/'or'
-                # Optimization: check text content
-                text = node.text.decode('utf-8')
-                if 'and' in text or 'or' in text:
-                     current_scope.cyclomatic_complexity += 1
+            # Update Max Nesting for the innermost scope; outer scopes pick it
+            # up when this one closes.
+            if is_nesting_node and active_scopes:
+                 scope = active_scopes[-1]
+                 if next_nesting > scope['max_nesting']:
+                     scope['max_nesting'] = next_nesting
+
+            # 4. Complexity (Applies to immediate scope only)
+            # Complexity types
+            if active_scopes:
+                current_scope = active_scopes[-1]['metrics']
+                if node_type in _COMPLEXITY_TYPES:
+                    current_scope.cyclomatic_complexity += 1
+                elif node_type == 'boolean_operator':
+                    # The operator is an anonymous 'and'/'or' token; checking
+                    # its type avoids copying and decoding the whole expression.
+                    op = node.child_by_field_name('operator')
+                    if op is not None and op.type in _LOGICAL_OPERATORS:
+                         current_scope.cyclomatic_complexity += 1
         
-        # 5. Handle Scope Creation
-        scope_created = False
-        target_list_for_children = parent_list
+            # 5. Handle Scope Creation
+            target_list_for_children = parent_list
         
-        # Define scope types
-        is_scope = node_type in {
-            'function_definition',
-            'class_definition',
-            'lambda',
-            'async_function_definition'
-        }
+            # Define scope types
+            is_scope = node_type in _SCOPE_TYPES
         
-        if is_scope:
-            new_metrics = self._create_scope_metrics(node)
-            parent_list.append(new_metrics)
+            if is_scope:
+                new_metrics = self._create_scope_metrics(node)
+                parent_list.append(new_metrics)
             
-            # Function complexity default is 1
-            new_metrics.cyclomatic_complexity = 1
+                # Function complexity default is 1
+                new_metrics.cyclomatic_complexity = 1
             
-            new_scope_ctx = {
-                'metrics': new_metrics,
-                'base_nesting': current_nesting 
-                # Note: 'base_nesting' is the ambient nesting level AT the function definition.
-                # Content inside will start contributing to depth from there.
-            }
-            active_scopes.append(new_scope_ctx)
-            target_list_for_children = new_metrics.children
-            scope_created = True
-
-        # Recurse
-        for child in node.children:
-            # Optimization: If we just created a scope, we are passing its children list.
-            # But we must treat the child as children of the node.
-            # The 'target_list_for_children' is where the child's *scopes* should act effectively.
-            # Wait, `scan_tree` adds *scopes* to `parent_list`.
-            # If `child` is an `if_statement` (not a scope), it shouldn't be added to `parent_list`.
-            # `scan_tree` ONLY appends to `parent_list` IF `is_scope` is true.
-            # So passing `target_list_for_children` is safe.
-            self._scan_tree(child, target_list_for_children, active_scopes, next_nesting)
-
-        if scope_created:
-            active_scopes.pop()
+                new_scope_ctx = {
+                    'metrics': new_metrics,
+                    'max_nesting': 0,
+                    'base_nesting': current_nesting 
+                    # Note: 'base_nesting' is the ambient nesting level AT the function definition.
+                    # Content inside will start contributing to depth from there.
+                }
+                active_scopes.append(new_scope_ctx)
+                target_list_for_children = new_metrics.children
+
+            frames.append((target_list_for_children, next_nesting, is_scope))
+
+    @staticmethod
+    def _close_scope(active_scopes: List[dict]) -> None:
+        """Pop the innermost scope and fold its subtree totals into its parent."""
+        scope = active_scopes.pop()
+        metrics = scope['metrics']
+        if scope['max_nesting']:
+            # Depth relative to where the scope started
+            metrics.max_nesting_depth = scope['max_nesting'] - scope['base_nesting']
+        if active_scopes:
+            parent = active_scopes[-1]
+            if scope['max_nesting'] > parent['max_nesting']:
+                parent['max_nesting'] = scope['max_nesting']
+            parent['metrics'].comment_lines += metrics.comment_lines
+            parent['metrics'].todo_count += metrics.todo_count
 
     def _create_scope_metrics(self, node: Node) -> FunctionMetrics:
         name = self._get_scope_name(node)
@@ -244,56 +296,45 @@ class PythonTreeSitterAnalyzer:
         params_node = node.child_by_field_name('parameters') 
         if params_node:
             count = 0
-            for child in params_node.children:
-                if child.type in {'identifier', 'typed_parameter', 'default_parameter', 'typed_default_parameter', 'list_splat_pattern', 'dictionary_splat_pattern'}:
+            for child in params_node.named_children:
+                if child.type in _PARAMETER_TYPES:
                      count += 1
             return count
         return 0
 
-    def _compute_import_scope(self, root_node: Node, content: bytes) -> FunctionMetrics | None:
+    def _compute_import_scope(
+        self, import_spans: List[tuple[int, int, int, int]], content: bytes
+    ) -> FunctionMetrics | None:
         """
         Create a synthetic top-level scope representing import statements.
-        Kept separate as it requires specific logic for contiguous block merging.
+        Spans are collected during the main scan; contiguous ones are merged here.
         """
-        import_spans: List[tuple[int, int]] = []
-        lines = content.splitlines()
-
-        def only_blank_lines_between(end_line: int, start_line: int) -> bool:
+        def only_blank_lines_between(end_line: int, end_byte: int, start_line: int, start_byte: int) -> bool:
             if start_line <= end_line + 1:
                 return True
-            for line_no in range(end_line + 1, start_line):
-                idx = line_no - 1
-                if 0 <= idx < len(lines):
-                    if lines[idx].strip():
-                        return False
-            return True
-
-        def traverse(n: Node) -> None:
-            if n.type in {"import_statement", "import_from_statement"}:
-                start_line = n.start_point.row + 1
-                end_line = n.end_point.row + 1
-                import_spans.append((start_line, end_line))
-            for child in n.children:
-                traverse(child)
-
-        traverse(root_node)
+            # Scan just the whole lines strictly between the two spans in the
+            # original buffer, instead of splitting the file into lines.
+            gap_start = content.find(b"\n", end_byte) + 1
+            gap_end = content.rfind(b"\n", 0, start_byte)
+            return _NON_BLANK_RE.search(content, gap_start, gap_end) is None
 
         if not import_spans:
             return None
 
-        import_spans.sort(key=lambda s: (s[0], s[1]))
-        total_import_loc = sum(e - s + 1 for s, e in import_spans)
+        import_spans.sort()
+        total_import_loc = sum(e - s + 1 for s, e, _, _ in import_spans)
 
         blocks: List[tuple[int, int, int]] = []
-        cur_s, cur_e = import_spans[0]
+        cur_s, cur_e, _, cur_end_byte = import_spans[0]
         cur_loc = cur_e - cur_s + 1
-        for s, e in import_spans[1:]:
-            if only_blank_lines_between(cur_e, s):
-                cur_e = max(cur_e, e)
+        for s, e, start_byte, end_byte in import_spans[1:]:
+            if only_blank_lines_between(cur_e, cur_end_byte, s, start_byte):
+                if e > cur_e:
+                    cur_e, cur_end_byte = e, end_byte
                 cur_loc += (e - s + 1)
             else:
                 blocks.append((cur_s, cur_e, cur_loc))
-                cur_s, cur_e = s, e
+                cur_s, cur_e, cur_end_byte = s, e, end_byte
                 cur_loc = e - s + 1
         blocks.append((cur_s, cur_e, cur_loc))
 
@@ -116,18 +116,18 @@ PROFILE_WEIGHTS: dict[str, dict[str, float]] = {
 }
 
 
-def scan_tree(root_path: Path, *, verbose: bool = True) -> Node:
-    return analysis.scan_codebase(root_path, verbose=verbose)
+def scan_tree(root_path: Path, *, verbose: bool = True, refresh: bool = False) -> Node:
+    return analysis.scan_codebase(root_path, verbose=verbose, refresh=refresh)
 
 
 def write_scan(root_path: Path, out_path: Path, *, refresh: bool = False) -> Path:
-    del refresh  # Cache support is currently a no-op in app.services.cache.
-    tree = scan_tree(root_path)
+    tree = scan_tree(root_path, refresh=refresh)
+    text = _json_dumps(_node_to_json(tree))
     if str(out_path) == "-":
-        print(_json_dumps(_node_to_json(tree)), end="")
+        print(text, end="")
         return out_path
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(_json_dumps(_node_to_json(tree)), encoding="utf-8")
+    out_path.write_text(text, encoding="utf-8")
     return out_path
 
 
@@ -147,11 +147,10 @@ def build_report_payload(
     verbose: bool = True,
     output_format: OutputFormat = "both",
 ) -> dict[str, Any]:
-    del refresh  # Cache support is currently a no-op in app.services.cache.
     if profile not in PROFILE_WEIGHTS:
         raise ValueError(f"Unknown profile: {profile}")
 
-    tree = scan_tree(root_path, verbose=verbose)
+    tree = scan_tree(root_path, verbose=verbose, refresh=refresh)
     ranked = rank_nodes(tree, profile=profile, root_path=root_path, focus_paths=focus_paths, deprioritize_paths=deprioritize_paths)
     findings = build_findings(ranked, limit=limit)
     summary_tree = summarize_tree(tree, ranked, root_path=root_path, max_depth=tree_depth, top_children=tree_top)
@@ -803,3 +802,4 @@ def _write_text(path: Path, payload: str) -> Path:
 
 def _json_dumps(payload: Any) -> str:
     return json.dumps(payload, indent=2, sort_keys=True) + "\n"
+
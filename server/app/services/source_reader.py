@@ -0,0 +1,10 @@
+def read_source(file_path: str) -> bytes:
+    """
+    Read a whole source file as bytes in one sized read.
+
+    An unbuffered ``FileIO.readall()`` sizes its buffer from ``fstat`` and
+    reads straight into the result, skipping the BufferedReader layer and its
+    extra copy.
+    """
+    with open(file_path, "rb", buffering=0) as f:
+        return f.readall()
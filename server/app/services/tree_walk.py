@@ -0,0 +1,45 @@
+import functools
+from typing import Iterator
+
+from tree_sitter import Language, Node
+
+
+def walk_tree(root: Node) -> Iterator[tuple[Node, int, bool]]:
+    """
+    Pre/post-order walk over ``root`` using a ``TreeCursor``.
+
+    Yields ``(node, depth, entering)``: once with ``entering=True`` before a
+    node's children and once with ``entering=False`` after them. Walking the
+    cursor avoids materialising a ``node.children`` list at every level.
+    """
+    cursor = root.walk()
+    depth = 0
+    yield cursor.node, depth, True
+    while True:
+        if cursor.goto_first_child():
+            depth += 1
+            yield cursor.node, depth, True
+            continue
+        yield cursor.node, depth, False
+        while not cursor.goto_next_sibling():
+            if depth == 0 or not cursor.goto_parent():
+                return
+            depth -= 1
+            yield cursor.node, depth, False
+        yield cursor.node, depth, True
+
+
+@functools.cache
+def kind_ids_for(language: Language, names: frozenset[str]) -> frozenset[int]:
+    """
+    Every ``kind_id`` of ``language`` whose type name is in ``names``.
+
+    Lets a walk test ``node.kind_id`` (a small int) instead of building the
+    ``node.type`` string for nodes it is going to ignore anyway. A name can
+    map to several ids (named and anonymous variants), so all are included.
+    """
+    return frozenset(
+        kind_id
+        for kind_id in range(language.node_kind_count)
+        if language.node_kind_for_id(kind_id) in names
+    )
@@ -1,28 +1,248 @@
+import functools
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
 import tree_sitter_typescript as tstypescript
-from tree_sitter import Language, Parser, Node
+from tree_sitter import Language, Parser, Node, Point, Query, QueryCursor, Tree
 from typing import List, Set, Dict
 
 # Load TypeScript and TSX grammars
 TYPESCRIPT_LANGUAGE = Language(tstypescript.language_typescript())
 TSX_LANGUAGE = Language(tstypescript.language_tsx())
 
+# Single-pass scans over a comment's raw bytes.
+_TODO_RE = re.compile(rb"TODO|FIXME")
+_TS_IGNORE_RE = re.compile(rb"@ts-(?:ignore|expect-error)")
+# Any byte bytes.strip() would keep, i.e. a sign that a line is not blank.
+_NON_BLANK_RE = re.compile(rb"[^ \t\n\r\x0b\x0c]")
+
+# Node type sets used by the scan and naming helpers, built once at import.
+_CLASS_TYPES = frozenset({'class_declaration', 'class_expression'})
+_NESTING_TYPES = frozenset({
+    'if_statement', 'for_statement', 'for_in_statement', 'for_of_statement',
+    'while_statement', 'do_statement', 'switch_statement', 'try_statement', 'catch_clause',
+})
+_COMPLEXITY_TYPES = frozenset({
+    'if_statement', 'for_statement', 'for_in_statement', 'for_of_statement',
+    'while_statement', 'do_statement', 'catch_clause', 'ternary_expression',
+    'case_clause',  # Switch cases
+})
+_LOGICAL_OPERATORS = frozenset({b'&&', b'||', b'??'})
+_TYPE_DECLARATION_TYPES = frozenset({'interface_declaration', 'type_alias_declaration'})
+_SCOPE_TYPES = frozenset({
+    'function_declaration',
+    'method_definition',
+    'arrow_function',
+    'function_expression',
+    'generator_function',
+    'generator_function_declaration',
+    'class_declaration',
+    'interface_declaration',
+    'type_alias_declaration',
+    'object',
+})
+_FUNCTION_BOUNDARY_TYPES = frozenset({
+    'function_declaration', 'method_definition', 'arrow_function',
+    'function_expression', 'generator_function', 'generator_function_declaration',
+})
+_FUNCTION_EXPRESSION_TYPES = frozenset({'arrow_function', 'function_expression'})
+_JSX_CONTAINER_TYPES = frozenset({'jsx_element', 'jsx_self_closing_element'})
+_NAME_NODE_TYPES = frozenset({"property_identifier", "identifier", "jsx_identifier"})
+_BLOCK_BOUNDARY_TYPES = frozenset({'program', 'statement_block'})
+
+# Node types handled by the JSX-specific part of the scan. Only the TSX
+# grammar produces them, so plain .ts files skip that block entirely.
+_JSX_NODE_TYPES = frozenset({'jsx_element', 'jsx_self_closing_element', 'jsx_fragment', 'jsx_attribute'})
+
+# Every node type _scan_tree reacts to. Any other node only needs its frame
+# pushed, which the scan does after a single kind-id check.
+_SCANNED_NODE_TYPES = (
+    _CLASS_TYPES | _NESTING_TYPES | _COMPLEXITY_TYPES | _TYPE_DECLARATION_TYPES
+    | _SCOPE_TYPES | _JSX_NODE_TYPES
+    | {
+        'export_statement', 'export_declaration', 'import_statement', 'any',
+        'jsx_text', 'string', 'string_literal', 'comment', 'binary_expression',
+        'call_expression',
+    }
+)
+
+# Lets extract_imports_exports visit only the import/export statements
+# instead of every node in the file. @body captures the bodies of
+# `declare module "x" {}`, `namespace N {}` and `declare global {}`, whose
+# statements are matched in turn.
+_IMPORT_EXPORT_QUERY_SOURCE = """
+(import_statement) @import
+(export_statement) @export
+(module body: (statement_block) @body)
+(internal_module body: (statement_block) @body)
+(ambient_declaration (statement_block) @body)
+"""
+
+
+@functools.cache
+def _import_export_query(is_tsx: bool) -> Query:
+    """
+    Compiled import/export query for the grammar, shared by every analyzer in
+    the process. Built on first use so processes that only compute metrics
+    (e.g. scan workers) never pay the compile cost.
+    """
+    return Query(TSX_LANGUAGE if is_tsx else TYPESCRIPT_LANGUAGE, _IMPORT_EXPORT_QUERY_SOURCE)
+
 from app.services.analysis_types import FileMetrics, FunctionMetrics
+from app.services.cache import get_metrics_cache, metrics_cache_key
+from app.services.line_counts import count_nonblank_lines
+from app.services.source_reader import read_source
+from app.services.tree_walk import kind_ids_for, walk_tree
+
+# Parsers are cheap to reuse but not thread-safe, so each thread lazily gets
+# its own pair instead of every analyzer instance building new ones.
+_TLS = threading.local()
+
+
+def get_parser(is_tsx: bool) -> Parser:
+    """Return this thread's TypeScript (or TSX) parser."""
+    parsers = getattr(_TLS, "parsers", None)
+    if parsers is None:
+        parsers = _TLS.parsers = {
+            False: Parser(TYPESCRIPT_LANGUAGE),
+            True: Parser(TSX_LANGUAGE),
+        }
+    return parsers[is_tsx]
+
+
+# How many files analyze_edit keeps a previous parse tree for. Least recently
+# edited files are dropped first and simply get a full parse next time.
+MAX_CACHED_TREES = 100
+
+
+@dataclass
+class InputEdit:
+    """A single text edit, in the shape ``Tree.edit`` expects."""
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: Point
+    old_end_point: Point
+    new_end_point: Point
+
+
+# Per-process analyzer used by ``TreeSitterAnalyzer.analyze_paths`` workers.
+_WORKER_ANALYZER: "TreeSitterAnalyzer | None" = None
+
+
+def _init_worker() -> None:
+    global _WORKER_ANALYZER
+    _WORKER_ANALYZER = TreeSitterAnalyzer()
+    get_parser(False)
+    get_parser(True)
+
+
+def _analyze_one(path: str) -> FileMetrics:
+    if _WORKER_ANALYZER is None:
+        _init_worker()
+    return _WORKER_ANALYZER.analyze_file(path)
+
 
 class TreeSitterAnalyzer:
     def __init__(self):
-        self.ts_parser = Parser(TYPESCRIPT_LANGUAGE)
-        self.tsx_parser = Parser(TSX_LANGUAGE)
+        # Last parse tree per file, kept only for files analyzed via
+        # analyze_edit so the next edit can be parsed incrementally. Ordered
+        # by recency and capped at MAX_CACHED_TREES.
+        self._trees: OrderedDict[str, Tree] = OrderedDict()
+        # node.id -> whether its subtree contains a function; cleared per file.
+        self._defines_function_cache: Dict[int, bool] = {}
+        # node.id -> parent node for the nodes on _scan_tree's open path.
+        self._parents: Dict[int, Node] = {}
 
-    def analyze_file(self, file_path: str) -> FileMetrics:
-        with open(file_path, 'rb') as f:
-            content = f.read()
-        
+    @property
+    def ts_parser(self) -> Parser:
+        return get_parser(False)
+
+    @property
+    def tsx_parser(self) -> Parser:
+        return get_parser(True)
+
+    @classmethod
+    def analyze_paths(cls, paths: List[str], workers: int | None = None) -> List[FileMetrics]:
+        """
+        Analyze many files across a process pool.
+
+        Parsing is CPU-bound and holds the GIL (the binding's ``Parser.parse``
+        does not release it), so parsing one file on a thread while another
+        is measured gains nothing; bulk scans fan out to processes instead.
+        Each worker builds its analyzer and parsers once in the pool
+        initializer and reuses them for every file it is handed. Results are
+        returned in the same order as ``paths``.
+        """
+        if not paths:
+            return []
+        ctx = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker) as executor:
+            return list(executor.map(_analyze_one, paths, chunksize=16))
+
+    def analyze_file(self, file_path: str, *, refresh: bool = False) -> FileMetrics:
         is_tsx = file_path.endswith('x')
-        parser = self.tsx_parser if is_tsx else self.ts_parser
-        tree = parser.parse(content)
+        content = read_source(file_path)
+
+        # Metrics are a pure function of the file bytes (and grammar), so an
+        # unchanged file can be served straight from the content cache.
+        # ``refresh`` skips that lookup but still stores the fresh result.
+        cache = get_metrics_cache()
+        if cache is not None:
+            key = metrics_cache_key(content, "tsx" if is_tsx else "ts")
+            cached = None if refresh else cache.get(key)
+            if cached is not None:
+                cached.filename = file_path
+                return cached
+
+        result = self._analyze_content(file_path, content, is_tsx)
+        if cache is not None:
+            cache.put(key, result)
+        return result
+
+    def analyze_edit(self, file_path: str, new_content: bytes, edits: List[InputEdit]) -> FileMetrics:
+        """
+        Re-analyze ``file_path`` after ``edits`` produced ``new_content``.
+
+        The previous tree for the file (if any) is edited in place and handed
+        back to the parser so unchanged subtrees are reused instead of being
+        re-parsed. The first call for a file does a full parse and seeds the
+        tree cache, which keeps the most recently edited ``MAX_CACHED_TREES``
+        files.
+        """
+        is_tsx = file_path.endswith('x')
+        old_tree = self._trees.pop(file_path, None)
+        if old_tree is not None:
+            for edit in edits:
+                old_tree.edit(
+                    start_byte=edit.start_byte,
+                    old_end_byte=edit.old_end_byte,
+                    new_end_byte=edit.new_end_byte,
+                    start_point=edit.start_point,
+                    old_end_point=edit.old_end_point,
+                    new_end_point=edit.new_end_point,
+                )
+            tree = get_parser(is_tsx).parse(new_content, old_tree)
+        else:
+            tree = get_parser(is_tsx).parse(new_content)
+        self._trees[file_path] = tree
+        if len(self._trees) > MAX_CACHED_TREES:
+            self._trees.popitem(last=False)
+        return self._analyze_content(file_path, new_content, is_tsx, tree)
+
+    def forget(self, file_path: str) -> None:
+        """Drop the cached tree for a file (e.g. when it is closed or deleted)."""
+        self._trees.pop(file_path, None)
+
+    def _analyze_content(self, file_path: str, content: bytes, is_tsx: bool, tree: Tree | None = None) -> FileMetrics:
+        if tree is None:
+            tree = get_parser(is_tsx).parse(content)
         
-        lines = content.splitlines()
-        nloc = len([l for l in lines if l.strip()])
+        nloc = count_nonblank_lines(content)
         
         # Initialize file-level counters
         self._file_comment_lines = 0
@@ -42,16 +262,29 @@ class TreeSitterAnalyzer:
         self._file_ts_type_interface_count = 0
         self._file_ts_export_count = 0
         
-        self._unique_imports: Set[str] = set()
+        # Raw source specifier bytes; only the count is reported.
+        self._unique_imports: Set[bytes] = set()
         self._string_literals: Dict[str, int] = {} # content -> count
+        # Raw JSX text / attribute string bytes -> occurrences. Decoded once
+        # per unique value after the scan instead of once per node.
+        self._raw_jsx_texts: Counter[bytes] = Counter()
+        self._raw_jsx_strings: Counter[bytes] = Counter()
+        # (start_line, end_line, start_byte, end_byte) per import statement
+        self._import_spans: List[tuple[int, int, int, int]] = []
+        self._defines_function_cache.clear()
 
         # Run single-pass traversal
         top_level_functions: List[FunctionMetrics] = []
         
-        self._scan_tree(tree.root_node, top_level_functions, [], 0, 0)
+        self._source = memoryview(content)
+        self._parents = {}
+        self._scan_tree(tree.root_node, top_level_functions, is_tsx)
+        self._source = None
+        self._parents = {}
+        self._collect_string_literals()
         
         # Compute derived metrics
-        import_scope = self._compute_import_scope(tree.root_node, content)
+        import_scope = self._compute_import_scope(self._import_spans, content)
         if import_scope is not None:
              top_level_functions.insert(0, import_scope)
              
@@ -98,223 +331,245 @@ class TreeSitterAnalyzer:
             ts_export_count=self._file_ts_export_count,
         )
 
-    def _scan_tree(
-        self,
-        node: Node,
-        parent_list: List[FunctionMetrics],
-        active_scopes: List[dict],
-        current_nesting: int,
-        current_jsx_depth: int
-    ):
+    def _scan_tree(self, root: Node, top_level_functions: List[FunctionMetrics], is_tsx: bool = True):
         """
         Single-pass visitor.
+
+        Every file- and scope-level metric (including the import spans used for
+        the synthetic "(imports)" scope) is collected in this one cursor walk.
+        ``frames`` mirrors the open node path: each entry holds the node and
+        the state it hands down to its children, and is popped when the node
+        exits. ``self._parents`` holds the parent of every node on the open
+        path (entries are dropped on exit, so it stays O(depth) rather than
+        holding a wrapper per node); naming helpers only ever climb that path,
+        so they never need the O(depth) ``Node.parent`` lookup.
+
         active_scopes: List of dicts with keys:
            'metrics': FunctionMetrics
            'base_nesting': int (nesting level at start of scope)
+           'max_nesting': int (deepest absolute nesting level seen in this scope's subtree)
            'visiting_jsx_root': Node | None (tracks the first/root TSX node found in this scope)
+
+        Nesting depth and comment/TODO counts are only recorded on the
+        innermost scope and folded into the enclosing scope when a scope
+        exits, instead of updating every open scope at every node.
         """
-        node_type = node.type
-        
-        # --- File Level Metrics ---
-        
-        if node_type in {'class_declaration', 'class_expression'}:
-            self._file_classes_count += 1
-            
-        elif node_type == 'export_statement' or node_type == 'export_declaration':
-            self._file_ts_export_count += 1
-            
-        elif node_type == 'import_statement':
-            # Extract source
-            # import ... from 'source'
-            source_node = node.child_by_field_name('source')
-            if source_node:
-                self._unique_imports.add(source_node.text.decode('utf-8'))
-        
-        elif node_type == 'any': 
-            # 'any' type usage
-            self._file_ts_any_usage_count += 1
-            
-        elif node_type == 'jsx_text':
-            text = node.text.decode('utf-8').strip()
-            if text:
-                length = len(text)
-                self._file_tsx_hardcoded_string_volume += length
-                self._string_literals[text] = self._string_literals.get(text, 0) + 1
-
-        elif node_type == 'string' or node_type == 'string_literal':
-            # Check if it's inside a JSX attribute or expression
-            parent = node.parent
-            if parent and (parent.type == 'jsx_attribute' or parent.type == 'jsx_expression'):
-                 text = node.text.decode('utf-8').strip("'\"")
-                 if text:
-                    length = len(text)
-                    self._file_tsx_hardcoded_string_volume += length
-                    self._string_literals[text] = self._string_literals.get(text, 0) + 1
-                 
-        # --- Nesting & Logic ---
-        
-        is_nesting_node = node_type in {
-            'if_statement', 'for_statement', 'for_in_statement', 'for_of_statement',
-            'while_statement', 'do_statement', 'switch_statement', 'try_statement', 'catch_clause'
-        }
-        
-        next_nesting = current_nesting
-        if is_nesting_node:
-            next_nesting += 1
-            if next_nesting > self._file_max_nesting_depth:
-                self._file_max_nesting_depth = next_nesting
-
-        # --- Comments ---
-        if node_type == 'comment':
-            lines = (node.end_point.row - node.start_point.row + 1)
-            text = node.text.decode('utf-8', errors='ignore')
-            
-            is_todo = 'TODO' in text or 'FIXME' in text
-            is_ts_ignore = '@ts-ignore' in text or '@ts-expect-error' in text
-            
-            self._file_comment_lines += lines
-            if is_todo:
-                self._file_todo_count += 1
-            if is_ts_ignore:
-                self._file_ts_ignore_count += 1
-                
-            for scope in active_scopes:
-                scope['metrics'].comment_lines += lines
+        active_scopes: List[dict] = []
+        parents = self._parents
+        # (children_list, nesting, jsx_depth, opened_scope, node) per open node
+        frames: List[tuple] = [(top_level_functions, 0, 0, False, None)]
+        scanned_kinds = kind_ids_for(TSX_LANGUAGE if is_tsx else TYPESCRIPT_LANGUAGE, _SCANNED_NODE_TYPES)
+
+        for node, _depth, entering in walk_tree(root):
+            if not entering:
+                parents.pop(node.id, None)
+                if frames.pop()[3]:
+                    self._close_scope(active_scopes)
+                continue
+
+            parent_list, current_nesting, current_jsx_depth, _, parent = frames[-1]
+            if parent is not None:
+                parents[node.id] = parent
+
+            if node.kind_id not in scanned_kinds:
+                # Identifiers, punctuation, etc.: inherit the parent's state.
+                frames.append((parent_list, current_nesting, current_jsx_depth, False, node))
+                continue
+
+            node_type = node.type
+
+            # --- File Level Metrics ---
+
+            if node_type in _CLASS_TYPES:
+                self._file_classes_count += 1
+
+            elif node_type == 'export_statement' or node_type == 'export_declaration':
+                self._file_ts_export_count += 1
+
+            elif node_type == 'import_statement':
+                self._import_spans.append(
+                    (node.start_point.row + 1, node.end_point.row + 1, node.start_byte, node.end_byte)
+                )
+                # Extract source
+                # import ... from 'source'
+                source_node = node.child_by_field_name('source')
+                if source_node:
+                    self._unique_imports.add(source_node.text)
+
+            elif node_type == 'any':
+                # 'any' type usage
+                self._file_ts_any_usage_count += 1
+
+            elif node_type == 'jsx_text':
+                self._raw_jsx_texts[node.text] += 1
+
+            elif is_tsx and (node_type == 'string' or node_type == 'string_literal'):
+                # Check if it's inside a JSX attribute or expression
+                if parent and (parent.type == 'jsx_attribute' or parent.type == 'jsx_expression'):
+                     self._raw_jsx_strings[node.text] += 1
+
+            # --- Nesting & Logic ---
+
+            is_nesting_node = node_type in _NESTING_TYPES
+
+            next_nesting = current_nesting
+            if is_nesting_node:
+                next_nesting += 1
+                if next_nesting > self._file_max_nesting_depth:
+                    self._file_max_nesting_depth = next_nesting
+
+            # --- Comments ---
+            if node_type == 'comment':
+                lines = (node.end_point.row - node.start_point.row + 1)
+                # Search the source buffer in place: no bytes copy, no decode.
+                text = self._source[node.start_byte:node.end_byte]
+
+                is_todo = _TODO_RE.search(text) is not None
+                is_ts_ignore = _TS_IGNORE_RE.search(text) is not None
+
+                self._file_comment_lines += lines
                 if is_todo:
-                    scope['metrics'].todo_count += 1
-            
-        
-        # --- Scope Nesting ---
-        if is_nesting_node and active_scopes:
-             for scope in active_scopes:
-                 depth = next_nesting - scope['base_nesting']
-                 if depth > scope['metrics'].max_nesting_depth:
-                     scope['metrics'].max_nesting_depth = depth
-
-        # --- Complexity ---
-        if active_scopes:
-            current_scope_metrics = active_scopes[-1]['metrics']
-            
-            # Standard Cyclomatic types
-            if node_type in {
-                'if_statement', 'for_statement', 'for_in_statement', 'for_of_statement',
-                'while_statement', 'do_statement', 'catch_clause', 'ternary_expression',
-                'case_clause' # Switch cases
-            }:
-                current_scope_metrics.cyclomatic_complexity += 1
-                if node_type == 'ternary_expression':
-                     if active_scopes[-1]['metrics'].is_jsx_container or active_scopes[-1]['metrics'].contains_tsx:
-                         self._file_tsx_render_branching_count += 1
-                     
-            elif node_type == 'binary_expression':
-                # Check operator
-                op = node.child_by_field_name('operator')
-                if op and op.text in {b'&&', b'||', b'??'}:
-                     current_scope_metrics.cyclomatic_complexity += 1
-                     # Render branching heuristic
-                     if (op.text == b'&&' or op.text == b'??') and (active_scopes[-1]['metrics'].is_jsx_container or active_scopes[-1]['metrics'].contains_tsx):
-                         self._file_tsx_render_branching_count += 1
-                     
-            if node_type in {'interface_declaration', 'type_alias_declaration'}:
-                current_scope_metrics.ts_type_interface_count += 1
-
-        # --- TSX/JSX Specifics ---
-        
-        is_jsx_element = node_type in {'jsx_element', 'jsx_self_closing_element', 'jsx_fragment'}
-        
-        next_jsx_depth = current_jsx_depth
-        if is_jsx_element:
-            next_jsx_depth += 1
-            if next_jsx_depth > self._file_tsx_nesting_depth:
-                self._file_tsx_nesting_depth = next_jsx_depth
-            
-            # Update Current Scope TSX Bounds
+                    self._file_todo_count += 1
+                if is_ts_ignore:
+                    self._file_ts_ignore_count += 1
+
+                if active_scopes:
+                    scope_metrics = active_scopes[-1]['metrics']
+                    scope_metrics.comment_lines += lines
+                    if is_todo:
+                        scope_metrics.todo_count += 1
+
+
+            # --- Scope Nesting ---
+            if is_nesting_node and active_scopes:
+                 scope = active_scopes[-1]
+                 if next_nesting > scope['max_nesting']:
+                     scope['max_nesting'] = next_nesting
+
+            # --- Complexity ---
             if active_scopes:
-                scope_ctx = active_scopes[-1]
-                metrics = scope_ctx['metrics']
-                
-                metrics.contains_tsx = True
-                
-                s = node.start_point.row + 1
-                e = node.end_point.row + 1
-                
-                if metrics.tsx_start_line == 0 or s < metrics.tsx_start_line:
-                    metrics.tsx_start_line = s
-                if metrics.tsx_end_line == 0 or e > metrics.tsx_end_line:
-                    metrics.tsx_end_line = e
-                    
-                # Track Root TSX Node
-                if scope_ctx['visiting_jsx_root'] is None:
-                    scope_ctx['visiting_jsx_root'] = node
-                    # Set name
-                    if node_type == 'jsx_fragment':
-                         metrics.tsx_root_name = "<fragment>"
-                         metrics.tsx_root_is_fragment = True
-                    else:
-                         metrics.tsx_root_name = self._get_function_name(node) # Reusing helper
-                         metrics.tsx_root_is_fragment = False
-
-        if node_type == 'jsx_attribute':
-             self._file_tsx_prop_count += 1
-             # Check for anonymous handler
-             if self._is_anonymous_handler(node):
-                 self._file_tsx_anonymous_handler_count += 1
-
-        if node_type == 'call_expression':
-             # useEffect check
-             func = node.child_by_field_name('function')
-             if func:
-                 func_name = func.text.decode('utf-8', errors='ignore')
-                 if func_name == 'useEffect' or func_name.endswith('.useEffect'):
-                     self._file_tsx_react_use_effect_count += 1
-        
-        if node_type in {'interface_declaration', 'type_alias_declaration'}:
-            self._file_ts_type_interface_count += 1
-            
-        # --- Scope Handling ---
-        
-        scope_created = False
-        target_list_for_children = parent_list
-        
-        # Check if this node creates a new function/class/container scope
-        is_scope = node_type in {
-            'function_declaration',
-            'method_definition',
-            'arrow_function',
-            'function_expression',
-            'generator_function',
-            'generator_function_declaration',
-            'class_declaration',
-            'interface_declaration',
-            'type_alias_declaration',
-            'object',
-        }
-        
-        # JSX Element Scope Check
-        if node_type in {'jsx_element', 'jsx_self_closing_element'}:
-            if self._is_jsx_scope(node):
-                is_scope = True
-                
-        if is_scope:
-            new_metrics = self._create_scope_metrics(node)
-            parent_list.append(new_metrics)
-            
-            # Setup new scope context
-            new_scope_ctx = {
-                'metrics': new_metrics,
-                'base_nesting': current_nesting,
-                'visiting_jsx_root': None
-            }
-            active_scopes.append(new_scope_ctx)
-            target_list_for_children = new_metrics.children
-            scope_created = True
-        
-        # --- Recurse ---
-        for child in node.children:
-            self._scan_tree(child, target_list_for_children, active_scopes, next_nesting, next_jsx_depth)
-            
-        if scope_created:
-            active_scopes.pop()
+                current_scope_metrics = active_scopes[-1]['metrics']
+
+                # Standard Cyclomatic types
+                if node_type in _COMPLEXITY_TYPES:
+                    current_scope_metrics.cyclomatic_complexity += 1
+                    if node_type == 'ternary_expression':
+                         if active_scopes[-1]['metrics'].is_jsx_container or active_scopes[-1]['metrics'].contains_tsx:
+                             self._file_tsx_render_branching_count += 1
+
+                elif node_type == 'binary_expression':
+                    # Check operator
+                    op = node.child_by_field_name('operator')
+                    if op and op.text in _LOGICAL_OPERATORS:
+                         current_scope_metrics.cyclomatic_complexity += 1
+                         # Render branching heuristic
+                         if (op.text == b'&&' or op.text == b'??') and (active_scopes[-1]['metrics'].is_jsx_container or active_scopes[-1]['metrics'].contains_tsx):
+                             self._file_tsx_render_branching_count += 1
+
+                if node_type in _TYPE_DECLARATION_TYPES:
+                    current_scope_metrics.ts_type_interface_count += 1
+
+            # --- TSX/JSX Specifics ---
+
+            next_jsx_depth = current_jsx_depth
+            is_jsx_scope = False
+            if is_tsx and node_type in _JSX_NODE_TYPES:
+                if node_type == 'jsx_attribute':
+                    self._file_tsx_prop_count += 1
+                    # Check for anonymous handler
+                    if self._is_anonymous_handler(node):
+                        self._file_tsx_anonymous_handler_count += 1
+                else:
+                    next_jsx_depth += 1
+                    if next_jsx_depth > self._file_tsx_nesting_depth:
+                        self._file_tsx_nesting_depth = next_jsx_depth
+
+                    # Update Current Scope TSX Bounds
+                    if active_scopes:
+                        scope_ctx = active_scopes[-1]
+                        metrics = scope_ctx['metrics']
+
+                        metrics.contains_tsx = True
+
+                        s = node.start_point.row + 1
+                        e = node.end_point.row + 1
+
+                        if metrics.tsx_start_line == 0 or s < metrics.tsx_start_line:
+                            metrics.tsx_start_line = s
+                        if metrics.tsx_end_line == 0 or e > metrics.tsx_end_line:
+                            metrics.tsx_end_line = e
+
+                        # Track Root TSX Node
+                        if scope_ctx['visiting_jsx_root'] is None:
+                            scope_ctx['visiting_jsx_root'] = node
+                            # Set name
+                            if node_type == 'jsx_fragment':
+                                 metrics.tsx_root_name = "<fragment>"
+                                 metrics.tsx_root_is_fragment = True
+                            else:
+                                 metrics.tsx_root_name = self._get_function_name(node) # Reusing helper
+                                 metrics.tsx_root_is_fragment = False
+
+                    # JSX Element Scope Check
+                    if node_type != 'jsx_fragment':
+                        is_jsx_scope = self._is_jsx_scope(node)
+
+            if node_type == 'call_expression':
+                 # useEffect check
+                 func = node.child_by_field_name('function')
+                 if func:
+                     func_name = func.text
+                     if func_name == b'useEffect' or func_name.endswith(b'.useEffect'):
+                         self._file_tsx_react_use_effect_count += 1
+
+            if node_type in _TYPE_DECLARATION_TYPES:
+                self._file_ts_type_interface_count += 1
+
+            # --- Scope Handling ---
+
+            target_list_for_children = parent_list
+
+            # Check if this node creates a new function/class/container scope
+            is_scope = is_jsx_scope or node_type in _SCOPE_TYPES
+
+            if is_scope:
+                new_metrics = self._create_scope_metrics(node)
+                parent_list.append(new_metrics)
+
+                # Setup new scope context
+                new_scope_ctx = {
+                    'metrics': new_metrics,
+                    'base_nesting': current_nesting,
+                    'max_nesting': 0,
+                    'visiting_jsx_root': None
+                }
+                active_scopes.append(new_scope_ctx)
+                target_list_for_children = new_metrics.children
+
+            frames.append((target_list_for_children, next_nesting, next_jsx_depth, is_scope, node))
+
+    @staticmethod
+    def _close_scope(active_scopes: List[dict]) -> None:
+        """Pop the innermost scope and fold its subtree totals into its parent."""
+        scope = active_scopes.pop()
+        metrics = scope['metrics']
+        if scope['max_nesting']:
+            metrics.max_nesting_depth = scope['max_nesting'] - scope['base_nesting']
+        if active_scopes:
+            parent = active_scopes[-1]
+            if scope['max_nesting'] > parent['max_nesting']:
+                parent['max_nesting'] = scope['max_nesting']
+            parent['metrics'].comment_lines += metrics.comment_lines
+            parent['metrics'].todo_count += metrics.todo_count
+
+    def _collect_string_literals(self) -> None:
+        """Fold the raw string counters into hardcoded-string metrics."""
+        for raw_counts, strip_chars in ((self._raw_jsx_texts, None), (self._raw_jsx_strings, "'\"")):
+            for raw, count in raw_counts.items():
+                text = raw.decode('utf-8').strip(strip_chars)
+                if text:
+                    self._file_tsx_hardcoded_string_volume += len(text) * count
+                    self._string_literals[text] = self._string_literals.get(text, 0) + count
 
     def _create_scope_metrics(self, node: Node) -> FunctionMetrics:
         name = self._get_function_name(node)
@@ -324,7 +579,7 @@ class TreeSitterAnalyzer:
         
         parameter_count = self._count_parameters(node)
         
-        is_jsx_container = node.type in {'jsx_element', 'jsx_self_closing_element'}
+        is_jsx_container = node.type in _JSX_CONTAINER_TYPES
 
         return FunctionMetrics(
             name=name,
@@ -359,8 +614,7 @@ class TreeSitterAnalyzer:
         if not name_node:
             return False
             
-        prop_name = name_node.text.decode('utf-8')
-        if not prop_name.startswith('on'):
+        if not name_node.text.startswith(b'on'):
             return False
 
         # 2. Check value
@@ -376,7 +630,7 @@ class TreeSitterAnalyzer:
         if value.type == 'jsx_expression':
             # Check inside
              for child in value.children:
-                 if child.type in {'arrow_function', 'function_expression'}:
+                 if child.type in _FUNCTION_EXPRESSION_TYPES:
                      return True
         return False
 
@@ -415,65 +669,58 @@ class TreeSitterAnalyzer:
         return False
 
     def _expression_defines_function(self, expr_node: Node) -> bool:
-        def has_func(n: Node) -> bool:
-            if n.type in {"arrow_function", "function_expression"}:
-                return True
-            for c in n.children:
-                if has_func(c):
-                    return True
-            return False
-        return has_func(expr_node)
+        # Nested JSX elements each ask this about overlapping subtrees, so
+        # results are memoized per node and shared between those queries.
+        # Leaf children (identifiers, literals, ...) are never descended into:
+        # a function expression always has at least a body below it.
+        cache = self._defines_function_cache
+        result = cache.get(expr_node.id)
+        if result is None:
+            result = expr_node.type in _FUNCTION_EXPRESSION_TYPES or any(
+                self._expression_defines_function(child)
+                for child in expr_node.named_children
+                if child.named_child_count
+            )
+            cache[expr_node.id] = result
+        return result
         
     def _count_parameters(self, func_node: Node) -> int:
         params_node = func_node.child_by_field_name('parameters')
         if params_node:
-            count = 0
-            for child in params_node.children:
-                if child.type not in {',', '(', ')', '{', '}'}:
-                    count += 1
-            return count
+            # Punctuation children are anonymous nodes, so the named child
+            # count is exactly the parameter count.
+            return params_node.named_child_count
         return 0
 
-    def _compute_import_scope(self, root_node: Node, content: bytes) -> FunctionMetrics | None:
-        import_spans: List[tuple[int, int]] = []
-        lines = content.splitlines()
-
-        def only_blank_lines_between(end_line: int, start_line: int) -> bool:
+    def _compute_import_scope(
+        self, import_spans: List[tuple[int, int, int, int]], content: bytes
+    ) -> FunctionMetrics | None:
+        def only_blank_lines_between(end_line: int, end_byte: int, start_line: int, start_byte: int) -> bool:
             if start_line <= end_line + 1:
                 return True
-            for line_no in range(end_line + 1, start_line):
-                idx = line_no - 1
-                if 0 <= idx < len(lines):
-                    if lines[idx].strip():
-                        return False
-            return True
-
-        def traverse(n: Node) -> None:
-            if n.type == "import_statement":
-                start_line = n.start_point.row + 1
-                end_line = n.end_point.row + 1
-                import_spans.append((start_line, end_line))
-            for child in n.children:
-                traverse(child)
-
-        traverse(root_node)
+            # Scan just the whole lines strictly between the two spans in the
+            # original buffer, instead of splitting the file into lines.
+            gap_start = content.find(b"\n", end_byte) + 1
+            gap_end = content.rfind(b"\n", 0, start_byte)
+            return _NON_BLANK_RE.search(content, gap_start, gap_end) is None
 
         if not import_spans:
             return None
 
-        import_spans.sort(key=lambda s: (s[0], s[1]))
-        total_import_loc = sum(e - s + 1 for s, e in import_spans)
+        import_spans.sort()
+        total_import_loc = sum(e - s + 1 for s, e, _, _ in import_spans)
 
         blocks: List[tuple[int, int, int]] = []
-        cur_s, cur_e = import_spans[0]
+        cur_s, cur_e, _, cur_end_byte = import_spans[0]
         cur_loc = cur_e - cur_s + 1
-        for s, e in import_spans[1:]:
-            if only_blank_lines_between(cur_e, s):
-                cur_e = max(cur_e, e)
+        for s, e, start_byte, end_byte in import_spans[1:]:
+            if only_blank_lines_between(cur_e, cur_end_byte, s, start_byte):
+                if e > cur_e:
+                    cur_e, cur_end_byte = e, end_byte
                 cur_loc += (e - s + 1)
             else:
                 blocks.append((cur_s, cur_e, cur_loc))
-                cur_s, cur_e = s, e
+                cur_s, cur_e, cur_end_byte = s, e, end_byte
                 cur_loc = e - s + 1
         blocks.append((cur_s, cur_e, cur_loc))
 
@@ -612,22 +859,40 @@ class TreeSitterAnalyzer:
             imports: List of dicts { "source": str, "symbols": List[str] }
             exports: List of dicts { "name": str, "type": str }
         """
-        with open(file_path, 'rb') as f:
-            content = f.read()
+        content = read_source(file_path)
         
         is_tsx = file_path.endswith('x')
-        parser = self.tsx_parser if is_tsx else self.ts_parser
-        tree = parser.parse(content)
-        
-        imports = self._get_imports(tree.root_node)
-        exports = self._get_exports(tree.root_node)
+        tree = get_parser(is_tsx).parse(content)
+
+        # Imports/exports are statements of the program or of a module /
+        # namespace body, so matching never starts deeper than a container
+        # (depth 2, e.g. `declare module` -> `module`) under the node being
+        # searched; each captured body is then searched the same way.
+        cursor = QueryCursor(_import_export_query(is_tsx))
+        cursor.set_max_start_depth(2)
+        statements: List[Node] = []
+        bodies = [tree.root_node]
+        nested = False
+        while bodies:
+            for _, captures in cursor.matches(bodies.pop()):
+                for name, nodes in captures.items():
+                    if name == "body":
+                        bodies.extend(nodes)
+                        nested = True
+                    else:
+                        statements.append(nodes[0])
+        if nested:
+            # Bodies are searched after the statements around them.
+            statements.sort(key=lambda n: n.start_byte)
+        imports = self._get_imports(statements)
+        exports = self._get_exports(statements)
         
         return imports, exports
 
-    def _get_imports(self, node: Node) -> List[dict]:
+    def _get_imports(self, statements: List[Node]) -> List[dict]:
         imports = []
-        
-        def traverse(n: Node):
+
+        for n in statements:
             if n.type == 'import_statement':
                 # Check if it is a type-only import: `import type ...`
                 # In tree-sitter-typescript, this appears as a 'type' keyword child in the import_statement.
@@ -639,12 +904,13 @@ class TreeSitterAnalyzer:
                         break
                 
                 if is_type_import:
-                    return
+                    continue
 
                 # import ... from 'source'
                 source = n.child_by_field_name('source')
                 if source:
-                    import_path = source.text.decode('utf-8').strip("'\"")
+                    # Drop the quote bytes before decoding.
+                    import_path = source.text[1:-1].decode('utf-8')
                     symbols = []
                     
                     # Extract imported symbols
@@ -668,7 +934,9 @@ class TreeSitterAnalyzer:
                                     break
 
                         if named_imports:
-                            for child in named_imports.children:
+                            # Specifiers are named nodes; the braces and commas
+                            # around them are skipped on the C side.
+                            for child in named_imports.named_children:
                                 if child.type == 'import_specifier':
                                     name_node = child.child_by_field_name('name')
                                     if name_node:
@@ -688,30 +956,26 @@ class TreeSitterAnalyzer:
                 # export ... from 'source'
                 source = n.child_by_field_name('source')
                 if source:
-                    import_path = source.text.decode('utf-8').strip("'\"")
+                    import_path = source.text[1:-1].decode('utf-8')
                     symbols = []
                     
                     # export { foo } from 'bar'
                     clause = n.child_by_field_name('clause')
                     if clause and clause.type == 'export_clause':
-                        for child in clause.children:
+                        for child in clause.named_children:
                             if child.type == 'export_specifier':
                                 name_node = child.child_by_field_name('name')
                                 if name_node:
                                     symbols.append(name_node.text.decode('utf-8'))
                     
                     imports.append({"source": import_path, "symbols": symbols})
-            
-            for child in n.children:
-                traverse(child)
-                
-        traverse(node)
+
         return imports
 
-    def _get_exports(self, node: Node) -> List[dict]:
+    def _get_exports(self, statements: List[Node]) -> List[dict]:
         exports = []
 
-        def traverse(n: Node):
+        for n in statements:
             if n.type == "export_statement":
                 # export { foo, bar }
                 clause = None
@@ -721,7 +985,7 @@ class TreeSitterAnalyzer:
                         break
                 
                 if clause:
-                    for c in clause.children:
+                    for c in clause.named_children:
                         if c.type == "export_specifier":
                             alias = c.child_by_field_name("alias")
                             name_node = c.child_by_field_name("name")
@@ -737,11 +1001,10 @@ class TreeSitterAnalyzer:
                             exports.append({"name": export_name, "type": "value"})  # simplified type
                 else:
                     # For non-clause export statements we distinguish between
-                    # `export default ...` and named declaration exports.
-                    has_default = any(
-                        child.text.decode("utf-8", errors="ignore") == "default"
-                        for child in n.children
-                    )
+                    # `export default ...` and named declaration exports. The
+                    # `default` keyword is its own anonymous child token, so a
+                    # type check avoids copying/decoding the exported subtree.
+                    has_default = any(child.type == "default" for child in n.children)
 
                     if has_default:
                         exports.append({"name": "default", "type": "default"})
@@ -777,13 +1040,12 @@ class TreeSitterAnalyzer:
                                                 }
                                             )
 
-
-            for child in n.children:
-                traverse(child)
-
-        traverse(node)
         return exports
 
+    def _parent(self, node: Node) -> Node | None:
+        parent = self._parents.get(node.id)
+        return parent if parent is not None else node.parent
+
     def _get_function_name(self, node: Node) -> str:
         # Extract name based on node type
         if node.type == 'function_declaration' or node.type == 'generator_function_declaration':
@@ -813,29 +1075,25 @@ class TreeSitterAnalyzer:
         elif node.type == 'object':
             current = node
             hops = 0
-            function_boundary_types = {
-                'function_declaration', 'method_definition', 'arrow_function',
-                'function_expression', 'generator_function', 'generator_function_declaration',
-            }
             while current is not None and hops < 12:
                 if current.type == 'jsx_attribute':
                     name_node = current.child_by_field_name('name')
                     if name_node is None:
                         for c in current.children:
-                            if c.type in {"property_identifier", "identifier", "jsx_identifier"}:
+                            if c.type in _NAME_NODE_TYPES:
                                 name_node = c
                                 break
                     if name_node:
                         return f"{name_node.text.decode('utf-8')} (obj)"
                     break
-                if current is not node and current.type in function_boundary_types:
+                if current is not node and current.type in _FUNCTION_BOUNDARY_TYPES:
                     break
-                if current.type in {'program', 'statement_block'}:
+                if current.type in _BLOCK_BOUNDARY_TYPES:
                     break
-                current = current.parent
+                current = self._parent(current)
                 hops += 1
 
-            parent = node.parent
+            parent = self._parent(node)
             if parent:
                 if parent.type == 'variable_declarator':
                     name_node = parent.child_by_field_name('name')
@@ -866,7 +1124,7 @@ class TreeSitterAnalyzer:
             return "<div />"
 
         elif node.type == 'arrow_function' or node.type == 'function_expression':
-            parent = node.parent
+            parent = self._parent(node)
             if parent and parent.type == 'variable_declarator':
                 name_node = parent.child_by_field_name('name')
                 if name_node:
@@ -880,33 +1138,46 @@ class TreeSitterAnalyzer:
                 if key:
                     return key.text.decode('utf-8')
             
-            # JSX handling
+            # JSX handling. One upward pass serves two searches:
+            #  - an enclosing jsx_attribute (within 10 hops, stopping at
+            #    function/block boundaries) names the handler outright;
+            #  - the first jsx_expression within 5 hops is remembered for the
+            #    "<Tag>(ƒ)" fallback used when nothing below matches.
+            jsx_expression = None
+            searching_attribute = True
+            searching_expression = True
             current = node
             hops = 0
-            function_boundary_types = {
-                'function_declaration', 'method_definition', 'arrow_function',
-                'function_expression', 'generator_function', 'generator_function_declaration',
-            }
-            while current is not None and hops < 10:
-                if current.type == 'jsx_attribute':
-                    name_node = current.child_by_field_name('name')
-                    if name_node is None:
-                        for c in current.children:
-                            if c.type in {"property_identifier", "identifier", "jsx_identifier"}:
-                                name_node = c
-                                break
-                    if name_node:
-                        return name_node.text.decode('utf-8')
-                    break
-                if current is not node and current.type in function_boundary_types:
-                    break
-                if current.type in {'program', 'statement_block'}:
-                    break
-                current = current.parent
+            while current is not None and (searching_attribute or searching_expression):
+                current_type = current.type
+                if searching_attribute:
+                    if current_type == 'jsx_attribute':
+                        name_node = current.child_by_field_name('name')
+                        if name_node is None:
+                            for c in current.children:
+                                if c.type in _NAME_NODE_TYPES:
+                                    name_node = c
+                                    break
+                        if name_node:
+                            return name_node.text.decode('utf-8')
+                        searching_attribute = False
+                    elif (
+                        (current is not node and current_type in _FUNCTION_BOUNDARY_TYPES)
+                        or current_type in _BLOCK_BOUNDARY_TYPES
+                    ):
+                        searching_attribute = False
+                if searching_expression and current_type == 'jsx_expression':
+                    jsx_expression = current
+                    searching_expression = False
+                current = self._parent(current)
                 hops += 1
+                if hops >= 10:
+                    searching_attribute = False
+                if hops >= 5:
+                    searching_expression = False
 
             if parent and parent.type == 'arguments':
-                grandparent = parent.parent
+                grandparent = self._parent(parent)
                 if grandparent:
                     if grandparent.type == 'call_expression':
                         func_node = grandparent.child_by_field_name('function')
@@ -923,26 +1194,20 @@ class TreeSitterAnalyzer:
                              return f"{constructor.text.decode('utf-8')}(ƒ)"
                              
             if parent and parent.type == 'parenthesized_expression':
-                grandparent = parent.parent
+                grandparent = self._parent(parent)
                 if grandparent and grandparent.type == 'call_expression':
                     func_node = grandparent.child_by_field_name('function')
                     if func_node and func_node == parent:
                         return "IIFE(ƒ)"
 
             # JSX children anonymous function
-            current = node
-            hops = 0
-            while current is not None and hops < 5:
-                if current.type == 'jsx_expression':
-                    parent = current.parent
-                    if parent and parent.type == 'jsx_element':
-                         opening = parent.child_by_field_name('open_tag')
-                         if opening:
-                             name_node = opening.child_by_field_name('name')
-                             if name_node:
-                                 return f"<{name_node.text.decode('utf-8')}>(ƒ)"
-                    break
-                current = current.parent
-                hops += 1
+            if jsx_expression is not None:
+                parent = self._parent(jsx_expression)
+                if parent and parent.type == 'jsx_element':
+                     opening = parent.child_by_field_name('open_tag')
+                     if opening:
+                         name_node = opening.child_by_field_name('name')
+                         if name_node:
+                             return f"<{name_node.text.decode('utf-8')}>(ƒ)"
 
         return "(anonymous)"
\ No newline at end of file
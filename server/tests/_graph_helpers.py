@@ -0,0 +1,74 @@
+"""Iterative walkers shared by the data-flow graph tests."""
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Tuple
+
+
+def nodes_by_type(node):
+    """
+    All descendants of ``node`` in the ELK graph, bucketed by type (each
+    bucket in document order), collected in a single iterative walk.
+    """
+    by_type = defaultdict(list)
+    stack = list(reversed(node["children"]))
+    # Bind the hot methods once instead of resolving them per node.
+    pop, extend = stack.pop, stack.extend
+    while stack:
+        child = pop()
+        by_type[child["type"]].append(child)
+        extend(reversed(child["children"]))
+    return by_type
+
+
+def iter_nodes(root):
+    """
+    Lazily yield ``(node, parent)`` for every node under ``root`` in document
+    (pre-)order, so a caller that only needs the first match stops early.
+    """
+    stack = [(child, root) for child in reversed(root["children"])]
+    while stack:
+        node, parent = stack.pop()
+        yield node, parent
+        stack.extend((child, node) for child in reversed(node["children"]))
+
+
+class GraphIndex(NamedTuple):
+    # Every node (root included) bucketed by type, in document order.
+    by_type: Dict[str, List[Dict[str, Any]]]
+    # Label text -> first node in document order carrying it.
+    by_label: Dict[str, Dict[str, Any]]
+    # Node id -> parent node (the root has no entry).
+    parent_of: Dict[str, Dict[str, Any]]
+    # Edges keyed by ``(sources, targets, type)``.
+    edges_by_endpoints: Dict[Tuple[tuple, tuple, str], Dict[str, Any]]
+
+    def ancestors(self, node):
+        parent = self.parent_of.get(node["id"])
+        while parent is not None:
+            yield parent
+            parent = self.parent_of.get(parent["id"])
+
+
+def index_graph(root) -> GraphIndex:
+    """
+    Type, label, parent and edge lookups for a whole graph from one iterative
+    walk, so assertions are plain dict lookups instead of separate traversals.
+    """
+    by_type = defaultdict(list)
+    by_label = {}
+    parent_of = {}
+    stack = [root]
+    pop, extend = stack.pop, stack.extend
+    first_with_label = by_label.setdefault
+    while stack:
+        node = pop()
+        by_type[node["type"]].append(node)
+        first_with_label(node["labels"][0]["text"], node)
+        children = node["children"]
+        for child in children:
+            parent_of[child["id"]] = node
+        extend(reversed(children))
+    edges_by_endpoints = {
+        (tuple(e.get("sources") or ()), tuple(e.get("targets") or ()), e.get("type")): e
+        for e in root.get("edges") or ()
+    }
+    return GraphIndex(by_type, by_label, parent_of, edges_by_endpoints)
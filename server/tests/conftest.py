@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.css.css_analysis import CssTreeSitterAnalyzer
+from app.services.data_flow_analysis import DataFlowAnalyzer
+
+# Importing the analyzer module loads the TS/TSX grammars, so that cost is
+# paid here, once, before collection; no background warm-up is needed.
+from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
+
+
+@pytest.fixture(scope="session")
+def analyzer():
+    """
+    One TypeScript analyzer per test process.
+
+    Per-file state is reset at the start of every analysis and parsers are
+    per-thread singletons, so the analyzer can be shared by every test (and,
+    under a parallel runner, by every test a worker process is handed).
+    """
+    return TreeSitterAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def data_flow_analyzer():
+    """One data-flow analyzer per test process; every analysis resets its state."""
+    return DataFlowAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def css_analyzer():
+    """One CSS/SCSS analyzer per test process; it keeps no per-file state."""
+    return CssTreeSitterAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    """One API test client for the whole run; the app keeps no per-client state."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def write_source(tmp_path):
+    """
+    Write ``code`` to ``tmp_path / name`` (UTF-8) and return the path as a
+    string, which is what the path-based analysis entry points take.
+    """
+
+    def _write(code: str, name: str) -> str:
+        path = tmp_path / name
+        path.write_text(code, encoding="utf-8")
+        return str(path)
+
+    return _write
@@ -1,5 +1,11 @@
 from app.services.focus_overlay import compute_focus_overlay
 
+def _tokens_by_line(overlay) -> dict:
+    by_line = {}
+    for token in overlay.tokens:
+        by_line.setdefault(token.fileLine, []).append(token)
+    return by_line
+
 def _token_text(code: str, token) -> str:
     lines = code.splitlines()
     line = lines[token.fileLine - 1]
@@ -37,7 +43,7 @@ const vizSubs = tileLineageSummaries.map(tile => ({
     # `tile` (usage) is at line 2.
     
     # Let's see if the usage at line 2 is resolved.
-    usages = [t for t in overlay.tokens if t.fileLine == 2 and _token_text(code, t) == "tile"]
+    usages = [t for t in _tokens_by_line(overlay).get(2, []) if _token_text(code, t) == "tile"]
     assert usages, "Should find at least one 'tile' token on line 2"
     for u in usages:
         assert u.category == "param", f"Expected 'param' category, but got {u.category} for symbol {u.symbolId}"
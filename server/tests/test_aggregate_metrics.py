@@ -0,0 +1,27 @@
+import sys
+
+from app.services.analysis import aggregate_metrics, create_node
+
+
+def test_aggregate_metrics_handles_deep_folder_chains() -> None:
+    """Deeply nested folders roll up without hitting the recursion limit."""
+    root = create_node("root", "folder", "/r")
+    current = root
+    for i in range(sys.getrecursionlimit() + 100):
+        folder = create_node(f"d{i}", "folder", f"{current.path}/d{i}")
+        current.children.append(folder)
+        current = folder
+
+    leaf = create_node("a.py", "file", f"{current.path}/a.py")
+    leaf.metrics.loc = 7
+    leaf.metrics.function_count = 2
+    leaf.metrics.average_function_length = 3.0
+    leaf.metrics.file_count = 1
+    current.children.append(leaf)
+
+    metrics = aggregate_metrics(root)
+
+    assert metrics.loc == 7
+    assert metrics.file_count == 1
+    assert metrics.average_function_length == 3.0
+    assert root.children[0].metrics.function_count == 2
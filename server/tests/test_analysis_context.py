@@ -1,31 +1,35 @@
 from pathlib import Path
 
 import anyio
+import pytest
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 from app.main import app as fastapi_app
-from app.routers import analysis as analysis_router
+from app.routers.analysis import get_root_path
 from app.services.analysis import find_repo_root
 
 
-def _build_test_client(monkeypatch, root_path: Path) -> TestClient:
+@pytest.fixture
+def serve_root():
     """
-    Build a TestClient with ROOT_PATH overridden so the context endpoint
-    behaves as if the server had been started from ``root_path``.
+    Point the router's root-path dependency at a directory, so endpoints
+    behave as if the server had been started from there.
     """
-    # Patch the module-level ROOT_PATH used inside the router.
-    monkeypatch.setattr(analysis_router, "ROOT_PATH", root_path)
-    return TestClient(fastapi_app)
+    def _serve(root_path: Path) -> None:
+        fastapi_app.dependency_overrides[get_root_path] = lambda: root_path
 
+    yield _serve
+    fastapi_app.dependency_overrides.pop(get_root_path, None)
 
-def test_context_root_path_matches_root_path_constant(tmp_path: Path, monkeypatch) -> None:
+
+def test_context_root_path_matches_root_path_constant(tmp_path: Path, client: TestClient, serve_root) -> None:
     """Context endpoint should report ROOT_PATH as the current root."""
     repo_root = tmp_path / "repo"
     repo_root.mkdir()
     (repo_root / ".git").mkdir()
 
-    client = _build_test_client(monkeypatch, repo_root)
+    serve_root(repo_root)
 
     resp = client.get("/api/analysis/context")
     assert resp.status_code == 200
@@ -34,7 +38,7 @@ def test_context_root_path_matches_root_path_constant(tmp_path: Path, monkeypatc
     assert data["root_path"] == str(repo_root)
 
 
-def test_context_repo_root_uses_find_repo_root(tmp_path: Path, monkeypatch) -> None:
+def test_context_repo_root_uses_find_repo_root(tmp_path: Path, client: TestClient, serve_root) -> None:
     """
     Context endpoint should use analysis.find_repo_root so that repo_root_path
     is the enclosing Git root, not just the parent directory.
@@ -45,7 +49,7 @@ def test_context_repo_root_uses_find_repo_root(tmp_path: Path, monkeypatch) -> N
     subdir = repo_root / "subdir"
     subdir.mkdir()
 
-    client = _build_test_client(monkeypatch, subdir)
+    serve_root(subdir)
 
     resp = client.get("/api/analysis/context")
     assert resp.status_code == 200
@@ -1,12 +1,7 @@
 import pytest
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
 
-@pytest.fixture
-def analyzer():
-    return TreeSitterAnalyzer()
-
-def test_anonymous_function_naming(analyzer, tmp_path):
-    content = """
+# Sample sources, kept as bytes so each test writes them without encoding.
+_NAMING_SOURCE = b"""
     function main() {
         // Case 1: Anonymous function in sort
         [1, 2].sort((a, b) => a - b);
@@ -31,47 +26,8 @@ def test_anonymous_function_naming(analyzer, tmp_path):
         })();
     }
     """
-    
-    test_file = tmp_path / "test_naming.ts"
-    test_file.write_text(content, encoding="utf-8")
-    
-    metrics = analyzer.analyze_file(str(test_file))
-    
-    main_func = metrics.function_list[0]
-    children = main_func.children
-    
-    # We expect 6 children corresponding to the 6 function sites above
-    assert len(children) == 6
-    
-    names = [c.name for c in children]
-    
-    # Current behavior (expected to fail after changes, but for now let's see what we get)
-    # I'll write assertions for the DESIRED behavior
-    
-    # Case 1: sort((a, b) => a - b) -> sort(ƒ)
-    assert "sort(ƒ)" in names
-    
-    # Case 2: map(function(item) ...) -> map(ƒ)
-    assert "map(ƒ)" in names
-    
-    # Case 3: const myFunc = ... -> myFunc
-    assert "myFunc" in names
-    
-    # Case 4: myMethod: ... -> myMethod (nested under the object scope)
-    assert "obj (object)" in names
-    obj_scope = next(c for c in children if c.name == "obj (object)")
-    obj_child_names = [c.name for c in obj_scope.children]
-    assert "myMethod" in obj_child_names
-    
-    # Case 5: foo.bar.baz(() => {}) -> baz(ƒ)
-    assert "baz(ƒ)" in names
-    
-    # Case 6: (() => { ... })() -> IIFE(ƒ)
-    assert "IIFE(ƒ)" in names
-
 
-def test_tsx_attribute_function_naming(analyzer, tmp_path):
-    content = """
+_TSX_ATTRIBUTE_SOURCE = b"""
     import React from 'react';
 
     function App() {
@@ -87,8 +43,89 @@ def test_tsx_attribute_function_naming(analyzer, tmp_path):
     }
     """
 
+_TSX_NESTED_HANDLER_SOURCE = b"""
+    import { createSignal } from 'solid-js';
+
+    function App() {
+        const [value, setValue] = createSignal('');
+
+        return (
+            <input
+                value={value()}
+                onChange={() =>
+                    run((ch) => {
+                        // TODO:AS_ANY, table chain commands come from table extension
+                        (ch as unknown as any).addColumnAfter();
+                        return ch;
+                    })
+                }
+            />
+        );
+    }
+    """
+
+_TSX_CHILD_SOURCE = b"""
+    import { Show, For } from 'solid-js';
+
+    function Chat(props) {
+        return (
+            <Show when={props.thread()}>
+                {(th) => (
+                    <For each={th().messages}>
+                        {(m) => (
+                            <div class="border rounded p-3">
+                                {m.role}
+                            </div>
+                        )}
+                    </For>
+                )}
+            </Show>
+        );
+    }
+    """
+
+@pytest.fixture(scope="module")
+def naming_main(analyzer, tmp_path_factory):
+    """The `main` scope of the six-case naming sample, analyzed once per module."""
+    test_file = tmp_path_factory.mktemp("naming") / "test_naming.ts"
+    test_file.write_bytes(_NAMING_SOURCE)
+    return analyzer.analyze_file(str(test_file)).function_list[0]
+
+
+def test_anonymous_function_naming(naming_main):
+    children = naming_main.children
+
+    # We expect 6 children corresponding to the 6 function sites above
+    assert len(children) == 6
+
+    names = [c.name for c in children]
+
+    # Case 1: sort((a, b) => a - b) -> sort(ƒ)
+    assert "sort(ƒ)" in names
+
+    # Case 2: map(function(item) ...) -> map(ƒ)
+    assert "map(ƒ)" in names
+
+    # Case 5: foo.bar.baz(() => {}) -> baz(ƒ)
+    assert "baz(ƒ)" in names
+
+    # Case 6: (() => { ... })() -> IIFE(ƒ)
+    assert "IIFE(ƒ)" in names
+
+
+def test_assigned_function_naming(naming_main):
+    # Case 3: const myFunc = ... -> myFunc
+    children_by_name = {c.name: c for c in naming_main.children}
+    assert "myFunc" in children_by_name
+
+    # Case 4: myMethod: ... -> myMethod (nested under the object scope)
+    obj_scope = children_by_name["obj (object)"]
+    assert "myMethod" in {c.name for c in obj_scope.children}
+
+
+def test_tsx_attribute_function_naming(analyzer, tmp_path):
     test_file = tmp_path / "test_naming_tsx.tsx"
-    test_file.write_text(content, encoding="utf-8")
+    test_file.write_bytes(_TSX_ATTRIBUTE_SOURCE)
 
     metrics = analyzer.analyze_file(str(test_file))
 
@@ -114,29 +151,8 @@ def test_tsx_attribute_function_naming(analyzer, tmp_path):
 
 
 def test_tsx_nested_attribute_handler_naming(analyzer, tmp_path):
-    content = """
-    import { createSignal } from 'solid-js';
-
-    function App() {
-        const [value, setValue] = createSignal('');
-
-        return (
-            <input
-                value={value()}
-                onChange={() =>
-                    run((ch) => {
-                        // TODO:AS_ANY, table chain commands come from table extension
-                        (ch as unknown as any).addColumnAfter();
-                        return ch;
-                    })
-                }
-            />
-        );
-    }
-    """
-
     test_file = tmp_path / "test_nested_handler.tsx"
-    test_file.write_text(content, encoding="utf-8")
+    test_file.write_bytes(_TSX_NESTED_HANDLER_SOURCE)
 
     metrics = analyzer.analyze_file(str(test_file))
 
@@ -169,28 +185,8 @@ def test_tsx_nested_attribute_handler_naming(analyzer, tmp_path):
     assert inner.name == "run(ƒ)"
 
 def test_tsx_component_child_naming(analyzer, tmp_path):
-    content = """
-    import { Show, For } from 'solid-js';
-
-    function Chat(props) {
-        return (
-            <Show when={props.thread()}>
-                {(th) => (
-                    <For each={th().messages}>
-                        {(m) => (
-                            <div class="border rounded p-3">
-                                {m.role}
-                            </div>
-                        )}
-                    </For>
-                )}
-            </Show>
-        );
-    }
-    """
-
     test_file = tmp_path / "test_naming_solid.tsx"
-    test_file.write_text(content, encoding="utf-8")
+    test_file.write_bytes(_TSX_CHILD_SOURCE)
 
     metrics = analyzer.analyze_file(str(test_file))
     
@@ -209,8 +205,9 @@ def test_tsx_component_child_naming(analyzer, tmp_path):
     assert tsx_root.name == "<Show>"
 
     # Under that root we expect the real <Show> container scope.
-    assert any(c.name == "<Show>" for c in tsx_root.children)
-    show_scope = next(c for c in tsx_root.children if c.name == "<Show>")
+    tsx_children_by_name = {c.name: c for c in tsx_root.children}
+    assert "<Show>" in tsx_children_by_name
+    show_scope = tsx_children_by_name["<Show>"]
 
     # Inside the <Show> scope we expect the callback function named "<Show>(ƒ)".
     assert len(show_scope.children) == 1
@@ -223,8 +220,9 @@ def test_tsx_component_child_naming(analyzer, tmp_path):
     assert for_tsx_root.name == "<For>"
 
     # Under that root, we expect the real <For> container scope.
-    assert any(c.name == "<For>" for c in for_tsx_root.children)
-    for_scope = next(c for c in for_tsx_root.children if c.name == "<For>")
+    for_children_by_name = {c.name: c for c in for_tsx_root.children}
+    assert "<For>" in for_children_by_name
+    for_scope = for_children_by_name["<For>"]
 
     # And under <For>, we expect the callback named "<For>(ƒ)".
     assert len(for_scope.children) == 1
@@ -1,69 +1,63 @@
 import os
 from pathlib import Path
 
+import pytest
+
 from app.run import _find_repo_root
 from app.services.analysis import find_repo_root
 
 
-def test_find_repo_root_cli_starts_in_repo_root(tmp_path: Path) -> None:
-    """CLI helper should return the current dir if it is a repo root."""
-    repo_root = tmp_path / "repo"
-    repo_root.mkdir()
-    (repo_root / ".git").mkdir()
+@pytest.fixture(scope="module")
+def repo_root(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """
+    A repo root (with ``subdir/nested`` inside), built once for the module.
+
+    Returned already resolved so assertions can compare against it directly.
+    """
+    root = tmp_path_factory.mktemp("layout").resolve() / "repo"
+    (root / ".git").mkdir(parents=True)
+    (root / "subdir" / "nested").mkdir(parents=True)
+    return root
+
 
+@pytest.fixture(scope="module")
+def no_repo(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A resolved directory with no enclosing .git, built once for the module."""
+    return tmp_path_factory.mktemp("no_repo").resolve()
+
+
+def test_find_repo_root_cli_starts_in_repo_root(repo_root: Path) -> None:
+    """CLI helper should return the current dir if it is a repo root."""
     result = _find_repo_root(str(repo_root))
-    assert Path(result) == repo_root
+    assert result == str(repo_root)
 
 
-def test_find_repo_root_cli_from_subdirectory(tmp_path: Path) -> None:
+def test_find_repo_root_cli_from_subdirectory(repo_root: Path) -> None:
     """CLI helper should walk upwards to the enclosing repo root."""
-    repo_root = tmp_path / "repo"
-    repo_root.mkdir()
-    (repo_root / ".git").mkdir()
-    subdir = repo_root / "subdir" / "nested"
-    subdir.mkdir(parents=True)
+    result = _find_repo_root(str(repo_root / "subdir" / "nested"))
+    assert result == str(repo_root)
 
-    result = _find_repo_root(str(subdir))
-    assert Path(result) == repo_root
 
-
-def test_find_repo_root_cli_no_git_falls_back_to_start(tmp_path: Path) -> None:
+def test_find_repo_root_cli_no_git_falls_back_to_start(no_repo: Path) -> None:
     """CLI helper should fall back to the original start path when no .git is found."""
-    start = tmp_path / "no_repo"
-    start.mkdir()
-
-    result = _find_repo_root(str(start))
-    assert Path(result) == start.resolve()
+    result = _find_repo_root(str(no_repo))
+    assert result == str(no_repo)
 
 
-def test_find_repo_root_analysis_starts_in_repo_root(tmp_path: Path) -> None:
+def test_find_repo_root_analysis_starts_in_repo_root(repo_root: Path) -> None:
     """Analysis helper should return the current dir if it is a repo root."""
-    repo_root = tmp_path / "repo"
-    repo_root.mkdir()
-    (repo_root / ".git").mkdir()
-
     result = find_repo_root(repo_root)
-    assert result == repo_root.resolve()
+    assert result == repo_root
 
 
-def test_find_repo_root_analysis_from_subdirectory(tmp_path: Path) -> None:
+def test_find_repo_root_analysis_from_subdirectory(repo_root: Path) -> None:
     """Analysis helper should walk upwards to the enclosing repo root."""
-    repo_root = tmp_path / "repo"
-    repo_root.mkdir()
-    (repo_root / ".git").mkdir()
-    subdir = repo_root / "subdir" / "nested"
-    subdir.mkdir(parents=True)
+    result = find_repo_root(repo_root / "subdir" / "nested")
+    assert result == repo_root
 
-    result = find_repo_root(subdir)
-    assert result == repo_root.resolve()
 
-
-def test_find_repo_root_analysis_no_git_falls_back_to_start(tmp_path: Path) -> None:
+def test_find_repo_root_analysis_no_git_falls_back_to_start(no_repo: Path) -> None:
     """Analysis helper should fall back to the original start path when no .git is found."""
-    start = tmp_path / "no_repo"
-    start.mkdir()
-
-    result = find_repo_root(start)
-    assert result == start.resolve()
-
+    result = find_repo_root(no_repo)
+    assert result == no_repo
 
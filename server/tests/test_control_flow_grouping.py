@@ -1,19 +1,9 @@
-from app.services.data_flow_analysis import DataFlowAnalyzer
+import pytest
 
+from _graph_helpers import index_graph
 
-def _find_scopes(node, type_name):
-    found = []
-    if node.get("type") == type_name:
-        found.append(node)
-    for child in node.get("children", []):
-        found.extend(_find_scopes(child, type_name))
-    return found
 
-
-def test_try_catch_control_flow_grouping(tmp_path):
-    analyzer = DataFlowAnalyzer()
-
-    code = """
+_LOAD_RECENT_PATHS_TS = b"""
     const loadRecentPaths = () => {
         if (typeof window === "undefined") return;
 
@@ -36,38 +26,8 @@ def test_try_catch_control_flow_grouping(tmp_path):
     };
     """
 
-    f = tmp_path / "control_flow.ts"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
-
-    # Check for 'try' scope
-    try_scopes = _find_scopes(graph, "try")
-    assert len(try_scopes) == 1
-
-    # Check for 'catch' scope
-    catch_scopes = _find_scopes(graph, "catch")
-    assert len(catch_scopes) == 1
-
-    # Verify there is a control-flow edge linking the try and catch scopes.
-    try_node = try_scopes[0]
-    catch_node = catch_scopes[0]
-
-    edges = graph.get("edges", [])
-    control_flow_edges = [
-        e
-        for e in edges
-        if e.get("type") == "control-flow"
-        and e.get("sources") == [try_node["id"]]
-        and e.get("targets") == [catch_node["id"]]
-    ]
-    assert control_flow_edges, "Expected a control-flow edge from try to catch"
-
 
-def test_if_else_control_flow_grouping(tmp_path):
-    analyzer = DataFlowAnalyzer()
-
-    code = """
+_IF_ELSE_TS = b"""
     function demo(next: number) {
         if (Number.isNaN(next)) {
             setLineOffset(0);
@@ -77,156 +37,139 @@ def test_if_else_control_flow_grouping(tmp_path):
     }
     """
 
-    f = tmp_path / "if_else_control_flow.ts"
-    f.write_text(code, encoding="utf-8")
 
-    graph = analyzer.analyze_file(str(f))
+_IF_CONDITION_TSX = b"""
+    let containerRef: HTMLDivElement | null = null;
+
+    const handleClickOutside = (event: MouseEvent) => {
+        const target = event.target as Node | null;
+        if (!containerRef || !target) return;
+        if (!containerRef.contains(target)) {
+            setShowSuggestions(false);
+            setShowRecent(false);
+        }
+    };
+    """
+
+
+_SINGLE_IF_TS = b"""
+    function demo(parsed: unknown) {
+        if (Array.isArray(parsed)) {
+            const onlyStrings = parsed.filter(
+                (item: unknown): item is string => typeof item === "string"
+            );
+            setRecentPaths(onlyStrings);
+        }
+    }
+    """
+
+
+@pytest.fixture(scope="module")
+def load_recent_paths_index(data_flow_analyzer):
+    """Analyze _LOAD_RECENT_PATHS_TS once and share its indexed graph."""
+    return index_graph(data_flow_analyzer.analyze_source("control_flow.ts", _LOAD_RECENT_PATHS_TS))
+
 
-    # Find a parent scope that has both an if-branch and an else-branch as children.
-    def find_parent_with_if_else(node):
-        children = node.get("children", []) or []
-        types = [c.get("type") for c in children]
-        if "if_branch" in types and "else_branch" in types:
-            return node, children
-        for child in children:
-            found_parent, found_children = find_parent_with_if_else(child)
-            if found_parent is not None:
-                return found_parent, found_children
-        return None, None
+def test_try_body_is_single_scope(load_recent_paths_index):
+    assert len(load_recent_paths_index.by_type["try"]) == 1
 
-    parent, children = find_parent_with_if_else(graph)
-    assert parent is not None, "Expected to find a parent with if/else branches"
 
-    if_node = next(c for c in children if c.get("type") == "if_branch")
-    else_node = next(c for c in children if c.get("type") == "else_branch")
+def test_catch_clause_is_single_scope(load_recent_paths_index):
+    assert len(load_recent_paths_index.by_type["catch"]) == 1
 
-    # They should be siblings (same parent) and distinct nodes.
+
+def test_try_links_to_catch(load_recent_paths_index):
+    nodes_by_type = load_recent_paths_index.by_type
+    try_scope, = nodes_by_type["try"]
+    catch_scope, = nodes_by_type["catch"]
+
+    key = ((try_scope["id"],), (catch_scope["id"],), "control-flow")
+    assert key in load_recent_paths_index.edges_by_endpoints, (
+        "Expected a control-flow edge from try to catch"
+    )
+
+
+def test_if_else_control_flow_grouping(data_flow_analyzer):
+    index = index_graph(data_flow_analyzer.analyze_source("if_else_control_flow.ts", _IF_ELSE_TS))
+
+    # Find an if-branch and an else-branch that share a parent scope: group
+    # else-branches by parent once, then probe it for each if-branch.
+    else_by_parent = {}
+    for else_node in index.by_type["else_branch"]:
+        else_by_parent.setdefault(index.parent_of[else_node["id"]]["id"], else_node)
+    if_node = next(
+        (
+            n
+            for n in index.by_type["if_branch"]
+            if index.parent_of[n["id"]]["id"] in else_by_parent
+        ),
+        None,
+    )
+    assert if_node is not None, "Expected to find a parent with if/else branches"
+    else_node = else_by_parent[index.parent_of[if_node["id"]]["id"]]
+
+    # They should be distinct nodes.
     assert if_node["id"] != else_node["id"]
 
     # Verify a control-flow edge from if-branch to else-branch exists.
-    edges = graph.get("edges", [])
-    control_flow_edges = [
-        e
-        for e in edges
-        if e.get("type") == "control-flow"
-        and e.get("sources") == [if_node["id"]]
-        and e.get("targets") == [else_node["id"]]
-    ]
-    assert (
-        control_flow_edges
-    ), "Expected a control-flow edge from if-branch to else-branch"
+    key = ((if_node["id"],), (else_node["id"],), "control-flow")
+    assert key in index.edges_by_endpoints, "Expected a control-flow edge from if-branch to else-branch"
 
 
-def test_if_condition_grouping(tmp_path):
+def test_if_condition_grouping(data_flow_analyzer):
     """
     Variables that participate in an `if` condition should still be represented
     as usage nodes within the surrounding `if` scope so the client can show
     them alongside the branches.
     """
-    analyzer = DataFlowAnalyzer()
-
-    code = """
-    let containerRef: HTMLDivElement | null = null;
 
-    const handleClickOutside = (event: MouseEvent) => {
-        const target = event.target as Node | null;
-        if (!containerRef || !target) return;
-        if (!containerRef.contains(target)) {
-            setShowSuggestions(false);
-            setShowRecent(false);
-        }
-    };
-    """
-
-    f = tmp_path / "if_condition_grouping.tsx"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    index = index_graph(data_flow_analyzer.analyze_source("if_condition_grouping.tsx", _IF_CONDITION_TSX))
+    nodes_by_type = index.by_type
 
     # We should not render any dedicated `if_condition` scopes now that
     # condition expressions are attached directly to the surrounding `if`.
-    assert not _find_scopes(graph, "if_condition")
+    assert not nodes_by_type["if_condition"]
+
+    assert nodes_by_type["if"], "Expected to find at least one `if` scope in the graph"
 
     # Collect all usage labels that live under any `if` scope. The exact
     # nesting (direct child vs. nested block) is an implementation detail; we
     # just care that the condition variables are present somewhere within the
     # relevant `if` cluster.
-    def _collect_usage_labels(node):
-        labels = set()
-        for child in node.get("children", []) or []:
-            if child.get("type") == "usage":
-                text = (child.get("labels") or [{}])[0].get("text")
-                labels.add(text)
-            labels |= _collect_usage_labels(child)
-        return labels
-
-    if_scopes = _find_scopes(graph, "if")
-    assert if_scopes, "Expected to find at least one `if` scope in the graph"
-
-    all_usage_labels = set()
-    for if_scope in if_scopes:
-        all_usage_labels |= _collect_usage_labels(if_scope)
+    all_usage_labels = {
+        usage["labels"][0]["text"]
+        for usage in nodes_by_type["usage"]
+        if any(a["type"] == "if" for a in index.ancestors(usage))
+    }
 
     # Usage node labels are either just the identifier name or "attr: name" for JSX.
-    assert any("containerRef" in (label or "") for label in all_usage_labels)
-    assert any("target" in (label or "") for label in all_usage_labels)
+    assert any("containerRef" in label for label in all_usage_labels)
+    assert any("target" in label for label in all_usage_labels)
 
 
-def test_if_condition_has_single_if_label(tmp_path):
+def test_if_condition_has_single_if_label(data_flow_analyzer):
     """
     For a single `if` statement we should only render one scope labelled \"if\".
     The primary body of the `if` is represented as a \"then\" branch so users
     don't see two nested \"if\" blocks for the same statement.
     """
-    analyzer = DataFlowAnalyzer()
 
-    code = """
-    function demo(parsed: unknown) {
-        if (Array.isArray(parsed)) {
-            const onlyStrings = parsed.filter(
-                (item: unknown): item is string => typeof item === "string"
-            );
-            setRecentPaths(onlyStrings);
-        }
-    }
-    """
-
-    f = tmp_path / "if_single_label.ts"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    index = index_graph(data_flow_analyzer.analyze_source("if_single_label.ts", _SINGLE_IF_TS))
 
     # There should be exactly one scope in the graph labelled \"if\" for this
     # single `if` statement.
-    def _collect_if_labels(node):
-        labels = []
-        if node.get("type") == "if":
-            labels.append((node.get("labels") or [{}])[0].get("text"))
-        for child in node.get("children", []) or []:
-            labels.extend(_collect_if_labels(child))
-        return labels
-
-    if_labels = _collect_if_labels(graph)
+    if_labels = [
+        n["labels"][0]["text"] for n in index.by_type["if"]
+    ]
     assert if_labels.count("if") == 1
 
     # We still expect the primary body of the `if` to be represented as a
     # \"then\" branch under that scope so users see a single \"if\" box with a
     # clearly named body.
-    def find_if_with_branch(node):
-        children = node.get("children", []) or []
-        types = [c.get("type") for c in children]
-        if "if_branch" in types:
-            return node, children
-        for child in children:
-            found_parent, found_children = find_if_with_branch(child)
-            if found_parent is not None:
-                return found_parent, found_children
-        return None, None
-
-    if_scope, children = find_if_with_branch(graph)
-    assert if_scope is not None, "Expected to find an `if` scope with a then-branch"
-    assert (if_scope.get("labels") or [{}])[0].get("text") == "if"
-    child_labels = [
-        (c.get("labels") or [{}])[0].get("text") for c in children if c.get("labels")
-    ]
+    branches = index.by_type["if_branch"]
+    assert branches, "Expected to find an `if` scope with a then-branch"
+    if_scope = index.parent_of[branches[0]["id"]]
+    children = if_scope["children"]
+    assert if_scope["labels"][0]["text"] == "if"
+    child_labels = [c["labels"][0]["text"] for c in children]
     assert "then" in child_labels
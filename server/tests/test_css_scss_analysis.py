@@ -1,34 +1,75 @@
-import textwrap
 from pathlib import Path
 
 from app.services.analysis import scan_codebase
-from app.services.css.css_analysis import CssTreeSitterAnalyzer
 
+_STYLES_CSS = b"""
+.button {
+  color: red;
+}
 
-def write(tmp_path: Path, name: str, content: str) -> Path:
-    p = tmp_path / name
-    p.write_text(textwrap.dedent(content), encoding="utf-8")
-    return p
+.container {
+  padding: 1rem;
+}
+"""
+
+
+_STYLES_SCSS = b"""
+@mixin button-base($color) {
+  color: $color;
+}
+
+.button {
+  @include button-base(red);
+
+  .icon {
+    width: 16px;
+  }
+}
 
+@function double($value) {
+  @return $value * 2;
+}
+"""
 
-def test_css_basic_rules_become_scopes(tmp_path):
-    analyzer = CssTreeSitterAnalyzer()
 
-    css = write(
-        tmp_path,
-        "styles.css",
-        """
-        .button {
-          color: red;
-        }
+_MEDIA_SCSS = b"""
+.sidebar {
+    width: 300px;
+    @include media-query(mobile) {
+        width: 100%;
+    }
+}
+"""
 
-        .container {
-          padding: 1rem;
-        }
-        """,
-    )
 
-    metrics = analyzer.analyze_file(str(css))
+_APP_CSS = b"""
+.root {
+  display: block;
+}
+"""
+
+
+_APP_SCSS = b"""
+@mixin spacing($size) {
+  margin: $size;
+}
+
+.wrapper {
+  @include spacing(1rem);
+}
+"""
+
+
+def write(tmp_path: Path, name: str, content: bytes) -> Path:
+    p = tmp_path / name
+    p.write_bytes(content)
+    return p
+
+
+def test_css_basic_rules_become_scopes(css_analyzer, tmp_path):
+    css = write(tmp_path, "styles.css", _STYLES_CSS)
+
+    metrics = css_analyzer.analyze_file(str(css))
 
     # We should get a scope per top-level rule.
     assert len(metrics.function_list) >= 2
@@ -38,32 +79,10 @@ def test_css_basic_rules_become_scopes(tmp_path):
     assert any(".container" in name for name in names)
 
 
-def test_scss_nested_rules_and_mixins(tmp_path):
-    analyzer = CssTreeSitterAnalyzer()
+def test_scss_nested_rules_and_mixins(css_analyzer, tmp_path):
+    scss = write(tmp_path, "styles.scss", _STYLES_SCSS)
 
-    scss = write(
-        tmp_path,
-        "styles.scss",
-        """
-        @mixin button-base($color) {
-          color: $color;
-        }
-
-        .button {
-          @include button-base(red);
-
-          .icon {
-            width: 16px;
-          }
-        }
-
-        @function double($value) {
-          @return $value * 2;
-        }
-        """,
-    )
-
-    metrics = analyzer.analyze_file(str(scss))
+    metrics = css_analyzer.analyze_file(str(scss))
 
     # Collect top-level scope names.
     top_names = [f.name for f in metrics.function_list]
@@ -90,46 +109,24 @@ def test_scan_codebase_includes_css_and_scss_scopes(tmp_path):
     root.mkdir()
 
     css = root / "app.css"
-    css.write_text(
-        textwrap.dedent(
-            """
-            .root {
-              display: block;
-            }
-            """
-        ),
-        encoding="utf-8",
-    )
+    css.write_bytes(_APP_CSS)
 
     scss = root / "app.scss"
-    scss.write_text(
-        textwrap.dedent(
-            """
-            @mixin spacing($size) {
-              margin: $size;
-            }
-
-            .wrapper {
-              @include spacing(1rem);
-            }
-            """
-        ),
-        encoding="utf-8",
-    )
+    scss.write_bytes(_APP_SCSS)
 
     tree = scan_codebase(root)
 
-    def find_file(node, name: str):
-        if node.type == "file" and node.name == name:
-            return node
-        for child in node.children:
-            found = find_file(child, name)
-            if found:
-                return found
-        return None
+    # Map file names to their nodes in one walk (first occurrence wins).
+    files_by_name = {}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        if node.type == "file":
+            files_by_name.setdefault(node.name, node)
+        stack.extend(reversed(node.children))
 
-    css_node = find_file(tree, "app.css")
-    scss_node = find_file(tree, "app.scss")
+    css_node = files_by_name.get("app.css")
+    scss_node = files_by_name.get("app.scss")
 
     assert css_node is not None
     assert scss_node is not None
@@ -140,23 +137,10 @@ def test_scan_codebase_includes_css_and_scss_scopes(tmp_path):
 
 
 
-def test_scss_include_with_block(tmp_path):
-    analyzer = CssTreeSitterAnalyzer()
-
-    scss = write(
-        tmp_path,
-        "media.scss",
-        """
-        .sidebar {
-            width: 300px;
-            @include media-query(mobile) {
-                width: 100%;
-            }
-        }
-        """,
-    )
+def test_scss_include_with_block(css_analyzer, tmp_path):
+    scss = write(tmp_path, "media.scss", _MEDIA_SCSS)
 
-    metrics = analyzer.analyze_file(str(scss))
+    metrics = css_analyzer.analyze_file(str(scss))
     
     # We expect .sidebar to be a scope
     sidebar_scope = next((f for f in metrics.function_list if ".sidebar" in f.name), None)
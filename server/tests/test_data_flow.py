@@ -1,43 +1,31 @@
-from app.services.data_flow_analysis import DataFlowAnalyzer
+import os
 
+from _graph_helpers import iter_nodes, nodes_by_type
 
-def _collect_nodes(node, type_name):
-    """
-    Recursively collect all child nodes of a given type from the ELK graph.
-    """
-    found = []
-    for child in node.get("children", []) or []:
-        if child.get("type") == type_name:
-            found.append(child)
-        found.extend(_collect_nodes(child, type_name))
-    return found
+from app.services.data_flow_analysis import DataFlowAnalyzer
 
 
-def test_simple_variable_flow(tmp_path):
-    analyzer = DataFlowAnalyzer()
-
+def test_simple_variable_flow(data_flow_analyzer):
     code = """
     const x = 10;
     const y = x + 5;
     """
 
-    f = tmp_path / "test.ts"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    graph = data_flow_analyzer.analyze_source("test.ts", code.encode("utf-8"))
 
     # Verify structure
     assert graph["id"] is not None
 
     # Variables and usages may now be wrapped inside "declaration" clusters,
     # so we traverse the whole subtree instead of only looking at root children.
-    vars_ = _collect_nodes(graph, "variable")
+    by_type = nodes_by_type(graph)
+    vars_ = by_type["variable"]
     assert len(vars_) == 2
     var_names = [v["labels"][0]["text"] for v in vars_]
     assert any("x" in name for name in var_names)
     assert any("y" in name for name in var_names)
 
-    usages = _collect_nodes(graph, "usage")
+    usages = by_type["usage"]
     assert len(usages) == 1
     assert usages[0]["labels"][0]["text"] == "x"
 
@@ -63,9 +51,7 @@ def test_simple_variable_flow(tmp_path):
     assert edges[0]["targets"][0] == x_usage["id"]
 
 
-def test_function_scope(tmp_path):
-    analyzer = DataFlowAnalyzer()
-
+def test_function_scope(data_flow_analyzer):
     code = """
     const globalVar = 1;
 
@@ -74,16 +60,18 @@ def test_function_scope(tmp_path):
     }
     """
 
-    f = tmp_path / "test_scope.ts"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    graph = data_flow_analyzer.analyze_source("test_scope.ts", code.encode("utf-8"))
 
     root_children = graph["children"]
 
     # Global var should still appear as a top-level variable definition.
-    global_vars = [c for c in root_children if c.get("type") == "variable"]
-    assert any("globalVar" in v["labels"][0]["text"] for v in global_vars)
+    # Variable labels read "name (kind)"; key them by name for the lookups below.
+    global_vars_by_name = {
+        c["labels"][0]["text"].split(" ", 1)[0]: c
+        for c in root_children
+        if c["type"] == "variable"
+    }
+    assert "globalVar" in global_vars_by_name
 
     # Function scope is the only child scope under the global root.
     func_scopes = [c for c in root_children if c.get("type") == "function"]
@@ -93,32 +81,27 @@ def test_function_scope(tmp_path):
     # The function body should not introduce an extra "block" scope; locals and
     # usages live directly under the function cluster (possibly wrapped in
     # "declaration" groupings).
-    assert all(c.get("type") != "block" for c in my_func_scope.get("children", []))
+    assert all(c.get("type") != "block" for c in my_func_scope["children"])
 
-    func_vars = _collect_nodes(my_func_scope, "variable")
+    func_nodes = nodes_by_type(my_func_scope)
+    func_vars = func_nodes["variable"]
     labels = {v["labels"][0]["text"] for v in func_vars}
     assert "param1 (param)" in labels
     assert any("localVar" in label for label in labels)
 
-    func_usages = _collect_nodes(my_func_scope, "usage")
-    usage_labels = {u["labels"][0]["text"] for u in func_usages}
-    assert "globalVar" in usage_labels
-    assert "param1" in usage_labels
+    func_usages_by_label = {u["labels"][0]["text"]: u for u in func_nodes["usage"]}
+    assert "globalVar" in func_usages_by_label
+    assert "param1" in func_usages_by_label
 
     # Check edges: globalVar usage inside the function should link back to the
     # globalVar definition in the parent scope.
-    global_def = next(v for v in global_vars if "globalVar" in v["labels"][0]["text"])
-    global_usage = next(u for u in func_usages if u["labels"][0]["text"] == "globalVar")
+    global_def = global_vars_by_name["globalVar"]
+    global_usage = func_usages_by_label["globalVar"]
 
-    edges = graph["edges"]
-    edge = next(
-        (
-            e
-            for e in edges
-            if e["sources"][0] == global_def["id"] and e["targets"][0] == global_usage["id"]
-        ),
-        None,
-    )
+    edges_by_endpoints = {
+        (tuple(e["sources"]), tuple(e["targets"])): e for e in graph["edges"]
+    }
+    edge = edges_by_endpoints.get(((global_def["id"],), (global_usage["id"],)))
     assert edge is not None
 
     # Edge should carry line metadata for both definition and usage.
@@ -130,9 +113,7 @@ def test_function_scope(tmp_path):
     assert edge["usageStartLine"] >= 1 and edge["usageEndLine"] >= edge["usageStartLine"]
 
 
-def test_tsx_jsx_scopes_and_labels(tmp_path):
-    analyzer = DataFlowAnalyzer()
-
+def test_tsx_jsx_scopes_and_labels(data_flow_analyzer):
     code = """
     import { Show, createSignal, onCleanup } from "solid-js";
 
@@ -152,10 +133,7 @@ def test_tsx_jsx_scopes_and_labels(tmp_path):
     }
     """
 
-    f = tmp_path / "Toast.tsx"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    graph = data_flow_analyzer.analyze_source("Toast.tsx", code.encode("utf-8"))
 
     # Root should be the global scope.
     assert graph["type"] == "global"
@@ -174,17 +152,20 @@ def test_tsx_jsx_scopes_and_labels(tmp_path):
 
     # The function body should not add an extra "block" wrapper – JSX scopes
     # live directly under the function cluster.
-    assert all(c.get("type") != "block" for c in toast_scope.get("children", []))
+    assert all(c.get("type") != "block" for c in toast_scope["children"])
 
     # Within the function we should see a JSX scope for <Show>.
-    jsx_scopes = _collect_nodes(toast_scope, "jsx")
-    assert jsx_scopes
-    show_scope = next(s for s in jsx_scopes if "<Show>" in s["labels"][0]["text"])
+    show_scope = next(
+        n
+        for n, _ in iter_nodes(toast_scope)
+        if n["type"] == "jsx" and "<Show>" in n["labels"][0]["text"]
+    )
     show_label = show_scope["labels"][0]["text"]
     assert "<Show>" in show_label
 
     # And inside <Show> we should see another JSX scope for the <div>.
-    inner_jsx_scopes = _collect_nodes(show_scope, "jsx")
+    show_nodes = nodes_by_type(show_scope)
+    inner_jsx_scopes = show_nodes["jsx"]
     assert inner_jsx_scopes
     div_scope = next(s for s in inner_jsx_scopes if "<div>" in s["labels"][0]["text"])
     div_label = div_scope["labels"][0]["text"]
@@ -192,6 +173,54 @@ def test_tsx_jsx_scopes_and_labels(tmp_path):
 
     # Verify that usages inside JSX (e.g. props.message, visible) are attached
     # somewhere beneath the JSX scopes, giving us the extra nesting depth.
-    jsx_usages = _collect_nodes(show_scope, "usage")
+    jsx_usages = show_nodes["usage"]
     usage_names = {u["labels"][0]["text"] for u in jsx_usages}
     assert "visible" in usage_names or "props" in usage_names
+
+
+def test_unchanged_file_reuses_graph(data_flow_analyzer, tmp_path):
+    f = tmp_path / "cached.ts"
+    f.write_text("const a = 1;\nconsole.log(a);\n", encoding="utf-8")
+
+    first = data_flow_analyzer.analyze_file(str(f))
+    assert DataFlowAnalyzer().analyze_file(str(f)) is first
+
+    f.write_text("const a = 1;\nconst b = a;\nconsole.log(b);\n", encoding="utf-8")
+    second = data_flow_analyzer.analyze_file(str(f))
+    assert second is not first
+    assert {v["labels"][0]["text"] for v in nodes_by_type(second)["variable"]} == {
+        "a (variable)",
+        "b (variable)",
+    }
+
+
+def test_same_size_rewrite_with_same_mtime_is_reanalyzed(tmp_path):
+    f = tmp_path / "rewritten.ts"
+    f.write_text("const a = 1;\n", encoding="utf-8")
+    st = os.stat(f)
+    analyzer = DataFlowAnalyzer()
+    analyzer.analyze_file(str(f))
+    assert analyzer.scopes
+
+    f.write_text("const b = 1;\n", encoding="utf-8")
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+    graph = analyzer.analyze_file(str(f))
+    assert [v["labels"][0]["text"] for v in nodes_by_type(graph)["variable"]] == ["b (variable)"]
+
+    # A cache hit leaves no scope state behind from the previous build.
+    assert analyzer.analyze_file(str(f)) is graph
+    assert analyzer.scopes == {}
+
+
+def test_data_flow_endpoint_serves_graph(client, tmp_path):
+    f = tmp_path / "endpoint.ts"
+    f.write_text("const x = 1;\nconsole.log(x);\n", encoding="utf-8")
+
+    response = client.get("/api/analysis/data-flow", params={"path": str(f)})
+
+    assert response.status_code == 200
+    graph = response.json()
+    assert graph["path"] == str(f)
+    variables = nodes_by_type(graph)["variable"]
+    assert [v["labels"][0]["text"] for v in variables] == ["x (variable)"]
+    assert variables[0]["children"] == []
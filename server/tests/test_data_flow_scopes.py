@@ -1,20 +1,7 @@
+from _graph_helpers import iter_nodes
 
-from app.services.data_flow_analysis import DataFlowAnalyzer
-
-def _collect_nodes(node, type_name):
-    """
-    Recursively collect all child nodes of a given type from the ELK graph.
-    """
-    found = []
-    for child in node.get("children", []) or []:
-        if child.get("type") == type_name:
-            found.append(child)
-        found.extend(_collect_nodes(child, type_name))
-    return found
-
-def test_top_level_object_scope(tmp_path):
-    analyzer = DataFlowAnalyzer()
 
+def test_top_level_object_scope(data_flow_analyzer):
     code = """
     const myObj = {
         foo: function() {
@@ -29,10 +16,7 @@ def test_top_level_object_scope(tmp_path):
     };
     """
 
-    f = tmp_path / "test_obj.ts"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    graph = data_flow_analyzer.analyze_source("test_obj.ts", code.encode("utf-8"))
     
     # We expect 'myObj' to be a scope (container)
     # Currently it might just be a variable definition.
@@ -52,24 +36,20 @@ def test_top_level_object_scope(tmp_path):
     # We want to find a scope that is NOT the global scope, but contains the function 'foo'
     
     # Find 'foo' function scope
-    func_scopes = _collect_nodes(graph, "function")
-    foo_scope = next((s for s in func_scopes if "foo" in s["labels"][0]["text"]), None)
+    foo_scope, parent = next(
+        (
+            (n, p)
+            for n, p in iter_nodes(graph)
+            if n["type"] == "function" and "foo" in n["labels"][0]["text"]
+        ),
+        (None, None),
+    )
     
     assert foo_scope is not None
     
-    # Check its parent. In the graph structure, we can't easily check parent pointer, 
-    # but we can check if it's nested inside another scope in the 'children' hierarchy.
-    
-    def find_parent_scope(node, target_id):
-        for child in node.get("children", []) or []:
-            if child["id"] == target_id:
-                return node
-            res = find_parent_scope(child, target_id)
-            if res:
-                return res
-        return None
-        
-    parent = find_parent_scope(graph, foo_scope["id"])
+    # Check its parent. Graph nodes carry no parent pointer, so the walk above
+    # hands back the node whose 'children' contain it.
+    
     assert parent is not None
     
     # The parent should be the 'myObj' scope, not the global scope.
@@ -78,9 +58,7 @@ def test_top_level_object_scope(tmp_path):
     assert parent["type"] != "global", "foo should be inside an object scope, not directly in global"
     assert "myObj" in parent["labels"][0]["text"]
 
-def test_class_scope(tmp_path):
-    analyzer = DataFlowAnalyzer()
-
+def test_class_scope(data_flow_analyzer):
     code = """
     class MyClass {
         method() {
@@ -89,27 +67,20 @@ def test_class_scope(tmp_path):
     }
     """
 
-    f = tmp_path / "test_class.ts"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    graph = data_flow_analyzer.analyze_source("test_class.ts", code.encode("utf-8"))
     
     # Find 'method' function scope
-    func_scopes = _collect_nodes(graph, "function")
-    method_scope = next((s for s in func_scopes if "method" in s["labels"][0]["text"]), None)
+    method_scope, parent = next(
+        (
+            (n, p)
+            for n, p in iter_nodes(graph)
+            if n["type"] == "function" and "method" in n["labels"][0]["text"]
+        ),
+        (None, None),
+    )
     
     assert method_scope is not None
     
-    def find_parent_scope(node, target_id):
-        for child in node.get("children", []) or []:
-            if child["id"] == target_id:
-                return node
-            res = find_parent_scope(child, target_id)
-            if res:
-                return res
-        return None
-        
-    parent = find_parent_scope(graph, method_scope["id"])
     assert parent is not None
     
     # The parent should be the 'MyClass' scope
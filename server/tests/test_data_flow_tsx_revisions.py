@@ -1,9 +1,7 @@
+from _graph_helpers import index_graph
 
-from app.services.data_flow_analysis import DataFlowAnalyzer
-
-def test_tsx_revisions(tmp_path):
-    analyzer = DataFlowAnalyzer()
 
+def test_tsx_revisions(data_flow_analyzer):
     code = """
     import { createSignal, onCleanup, Show } from 'solid-js';
 
@@ -28,43 +26,33 @@ def test_tsx_revisions(tmp_path):
     }
     """
 
-    f = tmp_path / "Toast.tsx"
-    f.write_text(code, encoding="utf-8")
-
-    graph = analyzer.analyze_file(str(f))
+    graph = data_flow_analyzer.analyze_source("Toast.tsx", code.encode("utf-8"))
 
-    # Helper to find nodes
-    def find_scope(node, label):
-        if node.get('labels', [{'text': ''}])[0]['text'] == label:
-            return node
-        for child in node.get('children', []):
-            if child['type'] not in ('usage', 'variable'):
-                found = find_scope(child, label)
-                if found:
-                    return found
-        return None
+    # Index the graph once; scopes are looked up by label below.
+    index = index_graph(graph)
 
-    def find_usage(scope, label):
-        for child in scope.get('children', []):
-            if child['type'] == 'usage' and child['labels'][0]['text'] == label:
-                return child
-        return None
+    def usages_by_label(scope):
+        """Direct usage children of ``scope``, keyed by label text."""
+        return {
+            child['labels'][0]['text']: child
+            for child in scope['children']
+            if child['type'] == 'usage'
+        }
 
     # 1. Verify <Show> scope does NOT contain "Show" usage
-    show_scope = find_scope(graph, "<Show>")
+    show_scope = index.by_label.get("<Show>")
     assert show_scope is not None, "Could not find <Show> scope"
     
-    show_usage = find_usage(show_scope, "Show")
-    assert show_usage is None, "Found 'Show' usage inside <Show> scope"
+    show_usages = usages_by_label(show_scope)
+    assert "Show" not in show_usages, "Found 'Show' usage inside <Show> scope"
 
     # 2. Verify <div> scope does NOT contain "div" usage
-    div_scope = find_scope(graph, "<div>")
+    div_scope = index.by_label.get("<div>")
     assert div_scope is not None, "Could not find <div> scope"
 
-    div_usage = find_usage(div_scope, "div")
-    assert div_usage is None, "Found 'div' usage inside <div> scope"
+    assert "div" not in usages_by_label(div_scope), "Found 'div' usage inside <div> scope"
 
     # 3. Verify 'visible' usage has 'when' attribute
     # It should be in the <Show> scope
-    visible_usage = find_usage(show_scope, "when: visible")
+    visible_usage = show_usages.get("when: visible")
     assert visible_usage is not None, "Could not find 'when: visible' usage"
@@ -7,7 +7,7 @@ def _token_text(code: str, token) -> str:
     return line[token.startCol : token.endCol]
 
 
-def test_focus_overlay_categories_and_imports(tmp_path):
+def test_focus_overlay_categories_and_imports(write_source):
     code = """\
 import { join as j } from "path";
 const top = 1;
@@ -22,12 +22,11 @@ function outer(p: number) {
 }
 """
 
-    f = tmp_path / "test.ts"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "test.ts")
 
     # Focus on the `return ...` line inside `inner`.
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=200,
         focus_start_line=7,
@@ -48,7 +47,7 @@ function outer(p: number) {
     assert "unresolved" in cats
 
 
-def test_focus_overlay_param_stays_param_even_when_focus_is_outer_scope(tmp_path):
+def test_focus_overlay_param_stays_param_even_when_focus_is_outer_scope(write_source):
     code = """\
 function someOuterScopeWithFocus(){
 
@@ -76,13 +75,12 @@ function someOuterScopeWithFocus(){
   }
 }
 """
-    f = tmp_path / "param_focus.ts"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "param_focus.ts")
 
     # Focus spans the *outer* function scope, but `type` is still a parameter of the
     # nested `getNodeStyle` function and must remain categorized as `param`.
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=500,
         focus_start_line=1,
@@ -118,7 +116,7 @@ function f() {
     assert any(t.category == "importInternal" for t in overlay.tokens)
 
 
-def test_focus_overlay_for_of_introduces_loop_binding(tmp_path):
+def test_focus_overlay_for_of_introduces_loop_binding(write_source):
     code = """\
 function f(nodes: any[]) {
   for (const node of nodes) {
@@ -127,12 +125,11 @@ function f(nodes: any[]) {
   }
 }
 """
-    f = tmp_path / "loop.ts"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "loop.ts")
 
     # Focus on the member access `node.data.length` line.
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=200,
         focus_start_line=3,
@@ -144,18 +141,17 @@ function f(nodes: any[]) {
     assert not any(t.category == "unresolved" for t in node_tokens)
 
 
-def test_focus_overlay_object_destructuring_shorthand_binds_locals(tmp_path):
+def test_focus_overlay_object_destructuring_shorthand_binds_locals(write_source):
     code = """\
 export function filterData(node: any, options: any): any {
   const { extensions, maxLoc, excludedPaths } = options;
   return (extensions?.length ?? 0) + (maxLoc ?? 0) + excludedPaths.length + node.x;
 }
 """
-    f = tmp_path / "destructure.ts"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "destructure.ts")
 
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=200,
         focus_start_line=3,
@@ -168,18 +164,17 @@ export function filterData(node: any, options: any): any {
         assert not any(t.category == "unresolved" for t in toks)
 
 
-def test_focus_overlay_array_destructuring_binds_locals(tmp_path):
+def test_focus_overlay_array_destructuring_binds_locals(write_source):
     code = """\
 function h(pair: any[]) {
   const [a, b] = pair;
   return a + b;
 }
 """
-    f = tmp_path / "array.ts"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "array.ts")
 
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=200,
         focus_start_line=3,
@@ -192,15 +187,14 @@ function h(pair: any[]) {
         assert not any(t.category == "unresolved" for t in toks)
 
 
-def test_focus_overlay_unsupported_file_types_noop(tmp_path):
+def test_focus_overlay_unsupported_file_types_noop(write_source):
     # Focus overlay currently supports only TypeScript/TSX sources.
     # For unsupported languages it should no-op (return no tokens) instead of erroring.
     code = "def f(x):\n    return x\n"
-    f = tmp_path / "example.py"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "example.py")
 
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=50,
         focus_start_line=1,
@@ -210,7 +204,7 @@ def test_focus_overlay_unsupported_file_types_noop(tmp_path):
     assert overlay.tokens == []
 
 
-def test_focus_overlay_missing_globals(tmp_path):
+def test_focus_overlay_missing_globals(write_source):
     code = """
     function f() {
         Object.keys({});
@@ -221,9 +215,8 @@ def test_focus_overlay_missing_globals(tmp_path):
         const filter = NodeFilter.SHOW_ELEMENT;
     }
     """
-    f = tmp_path / "globals.ts"
-    f.write_text(code, encoding="utf-8")
-    overlay = compute_focus_overlay(file_path=str(f), slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
+    path = write_source(code, "globals.ts")
+    overlay = compute_focus_overlay(file_path=path, slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
 
     def get_tokens(name):
         return [t for t in overlay.tokens if _token_text(code, t) == name]
@@ -234,15 +227,14 @@ def test_focus_overlay_missing_globals(tmp_path):
         assert toks[0].category == "builtin", f"{name} was unexpectedly resolved to {toks[0].category}"
 
 
-def test_focus_overlay_jsx_div(tmp_path):
+def test_focus_overlay_jsx_div(write_source):
     code = """
     function Comp() {
         return <div className="foo">text</div>;
     }
     """
-    f = tmp_path / "comp.tsx"
-    f.write_text(code, encoding="utf-8")
-    overlay = compute_focus_overlay(file_path=str(f), slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
+    path = write_source(code, "comp.tsx")
+    overlay = compute_focus_overlay(file_path=path, slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
 
     div_tokens = [t for t in overlay.tokens if _token_text(code, t) == "div"]
     # We expect 'div' tokens in JSX to be skipped or treated as something other than unresolved.
@@ -250,32 +242,30 @@ def test_focus_overlay_jsx_div(tmp_path):
     assert not div_tokens, f"Expected no tokens for JSX 'div', but found: {div_tokens}"
 
 
-def test_focus_overlay_hoisting(tmp_path):
+def test_focus_overlay_hoisting(write_source):
     code = """
     function main() {
         hoisted();
     }
     function hoisted() { return 1; }
     """
-    f = tmp_path / "hoist.ts"
-    f.write_text(code, encoding="utf-8")
-    overlay = compute_focus_overlay(file_path=str(f), slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
+    path = write_source(code, "hoist.ts")
+    overlay = compute_focus_overlay(file_path=path, slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
 
     toks = [t for t in overlay.tokens if _token_text(code, t) == "hoisted"]
     assert toks, "Missing tokens for hoisted"
     assert toks[0].category in ("module", "local"), f"Category was {toks[0].category}"
 
 
-def test_focus_overlay_catch_param(tmp_path):
+def test_focus_overlay_catch_param(write_source):
     code = """
     try {
     } catch (err) {
         console.log(err);
     }
     """
-    f = tmp_path / "catch.ts"
-    f.write_text(code, encoding="utf-8")
-    overlay = compute_focus_overlay(file_path=str(f), slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
+    path = write_source(code, "catch.ts")
+    overlay = compute_focus_overlay(file_path=path, slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
 
     toks = [t for t in overlay.tokens if _token_text(code, t) == "err"]
     assert toks, "Missing err tokens"
@@ -283,14 +273,13 @@ def test_focus_overlay_catch_param(tmp_path):
     assert all(t.category == "param" for t in toks)
 
 
-def test_focus_overlay_destructuring_binding_noise(tmp_path):
+def test_focus_overlay_destructuring_binding_noise(write_source):
     # Tests that destructuring bindings themselves don't produce usage tokens.
     code = """
     const { x } = { x: 1 };
     """
-    f = tmp_path / "dest.ts"
-    f.write_text(code, encoding="utf-8")
-    overlay = compute_focus_overlay(file_path=str(f), slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
+    path = write_source(code, "dest.ts")
+    overlay = compute_focus_overlay(file_path=path, slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
 
     x_tokens = [t for t in overlay.tokens if _token_text(code, t) == "x"]
     # The 'x' in `{ x }` is a binding, and the 'x' in `{ x: 1 }` is a property identifier.
@@ -298,7 +287,7 @@ def test_focus_overlay_destructuring_binding_noise(tmp_path):
     assert not x_tokens, f"Found unexpected usage tokens for 'x': {x_tokens}"
 
 
-def test_focus_overlay_new_builtins(tmp_path):
+def test_focus_overlay_new_builtins(write_source):
     code = """
     function test() {
         const nav = navigator.userAgent;
@@ -307,9 +296,8 @@ def test_focus_overlay_new_builtins(tmp_path):
         if (nav === undefined) return NaN;
     }
     """
-    f = tmp_path / "new_builtins.ts"
-    f.write_text(code, encoding="utf-8")
-    overlay = compute_focus_overlay(file_path=str(f), slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
+    path = write_source(code, "new_builtins.ts")
+    overlay = compute_focus_overlay(file_path=path, slice_start_line=1, slice_end_line=100, focus_start_line=1, focus_end_line=100)
 
     for name in ["navigator", "Intl", "AggregateError", "NaN"]:
         toks = [t for t in overlay.tokens if _token_text(code, t) == name]
@@ -317,7 +305,7 @@ def test_focus_overlay_new_builtins(tmp_path):
         assert toks[0].category == "builtin", f"{name} was unexpectedly resolved to {toks[0].category}"
 
 
-def test_focus_overlay_nested_capture_with_large_focus(tmp_path):
+def test_focus_overlay_nested_capture_with_large_focus(write_source):
     # Regression test for per-token scope resolution.
     # Previously, a large focus range would cause the heuristic to pick the outermost 
     # function scope, making captured variables in nested functions appear as "local".
@@ -330,12 +318,11 @@ export default function DataFlowViz(props: any) {
   }
 }
 """
-    f = tmp_path / "large_focus.tsx"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "large_focus.tsx")
 
     # Focus spans the entire component.
     overlay = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=200,
         focus_start_line=1,
@@ -354,3 +341,45 @@ export default function DataFlowViz(props: any) {
     
     def_tokens = [t for t in set_loading_tokens if t.fileLine == 3]
     assert not def_tokens, "Expected NO definition token for setLoading on line 3"
+
+
+def test_focus_overlay_reparses_edited_file_incrementally(tmp_path):
+    code = """\
+const top = 1;
+function outer(p: number) {
+  return p + top;
+}
+"""
+    edited = code.replace("return p + top;", "const extra = 2;\n  return p + top + extra;")
+
+    f = tmp_path / "edited.ts"
+    f.write_text(code, encoding="utf-8")
+    kwargs = dict(file_path=str(f), slice_start_line=1, slice_end_line=200, focus_start_line=1, focus_end_line=200)
+    compute_focus_overlay(**kwargs)
+
+    f.write_text(edited, encoding="utf-8")
+    incremental = compute_focus_overlay(**kwargs)
+
+    fresh = tmp_path / "fresh.ts"
+    fresh.write_text(edited, encoding="utf-8")
+    expected = compute_focus_overlay(**{**kwargs, "file_path": str(fresh)})
+
+    assert [(t.fileLine, t.startCol, t.category) for t in incremental.tokens] == [
+        (t.fileLine, t.startCol, t.category) for t in expected.tokens
+    ]
+    assert any(_token_text(edited, t) == "extra" for t in incremental.tokens)
+
+
+def test_focus_analyzer_limits_usages_to_requested_lines(tmp_path):
+    from app.services.focus_overlay import FocusAnalyzer
+
+    code = b"const a = 1;\nconst b = a + 1;\nfunction f() {\n  return a + b;\n}\n"
+    f = tmp_path / "window.ts"
+    f.write_bytes(code)
+
+    analyzer = FocusAnalyzer(f, code)
+    analyzer.analyze(usage_lines=(4, 4))
+
+    # Definitions from the whole file still resolve usages on line 4.
+    assert {(u.line, u.name) for u in analyzer.usages} == {(4, "a"), (4, "b")}
+    assert all(u.resolved is not None for u in analyzer.usages)
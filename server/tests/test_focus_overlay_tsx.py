@@ -1,7 +1,7 @@
 
 from app.services.focus_overlay import compute_focus_overlay
 
-def test_tsx_refined_overlay(tmp_path):
+def test_tsx_refined_overlay(write_source):
     code = """
     function DependencyGraph() { return <div />; }
     function Show(props) { return props.children; }
@@ -17,11 +17,10 @@ def test_tsx_refined_overlay(tmp_path):
         );
     }
     """
-    f = tmp_path / "RefinedComponent.tsx"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "RefinedComponent.tsx")
     
     result = compute_focus_overlay(
-        file_path=str(f),
+        file_path=path,
         slice_start_line=1,
         slice_end_line=20,
         focus_start_line=1,
@@ -25,13 +25,12 @@ function Inner({ value }) {
 }
 """
 
-def test_scope_graph_structure(tmp_path):
-    f = tmp_path / "test.tsx"
-    f.write_text(SAMPLE_CODE)
+def test_scope_graph_structure(write_source):
+    path = write_source(SAMPLE_CODE, "test.tsx")
 
     # Focus on 'Outer' function (lines 4-18)
     graph = compute_scope_graph(
-        file_path=str(f),
+        file_path=path,
         focus_start_line=5, # Inside Outer
         focus_end_line=15
     )
@@ -68,7 +67,7 @@ def test_scope_graph_structure(tmp_path):
     assert "console" not in cap_names # Builtin
     
     
-def test_nested_jsx_callback(tmp_path):
+def test_nested_jsx_callback(write_source):
     code = """
     function Component() {
         const x = 1;
@@ -77,11 +76,10 @@ def test_nested_jsx_callback(tmp_path):
         );
     }
     """
-    f = tmp_path / "comp.tsx"
-    f.write_text(code)
+    path = write_source(code, "comp.tsx")
     
     graph = compute_scope_graph(
-         file_path=str(f),
+         file_path=path,
          focus_start_line=2,
          focus_end_line=6
     )
@@ -105,7 +103,7 @@ def test_nested_jsx_callback(tmp_path):
     cap_names = {c.name for c in arrow.captured}
     assert "x" in cap_names
 
-def test_empty_scope_pruning(tmp_path):
+def test_empty_scope_pruning(write_source):
     code = """
     function Foo() {
         if (true) {
@@ -116,11 +114,10 @@ def test_empty_scope_pruning(tmp_path):
         }
     }
     """
-    f = tmp_path / "empty.ts"
-    f.write_text(code)
+    path = write_source(code, "empty.ts")
 
     graph = compute_scope_graph(
-        file_path=str(f),
+        file_path=path,
         focus_start_line=2,
         focus_end_line=9
     )
@@ -131,7 +128,7 @@ def test_empty_scope_pruning(tmp_path):
     assert len(root.children) == 0
 
 
-def test_module_scope_not_captured(tmp_path):
+def test_module_scope_not_captured(write_source):
     code = """
     const moduleVar = 123;
     
@@ -139,11 +136,10 @@ def test_module_scope_not_captured(tmp_path):
         return moduleVar;
     }
     """
-    f = tmp_path / "modTest.ts"
-    f.write_text(code)
+    path = write_source(code, "modTest.ts")
     
     graph = compute_scope_graph(
-        file_path=str(f),
+        file_path=path,
         focus_start_line=4,
         focus_end_line=6
     )
@@ -156,7 +152,7 @@ def test_module_scope_not_captured(tmp_path):
     assert "moduleVar" not in cap_names
 
 
-def test_tsx_every_jsx_element_is_a_scope_layer(tmp_path):
+def test_tsx_every_jsx_element_is_a_scope_layer(write_source):
     code = """
     function Simple() {
         return (
@@ -167,11 +163,10 @@ def test_tsx_every_jsx_element_is_a_scope_layer(tmp_path):
         );
     }
     """
-    f = tmp_path / "simple.tsx"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "simple.tsx")
 
     graph = compute_scope_graph(
-        file_path=str(f),
+        file_path=path,
         focus_start_line=2,
         focus_end_line=9,
     )
@@ -195,7 +190,7 @@ def test_tsx_every_jsx_element_is_a_scope_layer(tmp_path):
     assert p_scope.kind == "jsx"
 
 
-def test_tsx_inline_handler_still_tracks_declared_and_captured(tmp_path):
+def test_tsx_inline_handler_still_tracks_declared_and_captured(write_source):
     code = """
     function WithHandler() {
         const x = 1;
@@ -209,11 +204,10 @@ def test_tsx_inline_handler_still_tracks_declared_and_captured(tmp_path):
         );
     }
     """
-    f = tmp_path / "handler.tsx"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "handler.tsx")
 
     graph = compute_scope_graph(
-        file_path=str(f),
+        file_path=path,
         focus_start_line=2,
         focus_end_line=12,
     )
@@ -1,9 +1,8 @@
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
 from app.services.analysis import attach_file_metrics, create_node
 from pathlib import Path
 
 
-def test_function_body_loc_does_not_double_count(tmp_path):
+def test_function_body_loc_does_not_double_count(analyzer, tmp_path):
     """
     Ensure that the synthetic "(body)" node only accounts for lines that are
     not already attributed to child scopes. In particular, the parent
@@ -28,7 +27,6 @@ def test_function_body_loc_does_not_double_count(tmp_path):
     ts_file = tmp_path / "sort_field_accessors.ts"
     ts_file.write_text(code, encoding="utf-8")
 
-    analyzer = TreeSitterAnalyzer()
     file_metrics = analyzer.analyze_file(str(ts_file))
 
     # Attach metrics to a file node as the server would.
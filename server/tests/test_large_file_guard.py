@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from app.services import analysis
+
+
+def test_oversized_file_skips_full_parse(monkeypatch, tmp_path: Path) -> None:
+    """Files above MAX_PARSE_BYTES should only get a streamed line count."""
+    big_file = tmp_path / "generated.ts"
+    big_file.write_text(
+        "export function a() { return 1; }\n\nexport function b() { return 2; }\n",
+        encoding="utf-8",
+    )
+
+    monkeypatch.setattr(analysis, "MAX_PARSE_BYTES", 16)
+
+    result = analysis.analyze_single_file(str(big_file))
+
+    assert result.filename == str(big_file)
+    assert result.nloc == 2
+    assert result.function_list == []
+    assert result.average_cyclomatic_complexity == 0.0
+
+
+def test_minified_bundle_skips_full_parse(tmp_path: Path) -> None:
+    """Minified / bundled output is degraded regardless of its size."""
+    bundle = tmp_path / "vendor.min.js"
+    bundle.write_text("function a(){return 1}function b(){return 2}\n", encoding="utf-8")
+
+    result = analysis.analyze_single_file(str(bundle))
+
+    assert result.nloc == 1
+    assert result.function_list == []
+
+
+def test_memory_ceiling_degrades_analysis(monkeypatch, tmp_path: Path) -> None:
+    """Once a worker exceeds its RSS ceiling, further files are degraded."""
+    src = tmp_path / "small.ts"
+    src.write_text("export function a() { return 1; }\n", encoding="utf-8")
+
+    monkeypatch.setattr(analysis, "MAX_ANALYSIS_RSS_BYTES", -1)
+
+    result = analysis.analyze_single_file(str(src))
+
+    assert result.nloc == 1
+    assert result.function_list == []
+
+
+def test_small_file_gets_full_analysis(tmp_path: Path) -> None:
+    """Ordinary source files still go through the tree-sitter analyzer."""
+    src = tmp_path / "small.ts"
+    src.write_text("export function a() { return 1; }\n", encoding="utf-8")
+
+    result = analysis.analyze_single_file(str(src))
+
+    assert [f.name for f in result.function_list] == ["a"]
+
+
+def test_degraded_line_count_spans_windows(monkeypatch, tmp_path: Path) -> None:
+    """Counting in mapped windows never splits or double-counts a line."""
+    src = tmp_path / "generated.ts"
+    src.write_bytes(b"const a = 1;\n\n   \n" + b"x" * 40 + b"\nconst b = 2;")
+
+    monkeypatch.setattr(analysis, "MAX_PARSE_BYTES", 1)
+    monkeypatch.setattr(analysis, "DEGRADED_WINDOW_BYTES", 8)
+
+    result = analysis.analyze_single_file(str(src))
+
+    assert result.nloc == 3
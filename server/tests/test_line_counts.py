@@ -0,0 +1,20 @@
+import pytest
+
+from app.services.line_counts import count_nonblank_lines
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"",
+        b"\n\n",
+        b"a\nb\n",
+        b"  a  \n\t\n\x0c\nb",
+        b"a\r\n\r\nb\rc\r",
+        b"   \x0b  ",
+        "café\n  \nété\n".encode("utf-8"),
+    ],
+)
+def test_count_nonblank_lines_matches_splitlines(content: bytes) -> None:
+    expected = len([line for line in content.splitlines() if line.strip()])
+    assert count_nonblank_lines(content) == expected
@@ -0,0 +1,125 @@
+from pathlib import Path
+
+from app.services import cache as cache_module
+from app.services.analysis_types import FileMetrics, FunctionMetrics
+from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
+
+
+def test_unchanged_file_is_served_from_cache(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv(cache_module.METRICS_CACHE_ENV_VAR, str(tmp_path / ".srcly_cache"))
+    src = tmp_path / "a.ts"
+    src.write_text("export function a() { return 1; }\n", encoding="utf-8")
+
+    analyzer = TreeSitterAnalyzer()
+    first = analyzer.analyze_file(str(src))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache miss: file was re-analyzed")
+
+    monkeypatch.setattr(analyzer, "_analyze_content", fail)
+    copy = tmp_path / "copy.ts"
+    copy.write_bytes(src.read_bytes())
+    second = analyzer.analyze_file(str(copy))
+
+    assert second.filename == str(copy)
+    assert [f.name for f in second.function_list] == [f.name for f in first.function_list]
+
+
+def test_refresh_reanalyzes_and_rewrites_entry(monkeypatch, tmp_path: Path) -> None:
+    monkeypatch.setenv(cache_module.METRICS_CACHE_ENV_VAR, str(tmp_path / ".srcly_cache"))
+    src = tmp_path / "a.ts"
+    src.write_text("export function a() { return 1; }\n", encoding="utf-8")
+
+    analyzer = TreeSitterAnalyzer()
+    analyzer.analyze_file(str(src))
+
+    fresh = FileMetrics(nloc=42, average_cyclomatic_complexity=0.0)
+    monkeypatch.setattr(analyzer, "_analyze_content", lambda *args, **kwargs: fresh)
+
+    assert analyzer.analyze_file(str(src)).nloc != 42
+    assert analyzer.analyze_file(str(src), refresh=True).nloc == 42
+    assert analyzer.analyze_file(str(src)).nloc == 42
+
+
+def test_cache_persists_across_connections(tmp_path: Path) -> None:
+    path = tmp_path / cache_module.METRICS_CACHE_FILE_NAME
+    key = cache_module.metrics_cache_key(b"const a = 1;", "ts")
+    child = FunctionMetrics(name="inner", cyclomatic_complexity=1, nloc=1, start_line=2, end_line=2)
+    outer = FunctionMetrics(
+        name="outer", cyclomatic_complexity=2, nloc=3, start_line=1, end_line=3, children=[child]
+    )
+    metrics = FileMetrics(nloc=3, average_cyclomatic_complexity=2.0, function_list=[outer], filename="a.ts")
+
+    store = cache_module.MetricsCache(path)
+    store.put(key, metrics)
+    store.close()
+
+    assert cache_module.MetricsCache(path).get(key) == metrics
+    assert cache_module.metrics_cache_key(b"const a = 1;", "tsx") != key
+
+
+def test_key_tracks_analyzer_sources(monkeypatch) -> None:
+    services_dir = Path(cache_module.__file__).resolve().parent
+    for rel_path in cache_module.METRICS_CACHE_ANALYZER_SOURCES:
+        assert (services_dir / rel_path).is_file(), rel_path
+
+    key = cache_module.metrics_cache_key(b"const a = 1;", "ts")
+    monkeypatch.setattr(cache_module, "analyzer_version", lambda: "edited")
+    assert cache_module.metrics_cache_key(b"const a = 1;", "ts") != key
+
+
+def test_cache_disabled_by_default(monkeypatch) -> None:
+    monkeypatch.delenv(cache_module.METRICS_CACHE_ENV_VAR, raising=False)
+    assert cache_module.get_metrics_cache() is None
+
+
+def test_python_and_css_results_are_cached(monkeypatch, tmp_path: Path) -> None:
+    from app.services.css.css_analysis import CssTreeSitterAnalyzer
+    from app.services.python.python_analysis import PythonTreeSitterAnalyzer
+
+    monkeypatch.setenv(cache_module.METRICS_CACHE_ENV_VAR, str(tmp_path / ".srcly_cache"))
+    py_src = tmp_path / "a.py"
+    py_src.write_text("def a():\n    return 1\n", encoding="utf-8")
+    css_src = tmp_path / "a.css"
+    css_src.write_text(".a { color: red; }\n", encoding="utf-8")
+
+    py_analyzer = PythonTreeSitterAnalyzer()
+    css_analyzer = CssTreeSitterAnalyzer()
+    py_first = py_analyzer.analyze_file(str(py_src))
+    css_first = css_analyzer.analyze_file(str(css_src))
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cache miss: file was re-analyzed")
+
+    monkeypatch.setattr(py_analyzer, "_analyze_content", fail)
+    monkeypatch.setattr(css_analyzer, "_analyze_content", fail)
+
+    assert py_analyzer.analyze_file(str(py_src)).nloc == py_first.nloc
+    assert css_analyzer.analyze_file(str(css_src)).nloc == css_first.nloc
+
+
+def test_retiring_worker_flushes_pending_writes(monkeypatch, tmp_path: Path) -> None:
+    """A worker over its memory ceiling persists buffered entries before reporting."""
+    import multiprocessing
+
+    from app.services import analysis
+
+    cache_dir = tmp_path / ".srcly_cache"
+    monkeypatch.setenv(cache_module.METRICS_CACHE_ENV_VAR, str(cache_dir))
+    key = cache_module.metrics_cache_key(b"const a = 1;", "ts")
+    metrics = FileMetrics(nloc=1, average_cyclomatic_complexity=0.0)
+
+    def analyze(file_path, **kwargs):
+        cache_module.get_metrics_cache().put(key, metrics)
+        return {"filename": file_path}
+
+    monkeypatch.setattr(analysis, "analyze_single_file", analyze)
+    monkeypatch.setattr(analysis, "_peak_rss_bytes", lambda: analysis.MAX_ANALYSIS_RSS_BYTES + 1)
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    parent_conn.send("a.ts")
+    analysis._analysis_worker_loop(child_conn)
+
+    assert parent_conn.recv() == ({"filename": "a.ts"}, False)
+    fresh = cache_module.MetricsCache(cache_dir / cache_module.METRICS_CACHE_FILE_NAME)
+    assert fresh.get(key) == metrics
@@ -194,6 +194,8 @@ def test_cli_scan_subcommand_can_write_tree_json_to_stdout(
     captured = capsys.readouterr()
     payload = json.loads(captured.out)
     assert payload["path"] == str(root)
+    # Same layout as the other JSON artifacts: sorted keys, ASCII-only.
+    assert captured.out == json.dumps(tree.model_dump(mode="json"), indent=2, sort_keys=True) + "\n"
 
 
 def test_cli_report_subcommand_writes_report_artifacts(
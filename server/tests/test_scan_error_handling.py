@@ -70,3 +70,39 @@ def test_scan_codebase_skips_error_results(monkeypatch, tmp_path: Path) -> None:
     files = [child for child in root_node.children if child.type == "file"]
     assert [f.name for f in files] == ["good.py"]
 
+
+
+def test_hard_timeout_runner_reuses_workers(tmp_path: Path) -> None:
+    """A single worker process should analyze every file in turn."""
+    paths = []
+    for i in range(3):
+        src = tmp_path / f"m{i}.py"
+        src.write_text(f"def f{i}():\n    return {i}\n", encoding="utf-8")
+        paths.append(str(src))
+
+    results = analysis._run_file_analyses_with_hard_timeouts(
+        paths, timeout_seconds=30.0, max_workers=1, verbose=False
+    )
+
+    assert sorted(r.filename for r in results) == paths
+
+
+def test_discover_files_applies_ignore_rules(tmp_path: Path) -> None:
+    """Discovery prunes ignored dirs/extensions and counts gitignored files."""
+    root = tmp_path / "repo"
+    (root / ".git").mkdir(parents=True)
+    (root / ".gitignore").write_text("*.gen.ts\n", encoding="utf-8")
+    (root / "src").mkdir()
+    (root / "src" / "a.ts").write_text("export const a = 1;\n", encoding="utf-8")
+    (root / "src" / "b.gen.ts").write_text("export const b = 1;\n", encoding="utf-8")
+    (root / "src" / "logo.png").write_bytes(b"")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.ts").write_text("", encoding="utf-8")
+
+    ignore_root, spec = analysis._load_gitignore_spec(root)
+    files, ignored_counts = analysis._discover_files(root, ignore_root, spec)
+
+    src_files = [f for f in files if Path(f).parent == root / "src"]
+    assert src_files == [str(root / "src" / "a.ts")]
+    assert not any("node_modules" in f for f in files)
+    assert ignored_counts == {str(root / "src"): 1}
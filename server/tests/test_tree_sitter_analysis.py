@@ -3,6 +3,8 @@ from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
 
 @pytest.fixture
 def analyzer():
+    # Several tests here inspect the analyzer's own caches, so each gets a
+    # fresh instance instead of the shared session analyzer.
     return TreeSitterAnalyzer()
 
 def test_nested_functions(analyzer, tmp_path):
@@ -109,6 +111,96 @@ def test_tsx_handling(analyzer, tmp_path):
     def _has_descendant_named(node, name: str) -> bool:
         if node.name == name:
             return True
-        return any(_has_descendant_named(ch, name) for ch in getattr(node, "children", []) or [])
+        return any(_has_descendant_named(ch, name) for ch in getattr(node, "children", None) or ())
 
     assert _has_descendant_named(div_scope, "map(ƒ)")
+
+def test_walk_stays_within_subtree(analyzer):
+    from app.services.tree_walk import walk_tree
+
+    tree = analyzer.ts_parser.parse(b"const a = () => 1;\nfunction f() { return 2; }\n")
+    first = tree.root_node.children[0]
+
+    events = list(walk_tree(first))
+    entered = [n for n, _, entering in events if entering]
+    exited = [n for n, _, entering in events if not entering]
+
+    # Every node is entered and exited exactly once, and the walk never
+    # escapes into the sibling function declaration.
+    assert len(entered) == len(exited)
+    assert entered[0] == first and exited[-1] == first
+    assert all(n.type != "function_declaration" for n in entered)
+
+
+def test_kind_ids_match_node_types(analyzer):
+    from app.services.tree_walk import kind_ids_for, walk_tree
+    from app.services.typescript.typescript_analysis import TYPESCRIPT_LANGUAGE
+
+    tree = analyzer.ts_parser.parse(b"function f(a) { if (a) { return 'x'; } }\n")
+    names = frozenset({"if_statement", "string"})
+    kind_ids = kind_ids_for(TYPESCRIPT_LANGUAGE, names)
+
+    for node, _, entering in walk_tree(tree.root_node):
+        if entering:
+            assert (node.kind_id in kind_ids) == (node.type in names)
+
+def test_analyze_paths_matches_serial_analysis(analyzer, tmp_path):
+    paths = []
+    for i in range(3):
+        src = tmp_path / f"mod{i}.ts"
+        src.write_text(f"export function f{i}() {{ return {i}; }}\n", encoding="utf-8")
+        paths.append(str(src))
+
+    results = TreeSitterAnalyzer.analyze_paths(paths, workers=2)
+
+    assert [r.filename for r in results] == paths
+    assert [[f.name for f in r.function_list] for r in results] == [
+        [f.name for f in analyzer.analyze_file(p).function_list] for p in paths
+    ]
+
+
+def test_parsers_are_shared_per_thread():
+    assert TreeSitterAnalyzer().ts_parser is TreeSitterAnalyzer().ts_parser
+
+
+def test_analyze_edit_matches_full_analysis(analyzer, tmp_path):
+    from tree_sitter import Point
+    from app.services.typescript.typescript_analysis import InputEdit
+
+    path = str(tmp_path / "live.ts")
+    before = b"function a() { return 1; }\n"
+    analyzer.analyze_edit(path, before, [])
+
+    insert = b"function b() { if (x) { return 2; } }\n"
+    after = before + insert
+    edit = InputEdit(
+        start_byte=len(before),
+        old_end_byte=len(before),
+        new_end_byte=len(after),
+        start_point=Point(1, 0),
+        old_end_point=Point(1, 0),
+        new_end_point=Point(2, 0),
+    )
+    incremental = analyzer.analyze_edit(path, after, [edit])
+
+    (tmp_path / "live.ts").write_bytes(after)
+    full = TreeSitterAnalyzer().analyze_file(path)
+
+    assert [f.name for f in incremental.function_list] == ["a", "b"]
+    assert [f.cyclomatic_complexity for f in incremental.function_list] == [
+        f.cyclomatic_complexity for f in full.function_list
+    ]
+    assert incremental.nloc == full.nloc == 2
+
+
+def test_analyze_edit_keeps_only_recent_trees(analyzer, tmp_path, monkeypatch):
+    from app.services.typescript import typescript_analysis
+
+    monkeypatch.setattr(typescript_analysis, "MAX_CACHED_TREES", 2)
+    paths = [str(tmp_path / f"f{i}.ts") for i in range(3)]
+    for path in paths:
+        analyzer.analyze_edit(path, b"const a = 1;\n", [])
+    # Touching the oldest file makes it the most recent one again.
+    analyzer.analyze_edit(paths[1], b"const a = 2;\n", [])
+
+    assert list(analyzer._trees) == [paths[2], paths[1]]
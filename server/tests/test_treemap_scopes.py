@@ -1,9 +1,4 @@
-
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
-
-def test_treemap_scopes(tmp_path):
-    analyzer = TreeSitterAnalyzer()
-
+def test_treemap_scopes(analyzer, write_source):
     code = """
     const myObj = {
         foo: function() {
@@ -31,10 +26,9 @@ def test_treemap_scopes(tmp_path):
     };
     """
 
-    f = tmp_path / "test_treemap.ts"
-    f.write_text(code, encoding="utf-8")
+    path = write_source(code, "test_treemap.ts")
 
-    metrics = analyzer.analyze_file(str(f))
+    metrics = analyzer.analyze_file(path)
     
     # We expect 'myObj', 'MyClass', 'MyInterface', 'MyType' to be in the function_list
     # or some equivalent list of top-level items that become nodes in the treemap.
@@ -1,5 +1,3 @@
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
-
 # Create a simple TypeScript code snippet
 TYPESCRIPT_CODE = """
 function add(a: number, b: number): number {
@@ -45,11 +43,10 @@ function App() {
 export default App;
 """
 
-def test_typescript_analysis(tmp_path):
+def test_typescript_analysis(analyzer, tmp_path):
     f = tmp_path / "test.ts"
     f.write_text(TYPESCRIPT_CODE, encoding="utf-8")
     
-    analyzer = TreeSitterAnalyzer()
     metrics = analyzer.analyze_file(str(f))
     
     assert metrics.nloc > 0
@@ -64,11 +61,10 @@ def test_typescript_analysis(tmp_path):
     # 1 (base) + 1 (if) + 1 (for) + 1 (else if) = 4
     assert complex_func.cyclomatic_complexity == 4
 
-def test_tsx_analysis(tmp_path):
+def test_tsx_analysis(analyzer, tmp_path):
     f = tmp_path / "test.tsx"
     f.write_text(TSX_CODE, encoding="utf-8")
     
-    analyzer = TreeSitterAnalyzer()
     metrics = analyzer.analyze_file(str(f))
     
     assert metrics.nloc > 0
@@ -86,7 +82,7 @@ def test_tsx_analysis(tmp_path):
     # 1 (base) + 1 (if) = 2
     assert handle_click.cyclomatic_complexity == 2
 
-def test_nested_functions(tmp_path):
+def test_nested_functions(analyzer, tmp_path):
     code = """
     function outer() {
         if (true) {}
@@ -98,7 +94,6 @@ def test_nested_functions(tmp_path):
     f = tmp_path / "nested.ts"
     f.write_text(code, encoding="utf-8")
     
-    analyzer = TreeSitterAnalyzer()
     metrics = analyzer.analyze_file(str(f))
     
     function_scopes = [fn for fn in metrics.function_list if fn.name != "(imports)"]
@@ -112,7 +107,7 @@ def test_nested_functions(tmp_path):
     assert inner.cyclomatic_complexity == 2
 
 
-def test_import_scope_loc_and_largest_block_ts_tsx(tmp_path):
+def test_import_scope_loc_and_largest_block_ts_tsx(analyzer, tmp_path):
     """
     We create imports in two separate blocks. The analyzer should:
     - sum LOC across all import statements into (imports).nloc
@@ -126,7 +121,6 @@ import { D } from 'd';
 export function run() { return z; }
 """
 
-    analyzer = TreeSitterAnalyzer()
     for ext in ("ts", "tsx"):
         f = tmp_path / f"imports.{ext}"
         f.write_text(code, encoding="utf-8")
@@ -139,7 +133,7 @@ export function run() { return z; }
         assert imp.end_line == 5
 
 
-def test_import_scope_allows_blank_lines_in_block_ts(tmp_path):
+def test_import_scope_allows_blank_lines_in_block_ts(analyzer, tmp_path):
     code = """import A from 'a';
 
 import { B } from 'b';
@@ -148,7 +142,6 @@ const x = 1;
     f = tmp_path / "blank_imports.ts"
     f.write_text(code, encoding="utf-8")
 
-    analyzer = TreeSitterAnalyzer()
     metrics = analyzer.analyze_file(str(f))
 
     imp = next((fn for fn in metrics.function_list if fn.name == "(imports)"), None)
@@ -158,3 +151,25 @@ const x = 1;
     # The "largest contiguous import block" should span across the blank line.
     assert imp.start_line == 1
     assert imp.end_line == 3
+
+def test_import_scope_spans_largest_blank_separated_block(analyzer, tmp_path):
+    code = (
+        "import a from 'a';\n"
+        "\n"
+        "   \n"
+        "import {\n"
+        "  b,\n"
+        "} from 'b';\n"
+        "const x = 1;\n"
+        "import c from 'c';\n"
+    )
+    f = tmp_path / "imports.ts"
+    f.write_text(code, encoding="utf-8")
+
+    metrics = analyzer.analyze_file(str(f))
+
+    imports = metrics.function_list[0]
+    assert imports.name == "(imports)"
+    # Blank lines join the first two imports; the const splits off the third.
+    assert (imports.start_line, imports.end_line) == (1, 6)
+    assert imports.nloc == 5
@@ -1,17 +1,7 @@
-import pytest
-
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
-
-
-@pytest.fixture
-def analyzer():
-    return TreeSitterAnalyzer()
-
-
 def _find_node_by_name(root, name: str):
     if root.name == name:
         return root
-    for child in getattr(root, "children", []) or []:
+    for child in getattr(root, "children", None) or ():
         found = _find_node_by_name(child, name)
         if found is not None:
             return found
@@ -1,10 +1,3 @@
-import pytest
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
-
-@pytest.fixture
-def analyzer():
-    return TreeSitterAnalyzer()
-
 def test_tsx_metrics(analyzer, tmp_path):
     tsx_content = """
     import React, { useEffect, useState } from 'react';
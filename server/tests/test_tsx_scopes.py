@@ -1,9 +1,4 @@
-
-from app.services.typescript.typescript_analysis import TreeSitterAnalyzer
-
-def test_tsx_scopes_complex(tmp_path):
-    analyzer = TreeSitterAnalyzer()
-
+def test_tsx_scopes_complex(analyzer, tmp_path):
     code = """
     function MyComp() {
         return (
@@ -58,9 +53,7 @@ def test_tsx_scopes_complex(tmp_path):
     onselect_scope = next((c for c in item_scope.children if "onSelect" in c.name or "function" in c.name), None)
     assert onselect_scope is not None, "onSelect function should be a child of Item"
 
-def test_tsx_scopes_simple(tmp_path):
-    analyzer = TreeSitterAnalyzer()
-    
+def test_tsx_scopes_simple(analyzer, tmp_path):
     code = """
     const Simple = () => (
         <div>
@@ -92,15 +85,13 @@ def test_tsx_scopes_simple(tmp_path):
     assert len(fragment.children) == 0, "Simple TSX root should have no nested scopes"
 
 
-def test_tsx_scopes_nested_show_does_not_rename_root(tmp_path):
+def test_tsx_scopes_nested_show_does_not_rename_root(analyzer, tmp_path):
     """
     When a component defines an inner helper that returns <Show> before the main
     TSX return block, the virtual TSX root for the outer component should still
     be named after the true top-level element (<ExplorerContext.Provider>), not
     the inner <Show>.
     """
-    analyzer = TreeSitterAnalyzer()
-
     code = """
     function Explorer() {
         const SortIcon = (p) => (